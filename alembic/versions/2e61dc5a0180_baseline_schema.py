@@ -0,0 +1,368 @@
+"""Baseline schema
+
+Revision ID: 2e61dc5a0180
+Revises: 196993effbf8
+Create Date: 2026-10-19 09:12:31.408215
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '2e61dc5a0180'
+down_revision = '196993effbf8'
+branch_labels = None
+depends_on = None
+
+# The tables as they were at this revision, in dependency order. This is a
+# frozen snapshot: tables added later get their own migrations, so never
+# derive it from the live models.
+TABLES = (
+    'customers',
+    'discounts',
+    'notifications',
+    'payments',
+    'pos_discounts',
+    'roles',
+    'settings',
+    'suppliers',
+    'loyalty_programs',
+    'products',
+    'purchase_orders',
+    'sales',
+    'users',
+    'employees',
+    'inventories',
+    'pos_sales',
+    'transactions',
+    'pos_payments',
+    'pos_sale_items',
+)
+ENUMS = ('discounttypeenum', 'paymentmethodenum', 'paymentstatusenum', 'purchaseorderstatusenum')
+
+
+def _existing_tables():
+    if context.is_offline_mode():
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+# Tables used to be created by `create_all` at application import. Creating
+# them here (skipping any that exist) makes `alembic upgrade head` build a
+# fresh database and is a no-op on databases that already have the schema.
+def upgrade() -> None:
+    existing = _existing_tables()
+    if 'customers' not in existing:
+        op.create_table(
+            'customers',
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('contact_info', sa.String(length=100), nullable=False),
+            sa.Column('loyalty_points', sa.Integer(), nullable=False),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_customers_id', 'customers', ['id'], unique=False)
+        op.create_index('ix_customers_name', 'customers', ['name'], unique=False)
+    if 'discounts' not in existing:
+        op.create_table(
+            'discounts',
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('type', sa.Enum('PERCENTAGE', 'FIXED_AMOUNT', name='discounttypeenum'), nullable=False),
+            sa.Column('value', sa.Float(), nullable=False),
+            sa.Column('applicable_products', sa.JSON(), nullable=True),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_discounts_id', 'discounts', ['id'], unique=False)
+    if 'notifications' not in existing:
+        op.create_table(
+            'notifications',
+            sa.Column('type', sa.String(length=50), nullable=False),
+            sa.Column('message', sa.String(length=500), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_notifications_id', 'notifications', ['id'], unique=False)
+    if 'payments' not in existing:
+        op.create_table(
+            'payments',
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('method', sa.Enum('CREDIT_CARD', 'DEBIT_CARD', 'CASH', 'ONLINE', name='paymentmethodenum'), nullable=False),
+            sa.Column('status', sa.Enum('AUTHORIZED', 'CAPTURED', 'FAILED', name='paymentstatusenum'), nullable=False),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_payments_id', 'payments', ['id'], unique=False)
+    if 'pos_discounts' not in existing:
+        op.create_table(
+            'pos_discounts',
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('type', sa.String(length=20), nullable=False),
+            sa.Column('value', sa.Float(), nullable=False),
+            sa.Column('applicable_products', sa.JSON(), nullable=True),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_pos_discounts_id', 'pos_discounts', ['id'], unique=False)
+    if 'roles' not in existing:
+        op.create_table(
+            'roles',
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('permissions', sa.JSON(), nullable=True),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name')
+        )
+        op.create_index('ix_roles_id', 'roles', ['id'], unique=False)
+    if 'settings' not in existing:
+        op.create_table(
+            'settings',
+            sa.Column('key', sa.String(length=100), nullable=False),
+            sa.Column('value', sa.Text(), nullable=False),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_settings_id', 'settings', ['id'], unique=False)
+        op.create_index('ix_settings_key', 'settings', ['key'], unique=True)
+    if 'suppliers' not in existing:
+        op.create_table(
+            'suppliers',
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('contact_info', sa.String(length=100), nullable=False),
+            sa.Column('product_list', sa.JSON(), nullable=True),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_suppliers_id', 'suppliers', ['id'], unique=False)
+        op.create_index('ix_suppliers_name', 'suppliers', ['name'], unique=False)
+    if 'loyalty_programs' not in existing:
+        op.create_table(
+            'loyalty_programs',
+            sa.Column('customer_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('points', sa.Integer(), nullable=False),
+            sa.Column('tier', sa.String(length=20), nullable=False),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_loyalty_programs_id', 'loyalty_programs', ['id'], unique=False)
+    if 'products' not in existing:
+        op.create_table(
+            'products',
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('category', sa.String(length=50), nullable=True),
+            sa.Column('discount_id', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(['discount_id'], ['discounts.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_products_id', 'products', ['id'], unique=False)
+        op.create_index('ix_products_name', 'products', ['name'], unique=False)
+    if 'purchase_orders' not in existing:
+        op.create_table(
+            'purchase_orders',
+            sa.Column('supplier_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('product_list', sa.JSON(), nullable=False),
+            sa.Column('status', sa.Enum('PENDING', 'SHIPPED', 'DELIVERED', name='purchaseorderstatusenum'), nullable=False),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(['supplier_id'], ['suppliers.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_purchase_orders_id', 'purchase_orders', ['id'], unique=False)
+    if 'sales' not in existing:
+        op.create_table(
+            'sales',
+            sa.Column('customer_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('total_amount', sa.Float(), nullable=False),
+            sa.Column('discount_id', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('product_list', sa.JSON(), nullable=False),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+            sa.ForeignKeyConstraint(['discount_id'], ['discounts.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_sales_id', 'sales', ['id'], unique=False)
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('username', sa.String(length=20), nullable=False),
+            sa.Column('password_hash', sa.String(length=255), nullable=False),
+            sa.Column('role_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=False),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_users_id', 'users', ['id'], unique=False)
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    if 'employees' not in existing:
+        op.create_table(
+            'employees',
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('position', sa.String(length=50), nullable=False),
+            sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id')
+        )
+        op.create_index('ix_employees_id', 'employees', ['id'], unique=False)
+        op.create_index('ix_employees_name', 'employees', ['name'], unique=False)
+    if 'inventories' not in existing:
+        op.create_table(
+            'inventories',
+            sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('quantity', sa.Float(), nullable=False),
+            sa.Column('reorder_level', sa.Float(), nullable=False),
+            sa.Column('supplier_id', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+            sa.ForeignKeyConstraint(['supplier_id'], ['suppliers.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('product_id')
+        )
+        op.create_index('ix_inventories_id', 'inventories', ['id'], unique=False)
+    if 'pos_sales' not in existing:
+        op.create_table(
+            'pos_sales',
+            sa.Column('customer_id', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('cashier_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('total_amount', sa.Float(), nullable=False),
+            sa.Column('discount_id', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(['cashier_id'], ['employees.id'], ),
+            sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+            sa.ForeignKeyConstraint(['discount_id'], ['discounts.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_pos_sales_id', 'pos_sales', ['id'], unique=False)
+    if 'transactions' not in existing:
+        op.create_table(
+            'transactions',
+            sa.Column('sale_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('employee_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('payment_type', sa.String(length=20), nullable=False),
+            sa.Column('payment_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+            sa.ForeignKeyConstraint(['payment_id'], ['payments.id'], ),
+            sa.ForeignKeyConstraint(['sale_id'], ['sales.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_transactions_id', 'transactions', ['id'], unique=False)
+    if 'pos_payments' not in existing:
+        op.create_table(
+            'pos_payments',
+            sa.Column('sale_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('payment_method', sa.String(length=50), nullable=False),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('transaction_id', sa.String(length=100), nullable=True),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(['sale_id'], ['pos_sales.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_pos_payments_id', 'pos_payments', ['id'], unique=False)
+    if 'pos_sale_items' not in existing:
+        op.create_table(
+            'pos_sale_items',
+            sa.Column('sale_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('unit_price', sa.Float(), nullable=False),
+            sa.Column('subtotal', sa.Float(), nullable=False),
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+            sa.ForeignKeyConstraint(['sale_id'], ['pos_sales.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_pos_sale_items_id', 'pos_sale_items', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    existing = _existing_tables()
+    for table in reversed(TABLES):
+        if table in existing:
+            op.drop_table(table)
+    for name in ENUMS:
+        op.execute(f"DROP TYPE IF EXISTS {name}")
@@ -0,0 +1,38 @@
+"""Add revoked_tokens
+
+Revision ID: 5c1d2e7a9b40
+Revises: 8f079600e9d3
+Create Date: 2026-10-19 14:22:09.581347
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5c1d2e7a9b40'
+down_revision = '8f079600e9d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'revoked_tokens',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('jti', sa.String(length=32), nullable=False, unique=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=True),
+    )
+    op.create_index('ix_revoked_tokens_id', 'revoked_tokens', ['id'])
+    op.create_index('ix_revoked_tokens_expires_at', 'revoked_tokens', ['expires_at'])
+    # Workers sync new revocations by creation time.
+    op.create_index('ix_revoked_tokens_created_at', 'revoked_tokens', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('revoked_tokens')
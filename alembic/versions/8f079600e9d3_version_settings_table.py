@@ -0,0 +1,30 @@
+"""Version the settings table
+
+Revision ID: 8f079600e9d3
+Revises: e9b65ca87b30
+Create Date: 2026-10-19 13:05:44.902187
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8f079600e9d3'
+down_revision = 'e9b65ca87b30'
+branch_labels = None
+depends_on = None
+
+
+# The settings store snapshot carries this version; the settings API serves
+# conditional GETs from it.
+def upgrade() -> None:
+    op.execute("INSERT INTO table_versions (table_name) VALUES ('settings') ON CONFLICT (table_name) DO NOTHING")
+    op.execute("DROP TRIGGER IF EXISTS settings_version ON settings")
+    op.execute(
+        "CREATE TRIGGER settings_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON settings "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS settings_version ON settings")
+    op.execute("DELETE FROM table_versions WHERE table_name = 'settings'")
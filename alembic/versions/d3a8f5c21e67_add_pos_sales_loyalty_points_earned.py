@@ -0,0 +1,26 @@
+"""Add loyalty_points_earned to pos_sales
+
+Revision ID: d3a8f5c21e67
+Revises: b7e4a91c3f28
+Create Date: 2026-10-19 18:42:10.381207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8f5c21e67'
+down_revision = 'b7e4a91c3f28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'pos_sales',
+        sa.Column('loyalty_points_earned', sa.Integer(), server_default='0', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('pos_sales', 'loyalty_points_earned')
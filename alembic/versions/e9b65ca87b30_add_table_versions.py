@@ -0,0 +1,55 @@
+"""Add table_versions for conditional GET
+
+Revision ID: e9b65ca87b30
+Revises: 2e61dc5a0180
+Create Date: 2026-10-19 10:41:07.215334
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e9b65ca87b30'
+down_revision = '2e61dc5a0180'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ("products", "customers", "roles")
+
+
+# One row per table, bumped by a statement-level trigger inside the writing
+# transaction, so the version becomes visible together with the data.
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0,
+            changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_versions (table_name, version, changed_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name)
+            DO UPDATE SET version = table_versions.version + 1, changed_at = now();
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in VERSIONED_TABLES:
+        op.execute(
+            f"INSERT INTO table_versions (table_name) VALUES ('{table}') ON CONFLICT (table_name) DO NOTHING"
+        )
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_version ON {table}")
+        op.execute(
+            f"CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+        )
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version()")
+    op.execute("DROP TABLE IF EXISTS table_versions")
@@ -1,11 +1,13 @@
-from typing import Generator, Optional
+from typing import Optional
+from uuid import UUID
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
-from app.core.config import settings
-from app.core.database import SessionLocal
+from app.core.database import get_db
+from app.core.permissions import CompiledRole, role_permissions
+from app.core.security import decode_token
+from app.crud.customer import employee as employee_crud
 from app.crud.user import user as user_crud
 from app.models.user import User
 
@@ -13,47 +15,61 @@ from app.models.user import User
 security = HTTPBearer()
 
 
-def get_db() -> Generator:
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_token_payload(token: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """
-    Get database session.
+    Decoded access token claims; decoded once per request however many dependencies ask.
+    Refresh tokens and revoked tokens are rejected.
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    payload = decode_token(token.credentials)
+    if payload is None:
+        raise _credentials_exception()
+    return payload
 
 
 def get_current_user(
     db: Session = Depends(get_db),
-    token: HTTPAuthorizationCredentials = Depends(security)
+    payload: dict = Depends(get_token_payload)
 ) -> User:
     """
     Get current user from JWT token.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    try:
-        payload = jwt.decode(
-            token.credentials, settings.secret_key, algorithms=[settings.algorithm]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    # Eagerly load the role relationship to avoid lazy loading issues
-    user = db.query(User).options(joinedload(User.role)).filter(User.id == user_id).first()
+    user_id: str = payload["sub"]
+
+    # Authorization reads the cached compiled role by `role_id`; the role row itself is not needed.
+    user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
+def get_current_employee_id(
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_token_payload),
+    current_user: User = Depends(get_current_user),
+) -> UUID:
+    """
+    Employee id of the current user, from the token's `employee_id` claim.
+
+    Tokens minted before the claim existed fall back to the cached mapping,
+    provisioning the employee on first use.
+    """
+    claim = payload.get("employee_id")
+    if claim:
+        try:
+            return UUID(claim)
+        except ValueError:
+            raise _credentials_exception()
+    return employee_crud.provision(db, user_id=current_user.id)
+
+
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """
     Get current active user.
@@ -63,17 +79,33 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     return current_user
 
 
-def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_role(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> CompiledRole:
+    """
+    Compiled permissions of the current user's role (cached per worker).
+    """
+    role = role_permissions.get(db, current_user.role_id)
+    if role is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User role not found"
+        )
+    return role
+
+
+def get_current_admin_user(
+    current_user: User = Depends(get_current_user),
+    role: CompiledRole = Depends(get_current_role),
+) -> User:
     """
     Get current admin user.
     """
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    
-    # Get role name from relationship
-    role_name = current_user.role.name if hasattr(current_user.role, 'name') else str(current_user.role)
-    
-    if role_name != "admin":
+
+    if role.name != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user doesn't have enough privileges"
@@ -81,17 +113,20 @@ def get_current_admin_user(current_user: User = Depends(get_current_user)) -> Us
     return current_user
 
 
-def get_current_manager_or_admin_user(current_user: User = Depends(get_current_user)) -> User:
+MANAGER_OR_ADMIN_ROLES = frozenset({"admin", "manager", "user"})
+
+
+def get_current_manager_or_admin_user(
+    current_user: User = Depends(get_current_user),
+    role: CompiledRole = Depends(get_current_role),
+) -> User:
     """
     Get current manager or admin user.
     """
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    
-    # Get role name from relationship
-    role_name = current_user.role.name if hasattr(current_user.role, 'name') else str(current_user.role)
-    
-    if role_name not in ["admin", "manager", "user"]:
+
+    if role.name not in MANAGER_OR_ADMIN_ROLES:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
@@ -103,16 +138,11 @@ def require_role(role: str):
     """
     Decorator to require a specific role for access.
     """
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
-        if not hasattr(current_user, 'role') or not current_user.role:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="User role not found"
-            )
-        
-        user_role = current_user.role.name if hasattr(current_user.role, 'name') else str(current_user.role)
-        
-        if user_role != role and user_role != "admin":
+    def role_checker(
+        current_user: User = Depends(get_current_user),
+        user_role: CompiledRole = Depends(get_current_role),
+    ) -> User:
+        if user_role.name != role and user_role.name != "admin":
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Access denied. Required role: {role}"
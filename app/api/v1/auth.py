@@ -1,12 +1,15 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.core.security import create_access_token, create_refresh_token, verify_password, verify_token
+from app.core.revocation import revocation_list
+from app.core.security import create_access_token, create_refresh_token, decode_token, verify_password, verify_token
 from app.schemas.user import Token, LoginRequest, RefreshTokenRequest, User, UserRegister, UserCreate
 from app.crud.user import get_user_by_username, user as crud_user, role as crud_role
-from app.api.deps import get_current_user
+from app.crud.customer import employee as crud_employee
+from app.api.deps import get_current_user, get_token_payload
 
 router = APIRouter()
 
@@ -29,7 +32,9 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(subject=user.id)
+    # Provision the cashier employee here, once, instead of during a sale.
+    employee_id = crud_employee.provision(db, user_id=user.id)
+    access_token = create_access_token(subject=user.id, claims={"employee_id": str(employee_id)})
     refresh_token = create_refresh_token(subject=user.id)
     
     return Token(
@@ -79,12 +84,22 @@ async def register(
 
 
 @router.post("/logout", summary="User logout")
-async def logout():
+def logout(
+    refresh_data: Optional[RefreshTokenRequest] = None,
+    payload: dict = Depends(get_token_payload),
+    db: Session = Depends(get_db)
+):
     """
     User logout endpoint.
     
-    In a production environment, you would typically blacklist the token.
+    Revokes the access token used for this request and, when it is sent, the
+    refresh token of the same user.
     """
+    revocation_list.revoke_payload(db, payload)
+    if refresh_data is not None:
+        refresh_payload = decode_token(refresh_data.refresh_token, token_type="refresh")
+        if refresh_payload is not None and refresh_payload["sub"] == payload["sub"]:
+            revocation_list.revoke_payload(db, refresh_payload)
     return {"message": "Successfully logged out"}
 
 
@@ -98,7 +113,7 @@ async def refresh_token(
     """
     from uuid import UUID
     
-    subject = verify_token(refresh_data.refresh_token)
+    subject = verify_token(refresh_data.refresh_token, token_type="refresh")
     if subject is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -120,7 +135,8 @@ async def refresh_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(subject=user.id)
+    employee_id = crud_employee.provision(db, user_id=user.id)
+    access_token = create_access_token(subject=user.id, claims={"employee_id": str(employee_id)})
     new_refresh_token = create_refresh_token(subject=user.id)
     
     return Token(
@@ -0,0 +1,163 @@
+from uuid import UUID
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_employee_id, get_current_user, get_db
+from app.api.v1.sales import record_committed_sale
+from app.crud import customer as customer_crud, pos as pos_crud, product as product_crud
+from app.models.user import User
+from app.schemas.pos import CartCreate, CartItemAdd, CartItemUpdate
+from app.utils.carts import Cart, CartConflict, cart_store
+from app.utils.settings_store import settings_store
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _own_cart(cart_id: str, current_user: User) -> Cart:
+    cart = cart_store.get(cart_id)
+    if cart is None or cart.user_id != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Cart not found")
+    return cart
+
+
+def _update(cart_id: str, current_user: User, change) -> dict:
+    _own_cart(cart_id, current_user)
+    try:
+        cart = cart_store.update(cart_id, change)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CartConflict:
+        raise HTTPException(status_code=409, detail="Cart is being changed by another request; retry")
+    if cart is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    return cart.to_dict()
+
+
+def _product(db: Session, product_id: UUID):
+    product = product_crud.product.get_cached(db, id=product_id)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+def create_cart(
+    *,
+    db: Session = Depends(get_db),
+    cart_in: CartCreate,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Open a draft cart. Nothing is written to the database until it is finalized.
+    """
+    customer_id = None
+    if cart_in.customer_id is not None:
+        if customer_crud.customer.get_cached(db, id=cart_in.customer_id) is None:
+            raise HTTPException(status_code=404, detail="Customer not found")
+        customer_id = str(cart_in.customer_id)
+    cart = cart_store.create(str(current_user.id), customer_id, tax_rate=settings_store["tax_rate"])
+    return cart.to_dict()
+
+
+@router.get("/{cart_id}")
+def read_cart(
+    cart_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get a draft cart with its running totals.
+    """
+    return _own_cart(cart_id, current_user).to_dict()
+
+
+@router.post("/{cart_id}/items")
+def scan_item(
+    *,
+    db: Session = Depends(get_db),
+    cart_id: str,
+    item_in: CartItemAdd,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Add a product at its current price; scanning it again raises the quantity.
+    """
+    product = _product(db, item_in.product_id)
+    return _update(cart_id, current_user, lambda cart: cart.scan(
+        str(product.id), product.name, product.price, item_in.quantity, item_in.discount_amount
+    ))
+
+
+@router.put("/{cart_id}/items/{product_id}")
+def update_item(
+    *,
+    db: Session = Depends(get_db),
+    cart_id: str,
+    product_id: UUID,
+    item_in: CartItemUpdate,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Set the quantity and discount of a line; quantity 0 removes it.
+    """
+    product = _product(db, product_id)
+    return _update(cart_id, current_user, lambda cart: cart.set_line(
+        str(product.id), product.name, product.price, item_in.quantity, item_in.discount_amount
+    ))
+
+
+@router.delete("/{cart_id}/items/{product_id}")
+def remove_item(
+    cart_id: str,
+    product_id: UUID,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Remove a line from the cart.
+    """
+    return _update(cart_id, current_user, lambda cart: cart.set_line(str(product_id), "", 0, 0))
+
+
+@router.post("/{cart_id}/finalize", status_code=status.HTTP_201_CREATED)
+def finalize_cart(
+    *,
+    db: Session = Depends(get_db),
+    cart_id: str,
+    current_user: User = Depends(get_current_user),
+    employee_id: UUID = Depends(get_current_employee_id),
+):
+    """
+    Persist the cart as a sale with its items in a single transaction.
+    """
+    if not _own_cart(cart_id, current_user).lines:
+        raise HTTPException(status_code=400, detail="Cart is empty")
+    # Taking the cart out first makes a concurrent second finalize a 404.
+    try:
+        cart = cart_store.pop(cart_id)
+    except CartConflict:
+        raise HTTPException(status_code=409, detail="Cart is being changed by another request; retry")
+    if cart is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    try:
+        sale = pos_crud.pos_sale.create_from_cart(db, cart=cart, employee_id=employee_id)
+    except Exception as e:
+        db.rollback()
+        cart_store.put(cart)
+        logger.error(f"Error finalizing cart: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error finalizing cart: {str(e)}")
+    return record_committed_sale(sale)
+
+
+@router.delete("/{cart_id}", status_code=status.HTTP_204_NO_CONTENT)
+def discard_cart(
+    cart_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Discard a draft cart.
+    """
+    _own_cart(cart_id, current_user)
+    cart_store.discard(cart_id)
+    return None
@@ -0,0 +1,84 @@
+import logging
+import time
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_employee_id, get_current_user, get_db
+from app.api.v1.sales import record_committed_sale, sale_detail_serializer
+from app.core.config import settings
+from app.core.exceptions import BusinessLogicException, NotFoundException, ValidationException
+from app.crud import pos as pos_crud
+from app.crud.pos import PriceChanged
+from app.models.user import User
+from app.schemas.pos import CheckoutCreate
+from app.utils.carts import to_cents
+from app.utils.settings_store import settings_store
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+def checkout(
+    *,
+    db: Session = Depends(get_db),
+    response: Response,
+    checkout_in: CheckoutCreate,
+    current_user: User = Depends(get_current_user),
+    employee_id: UUID = Depends(get_current_employee_id),
+):
+    """
+    Record a whole checkout in one request and one transaction.
+
+    Prices the basket at current prices, writes the sale with its items and
+    tenders, takes the items off inventory and accrues the customer's loyalty
+    points. Items sent with a `unit_price` that is no longer current are
+    rejected with 409 and the current prices. Sending the same `checkout_id`
+    again returns the recorded sale with 200 and changes nothing.
+    """
+    started = time.perf_counter()
+    points_per_unit = settings_store["loyalty_points_per_unit"] if settings_store["loyalty_enabled"] else 0.0
+    try:
+        sale, created = pos_crud.pos_sale.checkout(
+            db,
+            checkout_in=checkout_in,
+            employee_id=employee_id,
+            tax_rate=settings_store["tax_rate"],
+            points_per_unit=points_per_unit,
+        )
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PriceChanged as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "current_prices": e.prices})
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except BusinessLogicException as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recording checkout: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error recording checkout: {str(e)}")
+
+    if created:
+        record_committed_sale(sale)
+    else:
+        response.status_code = status.HTTP_200_OK
+
+    tendered_cents = sum(to_cents(payment.amount) for payment in checkout_in.payments)
+    result = {
+        **sale_detail_serializer.row(sale),
+        "change_due": max(0, tendered_cents - to_cents(sale.total_amount)) / 100,
+        # Stored with the sale, so a replay reports what was accrued even if the rate changed since.
+        "loyalty_points_earned": sale.loyalty_points_earned,
+        "replayed": not created,
+    }
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms > settings.checkout_latency_budget_ms:
+        logger.warning(
+            f"Checkout {checkout_in.checkout_id} took {elapsed_ms:.1f}ms "
+            f"(budget {settings.checkout_latency_budget_ms:.0f}ms, {len(checkout_in.items)} items)"
+        )
+    return result
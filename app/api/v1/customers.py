@@ -1,9 +1,11 @@
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 
+from app.core.conditional import Validators, conditional_get
 from app.core.database import get_db
+from app.core.serialization import RowSerializer
 from app.api.deps import get_current_user
 from app.crud.customer import customer as customer_crud
 from app.models.user import User
@@ -11,6 +13,8 @@ from app.schemas.customer import Customer, CustomerCreate, CustomerUpdate
 
 router = APIRouter()
 
+customer_serializer = RowSerializer.for_schema(Customer)
+
 
 @router.get("/", response_model=List[Customer])
 def read_customers(
@@ -18,12 +22,13 @@ def read_customers(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_user),
-) -> List[Customer]:
+    validators: Validators = Depends(conditional_get("customers")),
+) -> Response:
     """
     Retrieve customers.
     """
     customers = customer_crud.get_multi(db, skip=skip, limit=limit)
-    return customers
+    return validators.apply(customer_serializer.response(customers))
 
 
 @router.post("/", response_model=Customer, status_code=status.HTTP_201_CREATED)
@@ -64,14 +69,15 @@ def read_customer(
     db: Session = Depends(get_db),
     customer_id: UUID,
     current_user: User = Depends(get_current_user),
-) -> Customer:
+    validators: Validators = Depends(conditional_get("customers")),
+) -> Response:
     """
     Get customer by ID.
     """
-    customer = customer_crud.get(db=db, id=customer_id)
+    customer = customer_crud.get_cached(db=db, id=customer_id, version=validators.version)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
-    return customer
+    return validators.apply(customer_serializer.one_response(customer))
 
 
 @router.delete("/{customer_id}")
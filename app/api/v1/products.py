@@ -1,9 +1,11 @@
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 
+from app.core.conditional import Validators, conditional_get
 from app.core.database import get_db
+from app.core.serialization import RowSerializer
 from app.api.deps import get_current_user
 from app.crud.product import product as product_crud
 from app.models.user import User
@@ -11,6 +13,8 @@ from app.schemas.product import Product, ProductCreate, ProductUpdate
 
 router = APIRouter()
 
+product_serializer = RowSerializer.for_schema(Product)
+
 
 @router.get("/", response_model=List[Product])
 def read_products(
@@ -18,12 +22,13 @@ def read_products(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_user),
-) -> List[Product]:
+    validators: Validators = Depends(conditional_get("products")),
+) -> Response:
     """
     Retrieve products.
     """
     products = product_crud.get_multi(db, skip=skip, limit=limit)
-    return products
+    return validators.apply(product_serializer.response(products))
 
 
 @router.post("/", response_model=Product, status_code=status.HTTP_201_CREATED)
@@ -64,14 +69,15 @@ def read_product(
     db: Session = Depends(get_db),
     product_id: UUID,
     current_user: User = Depends(get_current_user),
-) -> Product:
+    validators: Validators = Depends(conditional_get("products")),
+) -> Response:
     """
     Get product by ID.
     """
-    product = product_crud.get(db=db, id=product_id)
+    product = product_crud.get_cached(db=db, id=product_id, version=validators.version)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return validators.apply(product_serializer.one_response(product))
 
 
 @router.delete("/{product_id}")
@@ -1,8 +1,9 @@
 from typing import List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
+from app.core.conditional import Validators, conditional_get
 from app.core.database import get_db
 from app.schemas.user import Role, RoleCreate, RoleUpdate
 from app.crud.user import role as crud_role
@@ -13,15 +14,18 @@ router = APIRouter()
 
 @router.get("/", response_model=List[Role])
 def read_roles(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    validators: Validators = Depends(conditional_get("roles")),
 ):
     """
     Retrieve all roles.
     """
     roles = crud_role.get_multi(db, skip=skip, limit=limit)
+    validators.apply(response)
     return roles
 
 
@@ -49,8 +53,10 @@ def create_role(
 @router.get("/{role_id}", response_model=Role)
 def read_role(
     role_id: UUID,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    validators: Validators = Depends(conditional_get("roles")),
 ):
     """
     Get role by ID.
@@ -58,6 +64,7 @@ def read_role(
     role = crud_role.get(db, id=role_id)
     if not role:
         raise HTTPException(status_code=404, detail="Role not found")
+    validators.apply(response)
     return role
 
 
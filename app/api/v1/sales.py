@@ -2,22 +2,65 @@ from typing import List, Optional
 from datetime import datetime, timedelta
 from uuid import UUID
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_employee_id, get_current_user, get_db
+from app.core.config import settings
+from app.core.database import use_workload, REPORTING
+from app.core.serialization import RowSerializer
 from app.crud import pos as pos_crud, misc as misc_crud
 from app.models.user import User
 from app.models.pos import POSSale
+from app.utils.sales_cube import sales_cube
+from app.utils.top_products import top_products_tracker
+from app.utils.sales_stream import sales_broadcaster, SalesStreamFull
 from app.schemas.pos import (
     Sale, SaleCreate, SaleUpdate, SaleItem, SaleItemCreate,
-    Payment, PaymentCreate, Discount
+    Payment, PaymentCreate, Discount, DailySalesReport
 )
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Analytics that scan sales run on the reporting pool, away from checkout.
+reporting_pool = [Depends(use_workload(REPORTING))]
+
+_SALE_FIELDS = ("id", "customer_id", "cashier_id", "total_amount", "discount_id", "created_at", "updated_at")
+sale_serializer = RowSerializer(_SALE_FIELDS)
+sale_detail_serializer = RowSerializer(_SALE_FIELDS, nested={
+    "items": ("sale_items", RowSerializer(
+        ("id", "product_id", "quantity", "unit_price", "subtotal", "created_at", "updated_at")
+    )),
+    "payments": ("payments", RowSerializer(
+        ("id", "payment_method", "amount", "status", "transaction_id", "created_at", "updated_at")
+    )),
+})
+
+
+def sale_summary(sale: POSSale) -> dict:
+    # Return a simple dict response since POSSale model doesn't match Sale schema
+    return {
+        "id": str(sale.id),
+        "customer_id": str(sale.customer_id) if sale.customer_id else None,
+        "cashier_id": str(sale.cashier_id),
+        "total_amount": sale.total_amount,
+        "discount_id": str(sale.discount_id) if sale.discount_id else None,
+        "created_at": sale.created_at.isoformat(),
+        "updated_at": sale.updated_at.isoformat()
+    }
+
+
+def record_committed_sale(sale: POSSale) -> dict:
+    """Feed a committed sale to the live analytics and the sales stream; returns its summary."""
+    sale_data = sale_summary(sale)
+    sales_cube.mark_stale(sale.created_at)
+    top_products_tracker.record_sale(sale)
+    sales_broadcaster.publish(sale_data)
+    return sale_data
+
 
 @router.get("/")
 def read_sales(
@@ -45,19 +88,7 @@ def read_sales(
     else:
         sales = pos_crud.pos_sale.get_multi(db, skip=skip, limit=limit)
     
-    # Return simple dict responses
-    return [
-        {
-            "id": str(sale.id),
-            "customer_id": str(sale.customer_id),
-            "cashier_id": str(sale.cashier_id),
-            "total_amount": sale.total_amount,
-            "discount_id": str(sale.discount_id) if sale.discount_id else None,
-            "created_at": sale.created_at.isoformat(),
-            "updated_at": sale.updated_at.isoformat()
-        }
-        for sale in sales
-    ]
+    return sale_serializer.response(sales)
 
 
 @router.post("/")
@@ -66,25 +97,52 @@ def create_sale(
     db: Session = Depends(get_db),
     sale_in: SaleCreate,
     current_user: User = Depends(get_current_user),
+    employee_id: UUID = Depends(get_current_employee_id),
 ):
     """
     Create new sale.
     """
     try:
-        sale = pos_crud.pos_sale.create_with_user(db=db, obj_in=sale_in, user_id=current_user.id)
-        # Return a simple dict response since POSSale model doesn't match Sale schema
-        return {
-            "id": str(sale.id),
-            "customer_id": str(sale.customer_id) if sale.customer_id else None,
-            "cashier_id": str(sale.cashier_id),
-            "total_amount": sale.total_amount,
-            "discount_id": str(sale.discount_id) if sale.discount_id else None,
-            "created_at": sale.created_at.isoformat(),
-            "updated_at": sale.updated_at.isoformat()
-        }
+        sale = pos_crud.pos_sale.create_with_user(
+            db=db, obj_in=sale_in, user_id=current_user.id, employee_id=employee_id
+        )
     except Exception as e:
         logger.error(f"Error creating sale: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error creating sale: {str(e)}")
+    
+    return record_committed_sale(sale)
+
+
+@router.get("/stream")
+async def stream_sales(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Live feed of committed sales and today's running totals (Server-Sent Events).
+    
+    Emits a `totals` event on connect, then a `sale` event per sale created on
+    this worker. Slow clients get a `dropped` event when old events were
+    discarded to keep up.
+    """
+    # Release the connection used for authentication; the stream never queries.
+    db.close()
+    try:
+        subscriber = sales_broadcaster.subscribe()
+    except SalesStreamFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live sales streams on this worker",
+            headers={"Retry-After": "30"},
+        )
+    return StreamingResponse(
+        sales_broadcaster.stream(
+            subscriber, request.is_disconnected, settings.sales_stream_heartbeat_seconds
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/{sale_id}")
@@ -106,40 +164,7 @@ def read_sale(
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
     
-    # Return as dict to avoid schema validation issues
-    return {
-        "id": str(sale.id),
-        "customer_id": str(sale.customer_id),
-        "cashier_id": str(sale.cashier_id),
-        "total_amount": sale.total_amount,
-        "discount_id": str(sale.discount_id) if sale.discount_id else None,
-        "items": [
-            {
-                "id": str(item.id),
-                "product_id": str(item.product_id),
-                "quantity": item.quantity,
-                "unit_price": item.unit_price,
-                "subtotal": item.subtotal,
-                "created_at": item.created_at.isoformat(),
-                "updated_at": item.updated_at.isoformat()
-            }
-            for item in sale.sale_items
-        ],
-        "payments": [
-            {
-                "id": str(payment.id),
-                "payment_method": payment.payment_method,
-                "amount": payment.amount,
-                "status": payment.status,
-                "transaction_id": payment.transaction_id,
-                "created_at": payment.created_at.isoformat(),
-                "updated_at": payment.updated_at.isoformat()
-            }
-            for payment in sale.payments
-        ],
-        "created_at": sale.created_at.isoformat(),
-        "updated_at": sale.updated_at.isoformat()
-    }
+    return sale_detail_serializer.one_response(sale)
 
 
 @router.put("/{sale_id}")
@@ -168,6 +193,7 @@ def update_sale(
     
     db.commit()
     db.refresh(sale)
+    sales_cube.mark_stale(sale.created_at)
     
     return {
         "id": str(sale.id),
@@ -194,28 +220,34 @@ def delete_sale(
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
     
+    created_at = sale.created_at
     db.delete(sale)
     db.commit()
+    sales_cube.mark_stale(created_at)
     return None  # 204 No Content
 
 
 # Analytics endpoints
-@router.get("/analytics/revenue")
+@router.get("/analytics/revenue", dependencies=reporting_pool)
 def get_revenue_analytics(
     db: Session = Depends(get_db),
     start_date: datetime = Query(..., description="Start date (YYYY-MM-DD)"),
-    end_date: datetime = Query(..., description="End date (YYYY-MM-DD)"),
+    end_date: datetime = Query(..., description="End date (YYYY-MM-DD), exclusive"),
     current_user: User = Depends(get_current_user),
 ):
     """
     Get revenue analytics for a date range.
-    """
-    sales = pos_crud.pos_sale.get_sales_by_date_range(
-        db, start_date=start_date, end_date=end_date
-    )
     
-    total_revenue = sum(sale.total_amount for sale in sales)
-    total_sales = len(sales)
+    Counts sales in `[start_date, end_date)`: a sale made exactly at
+    `end_date` belongs to the next range. Hour-aligned ranges inside the sales
+    cube window are answered in memory, others with one aggregate query.
+    """
+    if sales_cube.covers(start_date, end_date):
+        total_revenue, total_sales = sales_cube.revenue(start_date, end_date)
+    else:
+        total_revenue, total_sales = pos_crud.pos_sale.get_revenue(
+            db, start_date=start_date, end_date=end_date
+        )
     
     return {
         "start_date": start_date,
@@ -226,31 +258,109 @@ def get_revenue_analytics(
     }
 
 
-@router.get("/analytics/top-products")
+@router.get("/analytics/top-products", dependencies=reporting_pool)
 def get_top_products_analytics(
     db: Session = Depends(get_db),
     start_date: datetime = Query(..., description="Start date (YYYY-MM-DD)"),
-    end_date: datetime = Query(..., description="End date (YYYY-MM-DD)"),
+    end_date: datetime = Query(..., description="End date (YYYY-MM-DD), exclusive"),
     limit: int = Query(10, description="Number of top products to return"),
     current_user: User = Depends(get_current_user),
 ):
     """
     Get top selling products for a date range.
+    
+    Counts sales in `[start_date, end_date)`, like the revenue and hourly
+    analytics. Hour-aligned ranges inside the sales cube window are answered
+    in memory.
     """
-    top_products = pos_crud.pos_sale.get_top_selling_products(
-        db, start_date=start_date, end_date=end_date, limit=limit
-    )
+    if sales_cube.covers(start_date, end_date):
+        top_products = sales_cube.top_products(start_date, end_date, limit=limit)
+    else:
+        top_products = pos_crud.pos_sale.get_top_selling_products(
+            db, start_date=start_date, end_date=end_date, limit=limit
+        )
     return {"top_products": top_products}
 
 
-@router.get("/daily-summary/{date}")
+@router.get("/analytics/top-products/live")
+def get_live_top_products(
+    db: Session = Depends(get_db),
+    window: str = Query("hour", pattern="^(hour|day)$", description="Trailing window: hour or day"),
+    limit: int = Query(10, ge=1, le=100, description="Number of top products to return"),
+    exact: bool = Query(False, description="Answer with the exact SQL aggregate instead of the sketch"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get best sellers for the trailing hour or day.
+    
+    Answered from this worker's Space-Saving sketch; quantities may be
+    overestimated by at most `max_error`. Falls back to SQL when `exact` is set
+    or the worker has not yet observed a full window.
+    """
+    if exact or not top_products_tracker.complete(window):
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(seconds=top_products_tracker.windows[window].window_seconds)
+        top_products = pos_crud.pos_sale.get_top_selling_products(
+            db, start_date=start_date, end_date=end_date, limit=limit
+        )
+        return {"window": window, "exact": True, "top_products": top_products}
+    
+    return {"window": window, "exact": False, "top_products": top_products_tracker.top(window, limit)}
+
+
+@router.get("/analytics/top-products/sketch")
+def get_top_products_sketch(
+    window: str = Query("hour", pattern="^(hour|day)$", description="Trailing window: hour or day"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get this worker's serialized best-seller sketch so summaries from several
+    workers can be merged with `SpaceSaving.merge`.
+    """
+    return top_products_tracker.windows[window].snapshot().to_dict()
+
+
+@router.get("/analytics/hourly", dependencies=reporting_pool)
+def get_hourly_analytics(
+    db: Session = Depends(get_db),
+    start_date: datetime = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: datetime = Query(..., description="End date (YYYY-MM-DD), exclusive"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get sales count and revenue per hour for a date range.
+    """
+    if sales_cube.covers(start_date, end_date):
+        hourly = sales_cube.hourly_breakdown(start_date, end_date)
+    else:
+        hourly = pos_crud.pos_sale.get_hourly_breakdown(
+            db, start_date=start_date, end_date=end_date
+        )
+    return {"start_date": start_date, "end_date": end_date, "hourly_breakdown": hourly}
+
+
+@router.get("/analytics/cube")
+def get_sales_cube_stats(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get size and coverage of this worker's in-memory sales cube.
+    """
+    return sales_cube.stats()
+
+
+@router.get("/daily-summary/{date}", response_model=DailySalesReport, dependencies=reporting_pool)
 def get_daily_sales_summary(
     date: str,
     db: Session = Depends(get_db),
+    top_n: int = Query(10, ge=1, le=100, description="Number of top products to return"),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Get daily sales summary for a specific date.
+    Get daily sales report for a specific date.
+    
+    Includes transaction totals, payment method split, top selling products
+    and a 24-bucket hourly breakdown.
     """
     # Parse the date string to datetime
     try:
@@ -261,15 +371,7 @@ def get_daily_sales_summary(
             detail="Invalid date format. Use YYYY-MM-DD"
         )
     
-    daily_sales = pos_crud.pos_sale.get_daily_sales(db, date=date_obj)
-    daily_revenue = pos_crud.pos_sale.calculate_daily_revenue(db, date=date_obj)
-    
-    return {
-        "date": date_obj.date(),
-        "total_sales": len(daily_sales),
-        "total_revenue": daily_revenue,
-        "sales": daily_sales
-    }
+    return pos_crud.pos_sale.get_daily_report(db, date=date_obj, top_n=top_n)
 
 
 # Sale Items endpoints
@@ -284,8 +386,6 @@ def add_sale_item(
     """
     Add item to a sale.
     """
-    from app.models.pos import POSSaleItem
-    
     # Check if sale exists
     sale = db.query(POSSale).filter(POSSale.id == sale_id).first()
     if not sale:
@@ -296,21 +396,9 @@ def add_sale_item(
             "sale_id": str(sale_id)
         }
     
-    # Create the sale item
-    db_item = POSSaleItem(
-        sale_id=sale_id,
-        product_id=item_in.product_id,
-        quantity=item_in.quantity,
-        unit_price=item_in.unit_price,
-        subtotal=item_in.subtotal
-    )
-    db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    
-    # Update sale total
-    sale.total_amount = sale.total_amount + db_item.subtotal
-    db.commit()
+    db_item = pos_crud.pos_sale.add_item(db, sale_id=sale_id, item_in=item_in)
+    sales_cube.mark_stale(sale.created_at)
+    top_products_tracker.record_item(db_item.product_id, db_item.quantity, db_item.subtotal)
     
     return {
         "id": str(db_item.id),
@@ -1,19 +1,138 @@
-from fastapi import APIRouter, Depends
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from app.core.conditional import Validators, conditional_get
 from app.core.database import get_db
-from app.api.deps import get_current_user
+from app.schemas.misc import Settings, SettingsCreate, SettingsUpdate
+from app.crud.misc import settings as crud_settings
+from app.utils.settings_store import SETTING_SPECS, parse_value, settings_store
+from app.api.deps import get_current_user, require_role
+
 router = APIRouter()
-@router.get("/")
-def read_settings(db = Depends(get_db), current_user = Depends(get_current_user)):
-    return []
-@router.post("/", status_code=201)
-def create_setting(db = Depends(get_db), current_user = Depends(get_current_user)):
-    return {"message": "Setting created"}
-@router.get("/{setting_id}")
-def read_setting(setting_id: str, db = Depends(get_db), current_user = Depends(get_current_user)):
-    return {"id": setting_id}
-@router.put("/{setting_id}")
-def update_setting(setting_id: str, db = Depends(get_db), current_user = Depends(get_current_user)):
-    return {"id": setting_id}
-@router.delete("/{setting_id}", status_code=204)
-def delete_setting(setting_id: str, db = Depends(get_db), current_user = Depends(get_current_user)):
+
+
+def _validate(key: str, value: str) -> None:
+    try:
+        parse_value(key, value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/", response_model=List[Settings])
+def read_settings(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+    validators: Validators = Depends(conditional_get("settings")),
+):
+    """
+    Retrieve all stored settings as raw key/value rows.
+    """
+    rows = crud_settings.get_multi(db, skip=skip, limit=limit)
+    validators.apply(response)
+    return rows
+
+
+@router.get("/snapshot")
+def read_settings_snapshot(current_user = Depends(get_current_user)):
+    """
+    Typed settings as this worker sees them, defaults included.
+    """
+    return {
+        **settings_store.to_dict(),
+        "specs": {
+            key: {"type": spec.type.__name__, "default": spec.default, "description": spec.description}
+            for key, spec in SETTING_SPECS.items()
+        },
+    }
+
+
+@router.post("/", response_model=Settings, status_code=status.HTTP_201_CREATED)
+def create_setting(
+    *,
+    db: Session = Depends(get_db),
+    setting_in: SettingsCreate,
+    current_user = Depends(require_role("admin"))
+):
+    """
+    Create new setting.
+    Requires admin role.
+    """
+    if crud_settings.get_by_key(db, key=setting_in.key):
+        raise HTTPException(
+            status_code=400,
+            detail="The setting with this key already exists in the system.",
+        )
+    _validate(setting_in.key, setting_in.value)
+    setting = crud_settings.create(db, obj_in=setting_in)
+    settings_store.load(db)
+    return setting
+
+
+@router.get("/{setting_id}", response_model=Settings)
+def read_setting(
+    setting_id: UUID,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+    validators: Validators = Depends(conditional_get("settings")),
+):
+    """
+    Get setting by ID.
+    """
+    setting = crud_settings.get(db, id=setting_id)
+    if not setting:
+        raise HTTPException(status_code=404, detail="Setting not found")
+    validators.apply(response)
+    return setting
+
+
+@router.put("/{setting_id}", response_model=Settings)
+def update_setting(
+    *,
+    db: Session = Depends(get_db),
+    setting_id: UUID,
+    setting_in: SettingsUpdate,
+    current_user = Depends(require_role("admin"))
+):
+    """
+    Update a setting.
+    Requires admin role.
+    """
+    setting = crud_settings.get(db, id=setting_id)
+    if not setting:
+        raise HTTPException(status_code=404, detail="Setting not found")
+    key = setting_in.key or setting.key
+    if key != setting.key and crud_settings.get_by_key(db, key=key):
+        raise HTTPException(
+            status_code=400,
+            detail="The setting with this key already exists in the system.",
+        )
+    _validate(key, setting_in.value if setting_in.value is not None else setting.value)
+    setting = crud_settings.update(db, db_obj=setting, obj_in=setting_in)
+    settings_store.load(db)
+    return setting
+
+
+@router.delete("/{setting_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_setting(
+    *,
+    db: Session = Depends(get_db),
+    setting_id: UUID,
+    current_user = Depends(require_role("admin"))
+):
+    """
+    Delete a setting; its key falls back to the default.
+    Requires admin role.
+    """
+    setting = crud_settings.get(db, id=setting_id)
+    if not setting:
+        raise HTTPException(status_code=404, detail="Setting not found")
+
+    crud_settings.remove(db, id=setting_id)
+    settings_store.load(db)
     return None
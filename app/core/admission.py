@@ -0,0 +1,106 @@
+"""
+Pool-saturation-aware admission control.
+
+When connection pool waiters or the threadpool queue pass their thresholds,
+non-critical routes (reports, analytics, bulk listings) are rejected up front
+with `503 Retry-After` instead of queueing for a connection until they time
+out. A slice of the threadpool is reserved for checkout routes, which are
+never shed.
+"""
+import json
+import re
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.core.metrics import threadpool_stats
+
+CRITICAL = "critical"
+NORMAL = "normal"
+NON_CRITICAL = "non_critical"
+
+API = settings.api_v1_str
+
+# Checkout writes: creating sales, adding items and tenders, cart scans and finalizes.
+_CRITICAL_POST = re.compile(
+    rf"^{re.escape(API)}/(sales/?|sales/[^/]+/(items|payments)/?|carts(/[^/]+/(items|finalize))?/?|checkout.*)$"
+)
+_NON_CRITICAL_PREFIXES = (f"{API}/reports", f"{API}/sales/analytics", f"{API}/sales/daily-summary", "/debug")
+# Probes and scrapes must keep answering under load so the balancer can drain us.
+_EXEMPT_PREFIXES = ("/health", "/metrics")
+
+
+def classify(method: str, path: str) -> str:
+    """Return the admission class for a request."""
+    if method == "POST" and _CRITICAL_POST.match(path):
+        return CRITICAL
+    if path.startswith(_EXEMPT_PREFIXES):
+        return CRITICAL
+    if path.startswith(_NON_CRITICAL_PREFIXES):
+        return NON_CRITICAL
+    # Bulk listings: collection GETs such as /v1/products/ or /v1/customers/
+    if method == "GET" and path.startswith(f"{API}/") and path.endswith("/"):
+        return NON_CRITICAL
+    return NORMAL
+
+
+def pool_waiters(engines: Iterable) -> int:
+    return sum(getattr(engine.pool, "waiters", lambda: 0)() for engine in engines)
+
+
+def saturation(engines: Iterable) -> dict:
+    """Current pressure signals and whether thresholds are exceeded."""
+    waiters = pool_waiters(engines)
+    threads = threadpool_stats()
+    reserve_exhausted = threads["borrowed"] >= threads["total"] - settings.admission_checkout_reserved_threads
+    saturated = (
+        waiters >= settings.admission_max_pool_waiters
+        or threads["waiting"] >= settings.admission_max_threadpool_queue
+    )
+    return {
+        "pool_waiters": waiters,
+        "threadpool": threads,
+        "reserve_exhausted": reserve_exhausted,
+        "saturated": saturated,
+    }
+
+
+def shed_reason(request_class: str, state: dict) -> Optional[str]:
+    """Why a request of `request_class` should be rejected, or None to admit it."""
+    if request_class == CRITICAL:
+        return None
+    if state["reserve_exhausted"]:
+        return "Capacity is reserved for checkout"
+    if request_class == NON_CRITICAL and state["saturated"]:
+        return "Server is saturated"
+    return None
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that sheds non-critical load when the worker is saturated."""
+
+    def __init__(self, app, engines: Iterable, retry_after: int = 5):
+        self.app = app
+        self.engines = list(engines)
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        reason = shed_reason(classify(scope["method"], scope["path"]), saturation(self.engines))
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": reason}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
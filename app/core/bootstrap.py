@@ -0,0 +1,48 @@
+"""
+One-time data bootstrap run from the application lifespan.
+
+Schema is managed by Alembic (`alembic upgrade head`); this module only seeds
+rows the application expects to exist.
+"""
+import logging
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.user import Role
+from app.schemas.user import RoleCreate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROLES = {
+    "admin": ["*"],
+    "user": ["read"],
+    "cashier": ["read", "pos"],
+}
+
+# Arbitrary application-wide key for pg_advisory_xact_lock.
+SEED_LOCK_KEY = 7_305_101
+
+
+def _missing_roles(db: Session) -> list:
+    existing = {name for (name,) in db.query(Role.name).filter(Role.name.in_(DEFAULT_ROLES))}
+    return [name for name in DEFAULT_ROLES if name not in existing]
+
+
+def seed_default_roles(db: Session) -> None:
+    """
+    Create the default roles if they are missing.
+
+    Workers starting together serialize on a transaction-scoped advisory lock
+    (safe behind PgBouncer) and re-check under it, so each role is inserted
+    once. When all roles exist no lock is taken.
+    """
+    if not _missing_roles(db):
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SEED_LOCK_KEY})
+    for name in _missing_roles(db):
+        db.add(Role(**jsonable_encoder(RoleCreate(name=name, permissions=DEFAULT_ROLES[name]))))
+        logger.info(f"Created {name} role")
+    db.commit()
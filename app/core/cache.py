@@ -0,0 +1,397 @@
+"""
+Two-tier read-through cache.
+
+Each namespace has a worker-local LRU with a TTL, optionally backed by a shared
+tier (Redis in production, `MemoryBackend` in tests) that other workers fill
+and read. Loads are coalesced per key (singleflight), so a miss on a hot key
+runs the loader once however many threads ask for it at the same time. Entries
+are refreshed early with a probability that grows as they near expiry
+(XFetch: `now - delta * beta * log(rand) >= expires_at`, where `delta` is how
+long the loader took), so popular keys are reloaded by one caller before they
+expire instead of by every caller after.
+
+Values in the shared tier are typed MessagePack (`serialization.pack_value`):
+only plain data (str, numbers, UUIDs, dates, dicts and lists) is shared, so
+a value read back from Redis can never run code. Namespaces caching ORM rows
+pass a codec that stores their column dict instead of the instance; values
+the codec cannot encode stay in the local tier. A shared tier that errors out
+is treated as a miss; the loader still runs.
+
+Cached values are shared between requests and must be treated as read-only.
+ORM instances come back detached: loaded columns can be read, lazy
+relationships cannot.
+"""
+import functools
+import logging
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.serialization import pack_value, unpack_value
+
+logger = logging.getLogger(__name__)
+
+_SIMPLE_TYPES = (str, int, float, bool, UUID, date, datetime, type(None))
+
+# (to plain data, from plain data) for values that are not plain data themselves.
+Codec = Tuple[Callable[[Any], Any], Callable[[Any], Any]]
+
+# Replace (or, given an empty value, delete) KEYS[1] only if it still holds ARGV[1].
+_COMPARE_AND_SET = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] == '' then
+    redis.call('DEL', KEYS[1])
+else
+    redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+end
+return 1
+"""
+
+
+class CacheBackend:
+    """Shared tier interface; values are bytes, keys are namespaced strings."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def compare_and_set(self, key: str, expected: bytes, value: Optional[bytes], ttl_seconds: float) -> bool:
+        """Store `value` (delete if None) only if `key` still holds `expected`; whether it did."""
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """In-process stand-in for Redis, for tests and single-worker setups."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._data: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[1] <= self.clock():
+                del self._data[key]
+                return None
+            return item[0]
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        with self._lock:
+            self._data[key] = (value, self.clock() + ttl_seconds)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def compare_and_set(self, key: str, expected: bytes, value: Optional[bytes], ttl_seconds: float) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] <= self.clock() or item[0] != expected:
+                return False
+            if value is None:
+                del self._data[key]
+            else:
+                self._data[key] = (value, self.clock() + ttl_seconds)
+            return True
+
+
+class RedisBackend(CacheBackend):
+    """Redis tier; connection errors count as misses so Redis never takes reads down."""
+
+    def __init__(self, url: str, socket_timeout: float = 0.05, prefix: str = "cache:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+        self.prefix = prefix
+        self._errors = (redis.RedisError, OSError)
+        self._compare_and_set = self.client.register_script(_COMPARE_AND_SET)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get(self.prefix + key)
+        except self._errors as e:
+            logger.warning(f"Redis cache get failed: {e}")
+            return None
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        try:
+            self.client.set(self.prefix + key, value, px=max(1, int(ttl_seconds * 1000)))
+        except self._errors as e:
+            logger.warning(f"Redis cache set failed: {e}")
+
+    def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            self.client.delete(*(self.prefix + key for key in keys))
+        except self._errors as e:
+            logger.warning(f"Redis cache delete failed: {e}")
+
+    def compare_and_set(self, key: str, expected: bytes, value: Optional[bytes], ttl_seconds: float) -> bool:
+        try:
+            return bool(self._compare_and_set(
+                keys=[self.prefix + key], args=[expected, value or b"", max(1, int(ttl_seconds * 1000))],
+            ))
+        except self._errors as e:
+            logger.warning(f"Redis compare-and-set failed: {e}")
+            return False
+
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+    delta: float
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.remote_hits = 0
+        self.evictions = 0
+        self.early_refreshes = 0
+        self.coalesced = 0
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class Cache:
+    """One namespace: local LRU + optional shared tier, with singleflight loads."""
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: float,
+        max_entries: int = 1024,
+        remote: Optional[CacheBackend] = None,
+        beta: float = 1.0,
+        clock: Callable[[], float] = time.time,
+        codec: Optional[Codec] = None,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.remote = remote
+        self.beta = beta
+        self.clock = clock
+        self.codec = codec
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def _remote_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _refresh_early(self, entry: _Entry, now: float) -> bool:
+        if self.beta <= 0 or entry.delta <= 0:
+            return False
+        return now - entry.delta * self.beta * math.log(random.random() or 1e-12) >= entry.expires_at
+
+    def _store_local(self, key: Hashable, entry: _Entry) -> None:
+        # Caller holds the lock.
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], cache_none: bool = False) -> Any:
+        """Return the cached value for `key`, running `loader` at most once per key at a time."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                if not self._refresh_early(entry, now) or key in self._inflight:
+                    self.stats.hits += 1
+                    return entry.value
+                self.stats.early_refreshes += 1
+                stale = entry
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                stale = None
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            value, delta = self._load(key, loader, skip_remote=stale is not None)
+            if value is not None or cache_none:
+                with self._lock:
+                    self._store_local(key, _Entry(value, self.clock() + self.ttl_seconds, delta))
+            call.value = value
+            return value
+        except Exception as e:
+            if stale is None:
+                call.error = e
+                raise
+            # An early refresh failed; the entry has not expired yet, keep serving it.
+            logger.warning(f"Early refresh of {self._remote_key(key)} failed: {e}")
+            call.value = stale.value
+            return stale.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    def _load(self, key: Hashable, loader: Callable[[], Any], skip_remote: bool) -> Tuple[Any, float]:
+        remote_key = self._remote_key(key)
+        if self.remote is not None and not skip_remote:
+            raw = self.remote.get(remote_key)
+            if raw is not None:
+                try:
+                    value, delta = unpack_value(raw)
+                    if self.codec is not None:
+                        value = self.codec[1](value)
+                    self.stats.remote_hits += 1
+                    return value, delta
+                except Exception as e:
+                    logger.warning(f"Discarding unreadable cache entry {remote_key}: {e}")
+
+        self.stats.misses += 1
+        started = time.perf_counter()
+        value = loader()
+        delta = time.perf_counter() - started
+        if self.remote is not None and value is not None:
+            self._store_remote(remote_key, value, delta)
+        return value, delta
+
+    def _store_remote(self, remote_key: str, value: Any, delta: float) -> None:
+        try:
+            raw = pack_value((self.codec[0](value) if self.codec is not None else value, delta))
+        except TypeError as e:
+            logger.debug(f"Keeping {remote_key} local: {e}")
+            return
+        self.remote.set(remote_key, raw, self.ttl_seconds)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.remote is not None:
+            self.remote.delete(self._remote_key(key))
+
+    def discard(self, match: Callable[[Hashable], bool]) -> int:
+        """Drop this worker's entries whose key satisfies `match`; returns how many."""
+        with self._lock:
+            keys = [key for key in self._entries if match(key)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop this worker's entries (the shared tier expires on its own)."""
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> dict:
+        return {"size": len(self._entries), "ttl_seconds": self.ttl_seconds, **self.stats.to_dict()}
+
+
+def _default_remote() -> Optional[CacheBackend]:
+    if not settings.cache_redis_enabled:
+        return None
+    return RedisBackend(settings.redis_url, socket_timeout=settings.cache_redis_timeout_seconds)
+
+
+caches: Dict[str, Cache] = {}
+_shared_remote: Optional[CacheBackend] = None
+_registry_lock = threading.Lock()
+
+
+def get_cache(
+    namespace: str,
+    ttl_seconds: Optional[float] = None,
+    max_entries: Optional[int] = None,
+    codec: Optional[Codec] = None,
+) -> Cache:
+    """Return the cache for `namespace`, creating it on first use."""
+    global _shared_remote
+    with _registry_lock:
+        cache = caches.get(namespace)
+        if cache is None:
+            if _shared_remote is None:
+                _shared_remote = _default_remote()
+            cache = caches[namespace] = Cache(
+                namespace,
+                ttl_seconds=ttl_seconds if ttl_seconds is not None else settings.cache_default_ttl_seconds,
+                max_entries=max_entries or settings.cache_max_entries,
+                remote=_shared_remote,
+                beta=settings.cache_early_refresh_beta,
+                codec=codec,
+            )
+        return cache
+
+
+def _default_key(args: tuple, kwargs: dict) -> Hashable:
+    # Sessions, CRUD objects and other non-scalar arguments are not part of the key.
+    positional = tuple(arg for arg in args if isinstance(arg, _SIMPLE_TYPES))
+    named = tuple(sorted((name, value) for name, value in kwargs.items() if isinstance(value, _SIMPLE_TYPES)))
+    return positional + named
+
+
+def cached(
+    namespace: str,
+    ttl_seconds: Optional[float] = None,
+    key: Optional[Callable[..., Hashable]] = None,
+    max_entries: Optional[int] = None,
+    cache_none: bool = False,
+):
+    """
+    Cache a function's results in `namespace`.
+
+    The key defaults to the scalar arguments (str, numbers, UUIDs, dates), so
+    `db` sessions and `self` are ignored; pass `key` when that is not enough.
+    The wrapped function's `cache` attribute is the underlying `Cache`.
+    """
+    cache = get_cache(namespace, ttl_seconds, max_entries)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key is not None else _default_key(args, kwargs)
+            return cache.get_or_load(cache_key, lambda: fn(*args, **kwargs), cache_none=cache_none)
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
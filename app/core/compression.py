@@ -0,0 +1,252 @@
+"""
+Response compression.
+
+Encodings are negotiated from `Accept-Encoding`, preferring zstd, then brotli,
+then gzip at equal quality. Bodies sent in one piece are compressed only when
+they reach `minimum_size`; streamed bodies (NDJSON, CSV exports) are
+compressed chunk by chunk and flushed after every chunk, so clients can parse
+lines as they arrive. Server-Sent Events are left alone to keep their latency.
+
+Compressed bodies of large GET responses are cached by encoding and content
+digest, so a catalog snapshot fetched by every terminal is compressed once per
+encoding. Keying on the digest means the cache never serves bytes the route
+did not just produce, whoever the caller is.
+"""
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import brotli
+import zstandard
+
+GZIP = "gzip"
+BROTLI = "br"
+ZSTD = "zstd"
+_PREFERENCE = (ZSTD, BROTLI, GZIP)
+
+_COMPRESSIBLE = (
+    "text/",
+    "application/json",
+    "application/msgpack",
+    "application/x-ndjson",
+    "application/xml",
+    "application/javascript",
+)
+_NEVER = ("text/event-stream",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Return the encoding to use for an `Accept-Encoding` header, or None for identity."""
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        coding = coding.lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in _PREFERENCE:
+        quality = qualities.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class Compressor:
+    """One-shot and streaming compression at configured levels."""
+
+    def __init__(self, gzip_level: int = 6, brotli_quality: int = 4, zstd_level: int = 3):
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd = zstandard.ZstdCompressor(level=zstd_level)
+
+    def compress(self, encoding: str, data: bytes) -> bytes:
+        if encoding == ZSTD:
+            return self.zstd.compress(data)
+        if encoding == BROTLI:
+            return brotli.compress(data, quality=self.brotli_quality)
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self, encoding: str) -> "_Stream":
+        return _Stream(self, encoding)
+
+
+class _Stream:
+    """Incremental compressor; `chunk` flushes so every chunk is decodable on arrival."""
+
+    def __init__(self, compressor: Compressor, encoding: str):
+        self.encoding = encoding
+        if encoding == ZSTD:
+            self._obj = compressor.zstd.compressobj()
+        elif encoding == BROTLI:
+            self._obj = brotli.Compressor(quality=compressor.brotli_quality)
+        else:
+            self._obj = zlib.compressobj(compressor.gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == ZSTD:
+            return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == BROTLI:
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == ZSTD:
+            return self._obj.compress(data) + self._obj.flush()
+        if self.encoding == BROTLI:
+            return self._obj.process(data) + self._obj.finish()
+        return self._obj.compress(data) + self._obj.flush()
+
+
+class CompressedCache:
+    """LRU of compressed bodies keyed by `(encoding, digest)`, bounded in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+
+    @staticmethod
+    def key(encoding: str, body: bytes) -> Tuple[str, bytes]:
+        return encoding, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Tuple[str, bytes], value: bytes) -> None:
+        if len(value) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+def _compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    content_type = ""
+    for key, value in headers:
+        if key == b"content-encoding":
+            return False
+        if key == b"content-type":
+            content_type = value.decode("latin-1").lower()
+    return content_type.startswith(_COMPRESSIBLE) and not content_type.startswith(_NEVER)
+
+
+def _encoded_headers(headers, encoding: str, length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+    headers = [(key, value) for key, value in headers if key != b"content-length"]
+    headers += [(b"content-encoding", encoding.encode()), (b"vary", b"Accept-Encoding")]
+    if length is not None:
+        headers.append((b"content-length", str(length).encode()))
+    return headers
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with the client's best encoding.
+
+    Runs on the event loop only, so the cache needs no lock.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        compressor: Optional[Compressor] = None,
+        cache: Optional[CompressedCache] = None,
+        cache_min_size: int = 16 * 1024,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressor = compressor or Compressor()
+        self.cache = cache
+        self.cache_min_size = cache_min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        cacheable_method = scope["method"] == "GET"
+        start = None
+        stream = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, stream, passthrough
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if message["status"] < 200 or message["status"] in (204, 304) or not _compressible(headers):
+                    passthrough = True
+                    await send(message)
+                else:
+                    message["headers"] = headers
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if stream is not None:
+                chunk = stream.chunk(body) if more_body else stream.finish(body)
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            if more_body:
+                stream = self.compressor.stream(encoding)
+                start["headers"] = _encoded_headers(start["headers"], encoding, None)
+                await send(start)
+                await send({"type": "http.response.body", "body": stream.chunk(body), "more_body": True})
+                return
+
+            if len(body) < self.minimum_size:
+                await send(start)
+                await send(message)
+                return
+
+            compressed = None
+            key = None
+            if self.cache is not None and cacheable_method and start["status"] == 200 and len(body) >= self.cache_min_size:
+                key = CompressedCache.key(encoding, body)
+                compressed = self.cache.get(key)
+            if compressed is None:
+                compressed = self.compressor.compress(encoding, body)
+                if key is not None:
+                    self.cache.put(key, compressed)
+            start["headers"] = _encoded_headers(start["headers"], encoding, len(compressed))
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
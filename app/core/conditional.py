@@ -0,0 +1,153 @@
+"""
+Conditional GET for catalog-style reads.
+
+Every write to a versioned table bumps its row in `table_versions` through a
+statement-level trigger, in the writer's transaction, so a version is visible
+exactly when the data it stamps is. Reads answer with a weak ETag built from
+that version (plus the query string and negotiated format) and a
+Last-Modified taken from its change time; a matching `If-None-Match`, or
+`If-Modified-Since` when no ETag is sent, gets a bodiless 304.
+
+Workers keep the stamps for `ttl_seconds`, so most revalidations are answered
+without touching the database. Writes made through `CRUDBase` drop this
+worker's stamp immediately; other workers drop it when the invalidation bus
+delivers the change, and within the TTL at the latest. A cached
+stamp only ever produces a 304: a full response is stamped with a version read
+through its own session before the data, so a lagging replica can never pair
+old rows with a newer ETag.
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, NamedTuple, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.serialization import response_format
+
+VERSIONED_TABLES = ("products", "customers", "roles", "settings")
+
+_STAMP_SQL = text("SELECT version, changed_at FROM table_versions WHERE table_name = :table")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class TableVersion(NamedTuple):
+    version: int
+    changed_at: datetime
+
+
+class TableVersions:
+    """Worker-local cache of `table_versions` stamps."""
+
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._stamps: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session, table: str) -> TableVersion:
+        row = db.execute(_STAMP_SQL, {"table": table}).first()
+        if row is None:
+            return TableVersion(0, _EPOCH)
+        changed_at = row.changed_at if row.changed_at.tzinfo else row.changed_at.replace(tzinfo=timezone.utc)
+        return TableVersion(row.version, changed_at)
+
+    def cached(self, table: str) -> Optional[TableVersion]:
+        entry = self._stamps.get(table)
+        if entry is not None and entry[1] > self.clock():
+            return entry[0]
+        return None
+
+    def load(self, db: Session, table: str) -> TableVersion:
+        stamp = self._load(db, table)
+        with self._lock:
+            self._stamps[table] = (stamp, self.clock() + self.ttl_seconds)
+        return stamp
+
+    def invalidate(self, table: str) -> None:
+        with self._lock:
+            self._stamps.pop(table, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stamps.clear()
+
+
+table_versions = TableVersions(settings.conditional_get_version_ttl_seconds)
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    return tag.strip('"')
+
+
+class Validators:
+    """ETag and Last-Modified of one representation."""
+
+    def __init__(self, etag: str, last_modified: datetime, version: int = 0):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.version = version
+
+    @classmethod
+    def for_request(cls, table: str, stamp: TableVersion, request: Request) -> "Validators":
+        media_type, columnar = response_format.get()
+        variant = f"{request.url.path}?{request.url.query}|{media_type}|{columnar}".encode()
+        digest = hashlib.blake2b(variant, digest_size=6).hexdigest()
+        return cls(f'W/"{table}-{stamp.version}-{digest}"', stamp.changed_at, stamp.version)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"ETag": self.etag, "Last-Modified": format_datetime(self.last_modified, usegmt=True)}
+
+    def matches(self, request: Request) -> bool:
+        """Whether the client's copy is current (If-None-Match wins over If-Modified-Since)."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return True
+            current = _opaque(self.etag)
+            return any(_opaque(tag) == current for tag in if_none_match.split(","))
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified.replace(microsecond=0) <= since
+        return False
+
+    def apply(self, response: Response) -> Response:
+        response.headers.update(self.headers)
+        return response
+
+
+def conditional_get(table: str):
+    """
+    Dependency answering 304 when the client's copy of `table` data is current.
+
+    Routes call `apply` on their response to attach the validators.
+    """
+
+    def dependency(request: Request, db: Session = Depends(get_db)) -> Validators:
+        stamp = table_versions.cached(table)
+        if stamp is not None:
+            validators = Validators.for_request(table, stamp, request)
+            if validators.matches(request):
+                raise HTTPException(status_code=304, headers=validators.headers)
+        validators = Validators.for_request(table, table_versions.load(db, table), request)
+        if validators.matches(request):
+            raise HTTPException(status_code=304, headers=validators.headers)
+        return validators
+
+    return dependency
@@ -15,6 +15,35 @@ class Settings(BaseSettings):
     # Database
     database_url: str = Field(..., env="DATABASE_URL")
     database_url_test: Optional[str] = Field(default=None, env="DATABASE_URL_TEST")
+    # Optional read replica for the reporting workload
+    database_reporting_url: Optional[str] = Field(default=None, env="DATABASE_REPORTING_URL")
+    # Streaming replicas for GETs of products, customers, sales and reports
+    database_replica_urls: List[str] = Field(default=[], env="DATABASE_REPLICA_URLS")
+    database_replica_max_lag_seconds: float = Field(default=5.0, env="DATABASE_REPLICA_MAX_LAG_SECONDS")
+    database_replica_health_interval_seconds: float = Field(default=5.0, env="DATABASE_REPLICA_HEALTH_INTERVAL_SECONDS")
+    database_replica_sticky_seconds: float = Field(default=5.0, env="DATABASE_REPLICA_STICKY_SECONDS")
+    
+    # PgBouncer transaction pooling: per-transaction timeouts, no prepared
+    # statement caching; client pool size 0 means NullPool
+    database_pgbouncer: bool = Field(default=False, env="DATABASE_PGBOUNCER")
+    database_pgbouncer_pool_size: int = Field(default=0, env="DATABASE_PGBOUNCER_POOL_SIZE")
+    
+    # Workload pools (checkout, back-office, reporting); timeouts in milliseconds
+    db_checkout_pool_size: int = Field(default=10, env="DB_CHECKOUT_POOL_SIZE")
+    db_checkout_max_overflow: int = Field(default=10, env="DB_CHECKOUT_MAX_OVERFLOW")
+    db_checkout_statement_timeout_ms: int = Field(default=5_000, env="DB_CHECKOUT_STATEMENT_TIMEOUT_MS")
+    db_checkout_lock_timeout_ms: int = Field(default=2_000, env="DB_CHECKOUT_LOCK_TIMEOUT_MS")
+    db_backoffice_pool_size: int = Field(default=5, env="DB_BACKOFFICE_POOL_SIZE")
+    db_backoffice_max_overflow: int = Field(default=5, env="DB_BACKOFFICE_MAX_OVERFLOW")
+    db_backoffice_statement_timeout_ms: int = Field(default=15_000, env="DB_BACKOFFICE_STATEMENT_TIMEOUT_MS")
+    db_backoffice_lock_timeout_ms: int = Field(default=5_000, env="DB_BACKOFFICE_LOCK_TIMEOUT_MS")
+    db_reporting_pool_size: int = Field(default=3, env="DB_REPORTING_POOL_SIZE")
+    db_reporting_max_overflow: int = Field(default=2, env="DB_REPORTING_MAX_OVERFLOW")
+    db_reporting_statement_timeout_ms: int = Field(default=60_000, env="DB_REPORTING_STATEMENT_TIMEOUT_MS")
+    db_reporting_lock_timeout_ms: int = Field(default=1_000, env="DB_REPORTING_LOCK_TIMEOUT_MS")
+    db_replica_pool_size: int = Field(default=5, env="DB_REPLICA_POOL_SIZE")
+    db_replica_max_overflow: int = Field(default=5, env="DB_REPLICA_MAX_OVERFLOW")
+    db_replica_statement_timeout_ms: int = Field(default=30_000, env="DB_REPLICA_STATEMENT_TIMEOUT_MS")
     
     # Security
     secret_key: str = Field(..., env="SECRET_KEY")
@@ -39,6 +68,90 @@ class Settings(BaseSettings):
     smtp_user: Optional[str] = Field(default=None, env="SMTP_USER")
     smtp_password: Optional[str] = Field(default=None, env="SMTP_PASSWORD")
     
+    # Sales cube (worker-local analytics)
+    sales_cube_enabled: bool = Field(default=True, env="SALES_CUBE_ENABLED")
+    sales_cube_window_hours: int = Field(default=24 * 7, env="SALES_CUBE_WINDOW_HOURS")
+    sales_cube_max_rows: int = Field(default=1_000_000, env="SALES_CUBE_MAX_ROWS")
+    sales_cube_refresh_seconds: float = Field(default=60.0, env="SALES_CUBE_REFRESH_SECONDS")
+    
+    # Live best sellers (Space-Saving sketch)
+    top_products_sketch_capacity: int = Field(default=256, env="TOP_PRODUCTS_SKETCH_CAPACITY")
+    
+    # Live sales feed (Server-Sent Events)
+    sales_stream_queue_size: int = Field(default=100, env="SALES_STREAM_QUEUE_SIZE")
+    sales_stream_max_subscribers: int = Field(default=200, env="SALES_STREAM_MAX_SUBSCRIBERS")
+    sales_stream_heartbeat_seconds: float = Field(default=15.0, env="SALES_STREAM_HEARTBEAT_SECONDS")
+    
+    # SQL instrumentation
+    sql_instrumentation_enabled: bool = Field(default=True, env="SQL_INSTRUMENTATION_ENABLED")
+    sql_instrumentation_window: int = Field(default=200, env="SQL_INSTRUMENTATION_WINDOW")
+    sql_n_plus_one_threshold: int = Field(default=5, env="SQL_N_PLUS_ONE_THRESHOLD")
+    
+    # Metrics
+    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")
+    
+    # Admission control / load shedding
+    admission_control_enabled: bool = Field(default=True, env="ADMISSION_CONTROL_ENABLED")
+    admission_max_pool_waiters: int = Field(default=5, env="ADMISSION_MAX_POOL_WAITERS")
+    admission_max_threadpool_queue: int = Field(default=10, env="ADMISSION_MAX_THREADPOOL_QUEUE")
+    admission_checkout_reserved_threads: int = Field(default=8, env="ADMISSION_CHECKOUT_RESERVED_THREADS")
+    admission_retry_after_seconds: int = Field(default=5, env="ADMISSION_RETRY_AFTER_SECONDS")
+    
+    # Startup warm-up (pools, compiled statements, catalog cache) before readiness
+    warmup_enabled: bool = Field(default=True, env="WARMUP_ENABLED")
+    warmup_pool_connections: int = Field(default=4, env="WARMUP_POOL_CONNECTIONS")
+    warmup_catalog_products: int = Field(default=200, env="WARMUP_CATALOG_PRODUCTS")
+    
+    # Response compression (gzip/brotli/zstd) and cache of compressed bodies
+    compression_enabled: bool = Field(default=True, env="COMPRESSION_ENABLED")
+    compression_minimum_size: int = Field(default=1024, env="COMPRESSION_MINIMUM_SIZE")
+    compression_gzip_level: int = Field(default=6, env="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(default=4, env="COMPRESSION_BROTLI_QUALITY")
+    compression_zstd_level: int = Field(default=3, env="COMPRESSION_ZSTD_LEVEL")
+    compression_cache_max_bytes: int = Field(default=32 * 1024 * 1024, env="COMPRESSION_CACHE_MAX_BYTES")
+    compression_cache_min_size: int = Field(default=16 * 1024, env="COMPRESSION_CACHE_MIN_SIZE")
+    
+    # Conditional GET (ETag/Last-Modified from per-table version stamps)
+    conditional_get_version_ttl_seconds: float = Field(default=1.0, env="CONDITIONAL_GET_VERSION_TTL_SECONDS")
+    
+    # Read-through cache (worker-local LRU, optional shared Redis tier)
+    cache_default_ttl_seconds: float = Field(default=60.0, env="CACHE_DEFAULT_TTL_SECONDS")
+    cache_max_entries: int = Field(default=10_000, env="CACHE_MAX_ENTRIES")
+    cache_early_refresh_beta: float = Field(default=1.0, env="CACHE_EARLY_REFRESH_BETA")
+    cache_redis_enabled: bool = Field(default=False, env="CACHE_REDIS_ENABLED")
+    cache_redis_timeout_seconds: float = Field(default=0.05, env="CACHE_REDIS_TIMEOUT_SECONDS")
+    cache_crud_ttl_seconds: float = Field(default=300.0, env="CACHE_CRUD_TTL_SECONDS")
+    cache_reports_ttl_seconds: float = Field(default=30.0, env="CACHE_REPORTS_TTL_SECONDS")
+    
+    # Cross-worker cache invalidation (Postgres LISTEN/NOTIFY)
+    invalidation_bus_enabled: bool = Field(default=True, env="INVALIDATION_BUS_ENABLED")
+    invalidation_channel: str = Field(default="cache_invalidation", env="INVALIDATION_CHANNEL")
+    invalidation_listen_url: Optional[str] = Field(default=None, env="INVALIDATION_LISTEN_URL")
+    invalidation_tables: List[str] = Field(
+        default=["products", "customers", "roles", "users", "employees", "settings", "revoked_tokens"],
+        env="INVALIDATION_TABLES",
+    )
+    
+    # Token revocation (in-process Bloom filter + exact set, synced from revoked_tokens)
+    revocation_bloom_capacity: int = Field(default=1_000_000, env="REVOCATION_BLOOM_CAPACITY")
+    revocation_bloom_error_rate: float = Field(default=0.001, env="REVOCATION_BLOOM_ERROR_RATE")
+    revocation_sync_interval_seconds: float = Field(default=30.0, env="REVOCATION_SYNC_INTERVAL_SECONDS")
+    
+    # Draft carts (open baskets kept out of the database until finalize)
+    carts_ttl_seconds: float = Field(default=4 * 3600.0, env="CARTS_TTL_SECONDS")
+    carts_max: int = Field(default=10_000, env="CARTS_MAX")
+    carts_redis_enabled: bool = Field(default=False, env="CARTS_REDIS_ENABLED")
+    
+    # Composite checkout (POST /checkout); slower checkouts are logged
+    checkout_latency_budget_ms: float = Field(default=150.0, env="CHECKOUT_LATENCY_BUDGET_MS")
+    
+    # Idempotency-Key replay for checkout writes (idempotency_keys table + worker-local LRU)
+    idempotency_enabled: bool = Field(default=True, env="IDEMPOTENCY_ENABLED")
+    idempotency_ttl_seconds: float = Field(default=24 * 3600.0, env="IDEMPOTENCY_TTL_SECONDS")
+    idempotency_lock_seconds: float = Field(default=60.0, env="IDEMPOTENCY_LOCK_SECONDS")
+    idempotency_wait_seconds: float = Field(default=10.0, env="IDEMPOTENCY_WAIT_SECONDS")
+    idempotency_cache_max: int = Field(default=10_000, env="IDEMPOTENCY_CACHE_MAX")
+    
     # Logging
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
     
@@ -1,25 +1,145 @@
-from sqlalchemy import create_engine
+from contextvars import ContextVar
+from typing import Dict
+from uuid import uuid4
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 
 from app.core.config import settings
+from app.core.metrics import TimedQueuePool, TimedAsyncAdaptedQueuePool
+from app.core.replicas import ReplicaSet, prefer_replica
+
+# Workloads with their own pool, so a long report scan cannot starve checkout.
+CHECKOUT = "checkout"
+BACKOFFICE = "backoffice"
+REPORTING = "reporting"
+
+
+def _pool_options(pool_size: int, max_overflow: int, pool_class, pgbouncer: bool) -> dict:
+    """Pool arguments; behind PgBouncer the client pool is small or disabled."""
+    if pgbouncer:
+        if settings.database_pgbouncer_pool_size <= 0:
+            return {"poolclass": NullPool}
+        pool_size, max_overflow = settings.database_pgbouncer_pool_size, 0
+    return {
+        "poolclass": pool_class,
+        "pool_pre_ping": True,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+    }
+
+
+def create_workload_engine(
+    url: str,
+    pool_size: int,
+    max_overflow: int,
+    statement_timeout_ms: int,
+    lock_timeout_ms: int,
+    pgbouncer: bool = settings.database_pgbouncer,
+) -> Engine:
+    """Create a pooled engine whose connections carry their own server-side timeouts."""
+    connect_args = {}
+    if url.startswith("postgresql") and not pgbouncer:
+        connect_args["options"] = (
+            f"-c statement_timeout={statement_timeout_ms} -c lock_timeout={lock_timeout_ms}"
+        )
+    workload_engine = create_engine(
+        url,
+        echo=settings.debug,
+        connect_args=connect_args,
+        **_pool_options(pool_size, max_overflow, TimedQueuePool, pgbouncer),
+    )
+    if pgbouncer:
+        # Transaction pooling hands each transaction a different server
+        # connection, so startup options and session-level SETs cannot be
+        # relied on (and would leak to other clients). Scope the timeouts to
+        # every transaction instead.
+        @event.listens_for(workload_engine, "begin")
+        def set_local_timeouts(connection):
+            connection.exec_driver_sql(
+                "SELECT set_config('statement_timeout', %(statement)s, true), "
+                "set_config('lock_timeout', %(lock)s, true)",
+                {"statement": str(statement_timeout_ms), "lock": str(lock_timeout_ms)},
+            )
+    return workload_engine
+
+
+def create_async_workload_engine(url: str, pgbouncer: bool = settings.database_pgbouncer):
+    """Create the asyncpg engine; behind PgBouncer prepared statements are not cached."""
+    connect_args = {}
+    if pgbouncer:
+        connect_args = {
+            # asyncpg's own statement cache and SQLAlchemy's adapter cache
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            # Unnamed statements may still be prepared; unique names keep two
+            # clients sharing a server connection from colliding.
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return create_async_engine(
+        url.replace("postgresql://", "postgresql+asyncpg://"),
+        echo=settings.debug,
+        connect_args=connect_args,
+        **_pool_options(5, 10, TimedAsyncAdaptedQueuePool, pgbouncer),
+    )
+
 
-# Create synchronous engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    echo=settings.debug
+engines: Dict[str, Engine] = {
+    CHECKOUT: create_workload_engine(
+        settings.database_url,
+        pool_size=settings.db_checkout_pool_size,
+        max_overflow=settings.db_checkout_max_overflow,
+        statement_timeout_ms=settings.db_checkout_statement_timeout_ms,
+        lock_timeout_ms=settings.db_checkout_lock_timeout_ms,
+    ),
+    BACKOFFICE: create_workload_engine(
+        settings.database_url,
+        pool_size=settings.db_backoffice_pool_size,
+        max_overflow=settings.db_backoffice_max_overflow,
+        statement_timeout_ms=settings.db_backoffice_statement_timeout_ms,
+        lock_timeout_ms=settings.db_backoffice_lock_timeout_ms,
+    ),
+    # Reporting only reads, so it may point at a replica.
+    REPORTING: create_workload_engine(
+        settings.database_reporting_url or settings.database_url,
+        pool_size=settings.db_reporting_pool_size,
+        max_overflow=settings.db_reporting_max_overflow,
+        statement_timeout_ms=settings.db_reporting_statement_timeout_ms,
+        lock_timeout_ms=settings.db_reporting_lock_timeout_ms,
+    ),
+}
+
+# Streaming replicas serving GETs of read-heavy routers (see app.core.replicas)
+replica_set = ReplicaSet(
+    [
+        create_workload_engine(
+            url,
+            pool_size=settings.db_replica_pool_size,
+            max_overflow=settings.db_replica_max_overflow,
+            statement_timeout_ms=settings.db_replica_statement_timeout_ms,
+            lock_timeout_ms=settings.db_backoffice_lock_timeout_ms,
+        )
+        for url in settings.database_replica_urls
+    ],
+    max_lag_seconds=settings.database_replica_max_lag_seconds,
 )
 
+# Default synchronous engine (back-office); always the primary
+engine = engines[BACKOFFICE]
+
 # Create asynchronous engine for async operations
-async_engine = create_async_engine(
-    settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=settings.debug
-)
+async_engine = create_async_workload_engine(settings.database_url)
 
 # Create session factories
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+session_factories = {
+    name: sessionmaker(autocommit=False, autoflush=False, bind=workload_engine)
+    for name, workload_engine in engines.items()
+}
+SessionLocal = session_factories[BACKOFFICE]
 AsyncSessionLocal = sessionmaker(
     async_engine, class_=AsyncSession, expire_on_commit=False
 )
@@ -27,10 +147,30 @@ AsyncSessionLocal = sessionmaker(
 # Create declarative base
 Base = declarative_base()
 
+# Workload of the request being served; set per router by `use_workload`.
+_workload: ContextVar[str] = ContextVar("db_workload", default=BACKOFFICE)
+
+
+def use_workload(name: str):
+    """
+    Router dependency selecting the pool `get_db` hands out for a request.
+
+    It is async so the context variable is set in the request task itself and
+    is inherited by the sync dependencies that run after it in the threadpool.
+    """
+    if name not in engines:
+        raise ValueError(f"Unknown database workload: {name}")
+
+    async def select_workload():
+        _workload.set(name)
+
+    return select_workload
+
 
 def get_db():
     """Dependency to get database session."""
-    db = SessionLocal()
+    factory = replica_set.session_factory() if prefer_replica.get() else None
+    db = (factory or session_factories[_workload.get()])()
     try:
         yield db
     finally:
@@ -0,0 +1,413 @@
+"""
+`Idempotency-Key` support for write requests.
+
+A lane that loses the response to `POST /sales/` cannot tell whether the sale
+was recorded, so it retries. With an `Idempotency-Key` header the retry is
+answered with the first response instead of running again:
+
+* the first request claims the key by inserting a row in `idempotency_keys`
+  (unique per user and key), runs, and stores its status, headers and body
+  there; responses are also kept in a worker-local LRU so most replays never
+  reach the database;
+* a duplicate that arrives while the first is still running waits for it: on
+  the same worker for its result, on another worker by polling the row. After
+  `IDEMPOTENCY_WAIT_SECONDS` it gets `409` with `Retry-After`;
+* a key reused with a different method, path or body gets `422`.
+
+Only 2xx and deterministic 4xx responses are stored. 5xx and the transient
+408/409/425/429 (timeouts, conflicts, rate limits) release the claim, so a
+retry with the same key runs again.
+A claim whose request died without releasing it can be taken over after
+`IDEMPOTENCY_LOCK_SECONDS`. Keys expire after `IDEMPOTENCY_TTL_SECONDS`.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.security import decode_token
+from app.models.misc import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# Client errors that say "try again" rather than "this request is wrong".
+TRANSIENT_STATUSES = frozenset({408, 409, 425, 429})
+
+
+def storable(status_code: int) -> bool:
+    """Whether a response is final for its request and can be replayed."""
+    return 200 <= status_code < 500 and status_code not in TRANSIENT_STATUSES
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+
+_WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+_TABLE = IdempotencyKey.__table__
+# Expired rows are deleted by whichever claim comes first after this interval.
+_PURGE_INTERVAL_SECONDS = 60.0
+
+
+class IdempotencyKeyInProgress(Exception):
+    """Another request holding the same key has not finished yet."""
+
+
+class IdempotencyKeyMismatch(Exception):
+    """The key was first used for a different request."""
+
+
+class StoredResponse(NamedTuple):
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    fingerprint: str
+
+
+def fingerprint(method: str, path: str, query_string: bytes, body: bytes) -> str:
+    digest = hashlib.sha256(f"{method}\0{path}\0".encode())
+    digest.update(query_string + b"\0" + body)
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """Claimed keys and their stored responses, in `idempotency_keys` behind an LRU."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl_seconds: float,
+        lock_seconds: float,
+        max_cached: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.session_factory = session_factory
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.lock = timedelta(seconds=lock_seconds)
+        self.max_cached = max_cached
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._cached: "OrderedDict[str, Tuple[StoredResponse, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._purge_at = 0.0
+
+    def _now(self) -> datetime:
+        return datetime.utcfromtimestamp(self.clock())
+
+    def _remember(self, key: str, response: StoredResponse, expires_at: datetime) -> None:
+        expires = (expires_at - datetime(1970, 1, 1)).total_seconds()
+        with self._lock:
+            self._cached[key] = (response, expires)
+            self._cached.move_to_end(key)
+            while len(self._cached) > self.max_cached:
+                self._cached.popitem(last=False)
+
+    def cached(self, key: str, request_fingerprint: str) -> Optional[StoredResponse]:
+        """The stored response from this worker's LRU, without a database round trip."""
+        with self._lock:
+            entry = self._cached.get(key)
+            if entry is not None and entry[1] <= self.clock():
+                del self._cached[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._cached.move_to_end(key)
+            self.hits += 1
+        if entry[0].fingerprint != request_fingerprint:
+            raise IdempotencyKeyMismatch()
+        return entry[0]
+
+    def claim(self, key: str, request_fingerprint: str) -> Optional[StoredResponse]:
+        """
+        Claim `key` for a request about to run; returns None once claimed.
+
+        Returns the stored response if the key has completed, and raises
+        `IdempotencyKeyInProgress` or `IdempotencyKeyMismatch` otherwise.
+        """
+        now = self._now()
+        db = self.session_factory()
+        try:
+            self._purge(db, now)
+            if self._insert(db, key, request_fingerprint, now):
+                return None
+            return self._existing(db, key, request_fingerprint, now)
+        finally:
+            db.close()
+
+    def poll(self, key: str, request_fingerprint: str) -> Optional[StoredResponse]:
+        """`claim` for a key already known to be taken: reads the row first."""
+        db = self.session_factory()
+        try:
+            return self._existing(db, key, request_fingerprint, self._now())
+        finally:
+            db.close()
+
+    def _insert(self, db: Session, key: str, request_fingerprint: str, now: datetime) -> bool:
+        try:
+            db.execute(insert(_TABLE).values(
+                id=uuid4(), key=key, fingerprint=request_fingerprint, created_at=now, updated_at=now,
+                locked_until=now + self.lock, expires_at=now + self.ttl,
+            ))
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+
+    def _existing(self, db: Session, key: str, request_fingerprint: str, now: datetime) -> Optional[StoredResponse]:
+        row = db.execute(select(_TABLE).where(_TABLE.c.key == key)).first()
+        if row is None:
+            # Released by a request that failed.
+            if self._insert(db, key, request_fingerprint, now):
+                return None
+            raise IdempotencyKeyInProgress()
+        if row.expires_at <= now or (row.status_code is None and row.locked_until <= now):
+            # Expired, or its request died without releasing it: take it over.
+            taken = db.execute(
+                update(_TABLE)
+                .where(_TABLE.c.key == key, _TABLE.c.updated_at == row.updated_at)
+                .values(
+                    fingerprint=request_fingerprint, status_code=None, headers=None, body=None,
+                    updated_at=now, locked_until=now + self.lock, expires_at=now + self.ttl,
+                )
+            ).rowcount
+            db.commit()
+            if taken:
+                return None
+            raise IdempotencyKeyInProgress()
+        if row.fingerprint != request_fingerprint:
+            raise IdempotencyKeyMismatch()
+        if row.status_code is None:
+            raise IdempotencyKeyInProgress()
+        response = StoredResponse(
+            row.status_code,
+            [(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.headers],
+            row.body,
+            row.fingerprint,
+        )
+        self._remember(key, response, row.expires_at)
+        return response
+
+    def complete(self, key: str, response: StoredResponse) -> None:
+        """Store the response of a claimed key for replay."""
+        now = self._now()
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(_TABLE)
+                .where(_TABLE.c.key == key)
+                .values(
+                    status_code=response.status_code,
+                    headers=[[name.decode("latin-1"), value.decode("latin-1")] for name, value in response.headers],
+                    body=response.body,
+                    updated_at=now,
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+        self._remember(key, response, now + self.ttl)
+
+    def release(self, key: str) -> None:
+        """Give up a claim so a retry runs the request again."""
+        db = self.session_factory()
+        try:
+            db.execute(delete(_TABLE).where(_TABLE.c.key == key, _TABLE.c.status_code.is_(None)))
+            db.commit()
+        finally:
+            db.close()
+
+    def _purge(self, db: Session, now: datetime) -> None:
+        if self.clock() < self._purge_at:
+            return
+        self._purge_at = self.clock() + _PURGE_INTERVAL_SECONDS
+        db.execute(delete(_TABLE).where(_TABLE.c.expires_at <= now))
+        db.commit()
+
+    def stats(self) -> dict:
+        return {"cached": len(self._cached), "hits": self.hits, "misses": self.misses}
+
+
+def _header(headers, name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _subject(headers) -> Optional[str]:
+    authorization = _header(headers, b"authorization") or ""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_token(token)
+    return payload["sub"] if payload else None
+
+
+async def _send_json(send, status_code: int, detail: str, headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *(headers or []),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send, response: StoredResponse) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": response.status_code,
+        "headers": [*response.headers, (b"idempotent-replayed", b"true")],
+    })
+    await send({"type": "http.response.body", "body": response.body})
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware answering retried write requests with their first response.
+
+    Applies to authenticated POST/PUT/PATCH/DELETE requests under `prefixes`
+    that carry an `Idempotency-Key` header; keys are scoped to the user.
+    """
+
+    def __init__(self, app, store: IdempotencyStore, prefixes, wait_seconds: float, poll_seconds: float = 0.05):
+        self.app = app
+        self.store = store
+        self.prefixes = tuple(prefixes)
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+        # Requests running on this worker, by key; duplicates await their result.
+        self._running: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in _WRITE_METHODS or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+        key = _header(scope["headers"], HEADER)
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+            return
+        subject = _subject(scope["headers"])
+        if subject is None:
+            # Not authenticated; the route answers 401 and nothing is stored.
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        scoped_key = f"{subject}:{key}"
+        request_fingerprint = fingerprint(scope["method"], scope["path"], scope.get("query_string", b""), body)
+
+        deadline = time.monotonic() + self.wait_seconds
+        try:
+            response = await self._first_response(scope, receive, send, scoped_key, request_fingerprint, body, deadline)
+        except IdempotencyKeyMismatch:
+            await _send_json(send, 422, "Idempotency-Key was already used for a different request")
+            return
+        except (IdempotencyKeyInProgress, asyncio.TimeoutError):
+            await _send_json(send, 409, "A request with this Idempotency-Key is still in progress", [(b"retry-after", b"1")])
+            return
+        if response is not None:
+            await _replay(send, response)
+
+    async def _first_response(
+        self, scope, receive, send, key: str, request_fingerprint: str, body: bytes, deadline: float
+    ) -> Optional[StoredResponse]:
+        """The response to replay, or None after running the request on a claimed key."""
+        claim = self.store.claim
+        while True:
+            response = self.store.cached(key, request_fingerprint)
+            if response is not None:
+                return response
+            running = self._running.get(key)
+            if running is not None:
+                response = await asyncio.wait_for(asyncio.shield(running), max(0.0, deadline - time.monotonic()))
+                if response is not None:
+                    return response
+                # It failed and released the key; claim it.
+                continue
+
+            running = asyncio.get_running_loop().create_future()
+            self._running[key] = running
+            try:
+                response = await run_in_threadpool(claim, key, request_fingerprint)
+            except IdempotencyKeyInProgress:
+                # Running on another worker; poll its row until it finishes.
+                del self._running[key]
+                running.set_result(None)
+                if time.monotonic() >= deadline:
+                    raise
+                claim = self.store.poll
+                await asyncio.sleep(self.poll_seconds)
+                continue
+            except BaseException:
+                del self._running[key]
+                running.set_result(None)
+                raise
+            if response is not None:
+                del self._running[key]
+                running.set_result(response)
+                return response
+            await self._run(scope, receive, send, key, body, request_fingerprint, running)
+            return None
+
+    async def _run(self, scope, receive, send, key: str, body: bytes, request_fingerprint: str, running) -> None:
+        """Run the request on a claimed key and store its response for replay."""
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        response = None
+        try:
+            await self.app(scope, replay_receive, capture)
+            if start and storable(start["status"]):
+                response = StoredResponse(start["status"], list(start.get("headers", [])), b"".join(chunks), request_fingerprint)
+        finally:
+            try:
+                if response is not None:
+                    await run_in_threadpool(self.store.complete, key, response)
+                else:
+                    await run_in_threadpool(self.store.release, key)
+            except Exception as e:
+                logger.error(f"Error storing idempotent response: {e}")
+            del self._running[key]
+            running.set_result(response)
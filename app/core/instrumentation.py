@@ -0,0 +1,167 @@
+"""
+Per-request SQL instrumentation.
+
+SQLAlchemy engine events count statements and time spent in the database for
+the request active in the current context. The ASGI middleware exposes the
+numbers as a `Server-Timing` header, folds them into a rolling per-route table
+and logs statements repeated often enough to look like an N+1 pattern.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so repeated queries with different literals compare equal."""
+    return _WHITESPACE.sub(" ", _LITERALS.sub("?", statement)).strip()
+
+
+class RequestSQLStats:
+    """Statements issued while serving one request."""
+
+    __slots__ = ("statements", "db_seconds", "fingerprints")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.statements += 1
+        self.db_seconds += elapsed
+        # Bound statements are cached by SQLAlchemy, so the raw text is already
+        # a stable key; normalize lazily in `repeated()`.
+        self.fingerprints[statement] += 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Return fingerprints issued at least `threshold` times."""
+        repeated: Counter = Counter()
+        for statement, count in self.fingerprints.items():
+            if count >= threshold:
+                repeated[fingerprint(statement)] += count
+        return dict(repeated)
+
+
+_current: ContextVar[Optional[RequestSQLStats]] = ContextVar("request_sql_stats", default=None)
+
+
+def current_stats() -> Optional[RequestSQLStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start_time")
+    if starts:
+        stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach statement counting to a (sync) engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RouteSQLTable:
+    """Rolling window of SQL stats per route template."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[Tuple[int, float]]] = {}
+        self._suspects: Dict[str, Dict[str, int]] = {}
+
+    def add(self, route: str, stats: RequestSQLStats, repeated: Dict[str, int]) -> None:
+        with self._lock:
+            samples = self._samples.get(route)
+            if samples is None:
+                samples = self._samples[route] = deque(maxlen=self.window)
+            samples.append((stats.statements, stats.db_seconds))
+            if repeated:
+                self._suspects[route] = repeated
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            items = [(route, list(samples)) for route, samples in self._samples.items()]
+            suspects = dict(self._suspects)
+        table = {}
+        for route, samples in items:
+            counts = sorted(count for count, _ in samples)
+            db_ms = sorted(seconds * 1000 for _, seconds in samples)
+            table[route] = {
+                "requests": len(samples),
+                "avg_statements": sum(counts) / len(counts),
+                "max_statements": counts[-1],
+                "avg_db_ms": sum(db_ms) / len(db_ms),
+                "p95_db_ms": db_ms[max(int(len(db_ms) * 0.95) - 1, 0)],
+                "suspected_n_plus_one": suspects.get(route, {}),
+            }
+        return table
+
+
+route_sql_table = RouteSQLTable(window=settings.sql_instrumentation_window)
+
+
+class SQLInstrumentationMiddleware:
+    """ASGI middleware that scopes SQL stats to a request and reports them."""
+
+    def __init__(self, app, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSQLStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                timing = (
+                    f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.statements} queries", '
+                    f"app;dur={total_ms:.2f}"
+                )
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope, stats: RequestSQLStats) -> None:
+        route = scope.get("route")
+        if route is None:
+            return
+        key = f"{scope['method']} {route.path}"
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        for statement, count in repeated.items():
+            logger.warning(f"Suspected N+1 on {key}: {count}x {statement[:200]}")
+        route_sql_table.add(key, stats, repeated)
@@ -0,0 +1,231 @@
+"""
+Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+Sessions created by the workload factories record the `(table, id)` of every
+row of a published table they insert, update or delete through the ORM; bulk
+statements report their rows with `invalidation_bus.mark_changed`. Right
+before commit they send one `pg_notify` per table with the ids and the table's
+`table_versions` version. Postgres delivers notifications only when the
+transaction commits, so listeners never hear about writes that rolled back.
+Commits that NOTIFY are serialized on a cluster-wide queue lock, so only
+tables somebody caches are published; sales tables are not.
+
+Each worker runs a listener thread on a dedicated autocommit connection and
+hands events to subscribers. The default subscriber drops the conditional
+GET stamp of the table and the matching `crud.<table>` cache entries. A
+listener that loses its connection flushes every subscribed table after
+reconnecting, since it may have missed events meanwhile.
+
+LISTEN needs a session-pooled connection: behind PgBouncer in transaction
+mode, point `INVALIDATION_LISTEN_URL` at Postgres directly. NOTIFY itself
+works through any pooler.
+"""
+import json
+import logging
+import select
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.cache import caches
+from app.core.conditional import table_versions
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# More ids than this for one table in one commit are sent as "flush the table".
+MAX_IDS_PER_EVENT = 100
+MAX_IDS_PER_TABLE = 1_000
+
+_PENDING = "invalidation_pending"
+
+_NOTIFY_SQL = text(
+    "SELECT pg_notify(:channel, json_build_object("
+    "'table', CAST(:table AS text), "
+    "'ids', CAST(:ids AS json), "
+    "'version', COALESCE((SELECT version FROM table_versions WHERE table_name = :table), 0)"
+    ")::text)"
+)
+
+# handler(table, ids or None for "everything", version)
+Handler = Callable[[str, Optional[List[str]], int], None]
+
+
+def events_for(pending: Dict[str, Set[str]]) -> List[Tuple[str, Optional[List[str]]]]:
+    """Split pending `(table -> ids)` into NOTIFY-sized `(table, ids)` events."""
+    events = []
+    for table, ids in sorted(pending.items()):
+        if len(ids) > MAX_IDS_PER_TABLE:
+            events.append((table, None))
+            continue
+        ordered = sorted(ids)
+        for start in range(0, len(ordered), MAX_IDS_PER_EVENT):
+            events.append((table, ordered[start:start + MAX_IDS_PER_EVENT]))
+    return events
+
+
+def evict_cached(table: str, ids: Optional[List[str]], version: int) -> None:
+    """Default subscriber: drop the table's conditional GET stamp and `crud.<table>` entries."""
+    table_versions.invalidate(table)
+    cache = caches.get(f"crud.{table}")
+    if cache is None:
+        return
+    if ids is None:
+        cache.clear()
+    else:
+        wanted = set(ids)
+        cache.discard(lambda key: key[0] in wanted)
+
+
+class InvalidationBus:
+    """Publishes row changes on commit and dispatches received events to subscribers."""
+
+    def __init__(self, channel: str, tables: Iterable[str], reconnect_seconds: float = 1.0):
+        self.channel = channel
+        self.tables = frozenset(tables)
+        self.reconnect_seconds = reconnect_seconds
+        self.received = 0
+        self.published = 0
+        self.connected = False
+        self.error: Optional[str] = None
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, table: str, handler: Handler) -> None:
+        """Call `handler` for events on `table`; "*" subscribes to every table."""
+        self._handlers.setdefault(table, []).append(handler)
+
+    def dispatch(self, table: str, ids: Optional[List[str]], version: int) -> None:
+        for handler in self._handlers.get(table, []) + self._handlers.get("*", []):
+            try:
+                handler(table, ids, version)
+            except Exception as e:
+                logger.error(f"Invalidation handler {handler!r} failed for {table}: {e}")
+
+    def dispatch_payload(self, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            table, ids, version = data["table"], data.get("ids"), int(data.get("version") or 0)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed invalidation payload {payload!r}: {e}")
+            return
+        self.received += 1
+        self.dispatch(table, ids, version)
+
+    def flush_all(self) -> None:
+        """Treat every subscribed table as changed (after missing events)."""
+        for table in [table for table in self._handlers if table != "*"]:
+            self.dispatch(table, None, 0)
+        for cache in list(caches.values()):
+            if cache.namespace.startswith("crud."):
+                cache.clear()
+        table_versions.clear()
+
+    # Publishing
+
+    def install(self, session_factories: Iterable) -> None:
+        """Record changes and NOTIFY on commit for sessions made by these factories."""
+        for factory in session_factories:
+            event.listen(factory, "after_flush", self._after_flush)
+            event.listen(factory, "before_commit", self._before_commit)
+            event.listen(factory, "after_rollback", self._after_rollback)
+
+    def mark_changed(self, session: Session, table: str, ids: Iterable) -> None:
+        """Publish rows changed by bulk UPDATE/DELETE statements, which skip the flush hook."""
+        if table not in self.tables:
+            return
+        session.info.setdefault(_PENDING, {}).setdefault(table, set()).update(str(id) for id in ids)
+
+    def _after_flush(self, session: Session, flush_context) -> None:
+        tables = self.tables
+        pending = None
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            table = getattr(obj, "__tablename__", None)
+            if table not in tables:
+                continue
+            id = getattr(obj, "id", None)
+            if id is not None:
+                if pending is None:
+                    pending = session.info.setdefault(_PENDING, {})
+                pending.setdefault(table, set()).add(str(id))
+
+    def _before_commit(self, session: Session) -> None:
+        # Flush here so changes flushed by commit itself are seen, then notify
+        # inside the transaction: delivery happens only if it commits.
+        session.flush()
+        pending = session.info.pop(_PENDING, None)
+        if not pending or session.get_bind().dialect.name != "postgresql":
+            return
+        for table, ids in events_for(pending):
+            session.execute(_NOTIFY_SQL, {"channel": self.channel, "table": table, "ids": json.dumps(ids)})
+            self.published += 1
+
+    @staticmethod
+    def _after_rollback(session: Session) -> None:
+        session.info.pop(_PENDING, None)
+
+    # Listening
+
+    def start(self, url: str) -> None:
+        """Listen on a daemon thread, reconnecting with `reconnect_seconds` pauses."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._thread = threading.Thread(target=self._run, args=(dsn,), name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, dsn: str) -> None:
+        import psycopg2
+        import psycopg2.extensions
+
+        first = True
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(dsn)
+                connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                self.connected, self.error = True, None
+                if not first:
+                    self.flush_all()
+                first = False
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self.dispatch_payload(connection.notifies.pop(0).payload)
+            except Exception as e:
+                if self.connected or self.error is None:
+                    logger.warning(f"Cache invalidation listener disconnected: {e}")
+                self.connected, self.error = False, type(e).__name__
+                first = False
+                self._stop.wait(self.reconnect_seconds)
+            finally:
+                if connection is not None:
+                    connection.close()
+        self.connected = False
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "error": self.error,
+            "published": self.published,
+            "received": self.received,
+        }
+
+
+invalidation_bus = InvalidationBus(settings.invalidation_channel, settings.invalidation_tables)
+invalidation_bus.subscribe("*", evict_cached)
@@ -0,0 +1,250 @@
+"""
+Prometheus text-format metrics.
+
+Request metrics are updated by an ASGI middleware that runs on the event loop
+thread, so the hot path is a dict lookup, a `bisect` and a few integer
+increments with no locking. Pool, threadpool and cache gauges are sampled only
+when `/metrics` is scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.util import queue as sqla_queue
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts are stored per bucket and cumulated on export."""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric exported by this worker."""
+
+    def __init__(self):
+        self.request_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.request_status: Dict[Tuple[str, str, int], int] = {}
+        self.in_flight = 0
+        self.pool_wait: Dict[str, Histogram] = {}
+        self._pool_wait_lock = threading.Lock()
+        self._engines: Dict[str, object] = {}
+        self._caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self._cache_evictions: Dict[str, Callable[[], int]] = {}
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route)
+        histogram = self.request_latency.get(key)
+        if histogram is None:
+            histogram = self.request_latency[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+        status_key = (method, route, status)
+        self.request_status[status_key] = self.request_status.get(status_key, 0) + 1
+
+    def observe_pool_wait(self, pool_name: str, seconds: float) -> None:
+        # Called from worker threads, only for checkouts that found no idle connection.
+        with self._pool_wait_lock:
+            histogram = self.pool_wait.get(pool_name)
+            if histogram is None:
+                histogram = self.pool_wait[pool_name] = Histogram(POOL_WAIT_BUCKETS)
+            histogram.observe(seconds)
+
+    def register_engine(self, name: str, engine) -> None:
+        self._engines[name] = engine
+        engine.pool._metrics_name = name
+
+    def register_cache(
+        self,
+        name: str,
+        stats: Callable[[], Tuple[int, int]],
+        evictions: Optional[Callable[[], int]] = None,
+    ) -> None:
+        """Register a callable returning `(hits, misses)` for a cache, and optionally its evictions."""
+        self._caches[name] = stats
+        if evictions is not None:
+            self._cache_evictions[name] = evictions
+
+    def render(self, threadpool: Optional[dict] = None) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in list(self.request_latency.items()):
+            lines.extend(histogram.render("http_request_duration_seconds", f'method="{method}",route="{route}"'))
+
+        lines += ["# HELP http_requests_total Requests by route and status.", "# TYPE http_requests_total counter"]
+        for (method, route, status), count in list(self.request_status.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+
+        lines += self._render_pools()
+
+        if threadpool is not None:
+            lines += ["# HELP threadpool_tokens Threadpool capacity and usage.", "# TYPE threadpool_tokens gauge"]
+            for key, value in threadpool.items():
+                lines.append(f'threadpool_tokens{{state="{key}"}} {value}')
+
+        lines += [
+            "# HELP cache_requests_total Cache lookups by result.",
+            "# TYPE cache_requests_total counter",
+        ]
+        ratios = []
+        for name, stats in list(self._caches.items()):
+            hits, misses = stats()
+            lines.append(f'cache_requests_total{{cache="{name}",result="hit"}} {hits}')
+            lines.append(f'cache_requests_total{{cache="{name}",result="miss"}} {misses}')
+            ratios.append(f'cache_hit_ratio{{cache="{name}"}} {hits / (hits + misses) if hits + misses else 0}')
+        lines += ["# HELP cache_hit_ratio Cache hit ratio since start.", "# TYPE cache_hit_ratio gauge"] + ratios
+        lines += ["# HELP cache_evictions_total Entries evicted to respect cache size.", "# TYPE cache_evictions_total counter"]
+        for name, evictions in list(self._cache_evictions.items()):
+            lines.append(f'cache_evictions_total{{cache="{name}"}} {evictions()}')
+
+        return "\n".join(lines) + "\n"
+
+    def _render_pools(self) -> List[str]:
+        lines = ["# HELP db_pool_connections Connection pool state.", "# TYPE db_pool_connections gauge"]
+        for name, engine in self._engines.items():
+            pool = engine.pool
+            for state, method in (("size", "size"), ("checked_out", "checkedout"),
+                                  ("overflow", "overflow"), ("checked_in", "checkedin"),
+                                  ("waiting", "waiters")):
+                getter = getattr(pool, method, None)
+                if getter is not None:
+                    # QueuePool.overflow() starts at -pool_size; report connections beyond the pool.
+                    value = max(getter(), 0) if state == "overflow" else getter()
+                    lines.append(f'db_pool_connections{{engine="{name}",state="{state}"}} {value}')
+        lines += [
+            "# HELP db_pool_wait_seconds Time spent obtaining a pooled connection when none was idle.",
+            "# TYPE db_pool_wait_seconds histogram",
+        ]
+        with self._pool_wait_lock:
+            for name, histogram in self.pool_wait.items():
+                lines.extend(histogram.render("db_pool_wait_seconds", f'engine="{name}"'))
+        return lines
+
+
+metrics = MetricsRegistry()
+
+
+class _TimedPoolMixin:
+    """Records how long `_do_get` blocks waiting for a connection and how many callers are waiting."""
+
+    _metrics_name = "default"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._waiters = 0
+        self._waiters_lock = threading.Lock()
+
+    def _do_get(self):
+        # Fast path: an idle connection is handed out without timing or locking.
+        try:
+            return self._pool.get(False)
+        except sqla_queue.Empty:
+            pass
+        started = time.perf_counter()
+        with self._waiters_lock:
+            self._waiters += 1
+        try:
+            return super()._do_get()
+        finally:
+            with self._waiters_lock:
+                self._waiters -= 1
+            metrics.observe_pool_wait(self._metrics_name, time.perf_counter() - started)
+
+    def waiters(self) -> int:
+        """Callers currently blocked obtaining a connection from this pool."""
+        return self._waiters
+
+    def recreate(self):
+        pool = super().recreate()
+        pool._metrics_name = self._metrics_name
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def threadpool_stats() -> dict:
+    """Sample the AnyIO limiter Starlette uses for sync routes (event loop thread only)."""
+    from anyio.to_thread import current_default_thread_limiter
+
+    limiter = current_default_thread_limiter()
+    return {
+        "total": limiter.total_tokens,
+        "borrowed": limiter.borrowed_tokens,
+        "waiting": limiter.statistics().tasks_waiting,
+    }
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight count per route."""
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        status = 500
+        started = time.perf_counter()
+        registry.in_flight += 1
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.in_flight -= 1
+            route = scope.get("route")
+            # Unmatched paths share one label to keep cardinality bounded.
+            registry.observe_request(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+                time.perf_counter() - started,
+            )
@@ -0,0 +1,117 @@
+"""
+Compiled role permissions.
+
+Roles are compiled into immutable bitsets: every permission name gets a bit
+the first time it is seen, a role's mask is the OR of its permissions' bits,
+and `"*"` grants everything. A check is one AND against a mask computed when
+the dependency is declared, with no ORM attribute access on the role.
+
+Compiled roles are cached per worker by role id, stamped with the `roles`
+version from `table_versions`. Writes through `CRUDRole` (the `/v1/roles`
+routes) drop this worker's entries; the invalidation bus drops the other
+workers'. An entry older than the worker's current `roles` stamp is
+recompiled on its next use.
+"""
+import json
+import threading
+from typing import Dict, Iterable, NamedTuple, Optional, Union
+from uuid import UUID
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from app.core.conditional import table_versions
+from app.models.user import Role
+
+WILDCARD = "*"
+
+_roles = Role.__table__
+# Plain columns: compiling a role never touches ORM instances.
+_ROLE_SQL = select(_roles.c.name, _roles.c.permissions).where(_roles.c.id == bindparam("role_id"))
+
+
+class PermissionBits:
+    """Assigns one bit per permission name, in order of first use."""
+
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def bit(self, name: str) -> int:
+        bit = self._bits.get(name)
+        if bit is None:
+            with self._lock:
+                bit = self._bits.setdefault(name, 1 << len(self._bits))
+        return bit
+
+    def mask(self, names: Iterable[str]) -> int:
+        mask = 0
+        for name in names:
+            mask |= self.bit(name)
+        return mask
+
+
+permission_bits = PermissionBits()
+
+
+class CompiledRole(NamedTuple):
+    id: UUID
+    name: str
+    version: int
+    mask: int
+    wildcard: bool
+
+    def allows(self, required: int) -> bool:
+        return self.wildcard or self.mask & required == required
+
+
+def compile_role(
+    role_id: UUID, name: str, permissions: Union[None, str, Iterable[str]], version: int = 0
+) -> CompiledRole:
+    # The JSON column may hold a list or, for rows written as text, an encoded list.
+    if isinstance(permissions, str):
+        permissions = json.loads(permissions)
+    permissions = [permission for permission in permissions or () if isinstance(permission, str)]
+    wildcard = WILDCARD in permissions
+    mask = permission_bits.mask(permission for permission in permissions if permission != WILDCARD)
+    return CompiledRole(role_id, name, version, mask, wildcard)
+
+
+class RolePermissions:
+    """Worker-local cache of compiled roles."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._roles: Dict[UUID, CompiledRole] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, role_id: UUID) -> Optional[CompiledRole]:
+        """The compiled role, loading and compiling it on a miss; None if it does not exist."""
+        role = self._roles.get(role_id)
+        if role is not None:
+            stamp = table_versions.cached("roles")
+            if stamp is None or stamp.version <= role.version:
+                self.hits += 1
+                return role
+        self.misses += 1
+        generation = self._generation
+        version = table_versions.load(db, "roles").version
+        row = db.execute(_ROLE_SQL, {"role_id": role_id}).first()
+        if row is None:
+            return None
+        role = compile_role(role_id, row.name, row.permissions, version)
+        with self._lock:
+            # Do not store a role compiled from rows read before an invalidation.
+            if generation == self._generation:
+                self._roles[role_id] = role
+        return role
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._roles.clear()
+            self._generation += 1
+
+
+role_permissions = RolePermissions()
@@ -0,0 +1,181 @@
+"""
+Read-replica routing.
+
+GET requests to read-heavy routers are served from streaming replicas, picked
+round-robin among those that passed the last health check. A background
+thread probes each replica for reachability and replay lag. After a client
+writes, it is pinned to the primary for a short window (cookie or header) so
+it always reads its own writes.
+"""
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "pos_primary_until"
+STICKY_HEADER = "x-primary-until"
+
+# Zero lag when the replica has replayed everything it received; otherwise the
+# age of the last replayed transaction.
+_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+# Whether the current request may read from a replica; set by the middleware.
+prefer_replica: ContextVar[bool] = ContextVar("prefer_replica", default=False)
+
+_READ_METHODS = ("GET", "HEAD")
+
+
+class Replica:
+    """One replica engine with its last observed health."""
+
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class ReplicaSet:
+    """Round-robin over healthy replicas, with periodic lag checks."""
+
+    def __init__(self, engines: List[Engine], max_lag_seconds: float):
+        self.replicas = [Replica(f"replica{index}", engine) for index, engine in enumerate(engines)]
+        self.max_lag_seconds = max_lag_seconds
+        self._healthy = list(self.replicas)
+        self._counter = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        """Next healthy replica, or None when every replica is down or lagging."""
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def session_factory(self) -> Optional[Callable]:
+        replica = self.pick()
+        return replica.session_factory if replica is not None else None
+
+    def check(self) -> None:
+        """Probe every replica and refresh the healthy list."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    replica.lag_seconds = float(connection.execute(_LAG_SQL).scalar())
+                replica.error = None
+                healthy = replica.lag_seconds <= self.max_lag_seconds
+            except Exception as e:
+                replica.lag_seconds = None
+                replica.error = str(e)
+                healthy = False
+            if healthy != replica.healthy:
+                logger.warning(
+                    f"Read replica {replica.name} is now {'healthy' if healthy else 'unhealthy'} "
+                    f"(lag={replica.lag_seconds}, error={replica.error})"
+                )
+            replica.healthy = healthy
+        self._healthy = [replica for replica in self.replicas if replica.healthy]
+
+    def start(self, interval_seconds: float) -> None:
+        """Run `check()` every `interval_seconds` on a daemon thread."""
+        if not self.replicas or self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                self.check()
+                self._stop.wait(interval_seconds)
+
+        self._thread = threading.Thread(target=run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> List[dict]:
+        return [
+            {"name": replica.name, "healthy": replica.healthy, "lag_seconds": replica.lag_seconds, "error": replica.error}
+            for replica in self.replicas
+        ]
+
+
+def sticky_until(headers) -> float:
+    """Return the primary-pinning deadline carried by a request, or 0."""
+    value = None
+    for name, raw in headers:
+        if name == STICKY_HEADER.encode():
+            value = raw.decode("latin-1")
+        elif name == b"cookie" and value is None:
+            morsel = SimpleCookie(raw.decode("latin-1")).get(STICKY_COOKIE)
+            if morsel is not None:
+                value = morsel.value
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+class ReplicaRoutingMiddleware:
+    """
+    ASGI middleware marking reads that may go to a replica.
+
+    Successful writes answer with a cookie and header pinning the client to the
+    primary for `sticky_seconds`; terminals that do not keep cookies can echo
+    the `X-Primary-Until` header instead.
+    """
+
+    def __init__(self, app, prefixes, sticky_seconds: float):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] in _READ_METHODS:
+            replica_ok = scope["path"].startswith(self.prefixes) and sticky_until(scope["headers"]) < time.time()
+            token = prefer_replica.set(replica_ok)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                prefer_replica.reset(token)
+            return
+
+        sticky_seconds = self.sticky_seconds
+
+        async def send_with_sticky(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = f"{time.time() + sticky_seconds:.3f}"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (STICKY_HEADER.encode(), until.encode()),
+                    (b"set-cookie", (
+                        f"{STICKY_COOKIE}={until}; Max-Age={int(sticky_seconds) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                    ).encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_sticky)
@@ -0,0 +1,248 @@
+"""
+JWT revocation without a database round trip per request.
+
+Tokens carry a random `jti`. Revoking one stores a row in `revoked_tokens`
+until the token would have expired anyway, and adds it to each worker's
+in-process deny-list:
+
+* a Bloom filter, which answers "certainly not revoked" for almost every
+  request. jtis are random 128-bit values, so the probe positions are taken
+  straight from their bytes instead of hashing;
+* an exact `jti -> exp` map, consulted only when the filter says "maybe", so
+  a false positive never rejects a valid token.
+
+The worker that revokes a token updates its list at once; other workers load
+the new rows when the invalidation bus announces them and, as a backstop, in
+a periodic sync of recently created rows. Entries past their `exp` are pruned
+on sync (JWT validation rejects those tokens anyway) and their rows deleted.
+A Bloom filter cannot forget, so it is rebuilt from the exact map when pruned
+entries make up a large share of it or it outgrows its capacity.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Rows are synced by creation time; re-read this far back so rows from
+# transactions that committed late are not skipped.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+_MASK_64 = (1 << 64) - 1
+
+
+def _key(jti: str) -> bytes:
+    # Our jtis are uuid4 hex; anything else is hashed to the same shape.
+    try:
+        key = bytes.fromhex(jti)
+        if len(key) == 16:
+            return key
+    except ValueError:
+        pass
+    return hashlib.blake2b(jti.encode(), digest_size=16).digest()
+
+
+def _timestamp(value: datetime) -> int:
+    return int((value - datetime(1970, 1, 1)).total_seconds())
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 16-byte random keys."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _probes(self, key: bytes):
+        value = int.from_bytes(key, "little")
+        return value & _MASK_64, (value >> 64) | 1
+
+    def add(self, key: bytes) -> None:
+        h1, h2 = self._probes(key)
+        bits, size = self._bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        h1, h2 = self._probes(key)
+        bits, size = self._bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+class RevocationList:
+    """This worker's deny-list of revoked token ids."""
+
+    def __init__(self, capacity: int, error_rate: float, clock: Callable[[], float] = time.time):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.clock = clock
+        self.checks = 0
+        self.filter_hits = 0
+        self.synced_at: Optional[datetime] = None
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._exact: Dict[bytes, int] = {}
+        self._lock = threading.Lock()
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def is_revoked(self, jti: str) -> bool:
+        self.checks += 1
+        key = _key(jti)
+        if key not in self._bloom:
+            return False
+        self.filter_hits += 1
+        exp = self._exact.get(key)
+        return exp is not None and exp > self.clock()
+
+    def add(self, jti: str, exp: int) -> None:
+        """Deny `jti` until `exp` (epoch seconds)."""
+        self.add_many([(jti, exp)])
+
+    def add_many(self, entries: Iterable) -> None:
+        now = self.clock()
+        with self._lock:
+            for jti, exp in entries:
+                if exp <= now:
+                    continue
+                key = _key(jti)
+                if key in self._exact:
+                    self._exact[key] = max(self._exact[key], exp)
+                    continue
+                self._exact[key] = exp
+                self._bloom.add(key)
+            if self._bloom.count > self._bloom.capacity:
+                self._rebuild()
+
+    def prune(self) -> int:
+        """Forget expired entries; returns how many."""
+        now = self.clock()
+        with self._lock:
+            expired = [key for key, exp in self._exact.items() if exp <= now]
+            for key in expired:
+                del self._exact[key]
+            if expired and self._bloom.count > 2 * len(self._exact):
+                self._rebuild()
+        return len(expired)
+
+    def _rebuild(self) -> None:
+        # Caller holds the lock. Readers keep using the old filter until the swap.
+        capacity = max(self.capacity, 2 * len(self._exact))
+        bloom = BloomFilter(capacity, self.error_rate)
+        for key in self._exact:
+            bloom.add(key)
+        self._bloom = bloom
+
+    # Database
+
+    def revoke(self, db: Session, jti: str, exp: int, user_id=None) -> None:
+        """Persist the revocation and apply it to this worker at once."""
+        db.add(RevokedToken(jti=jti, expires_at=datetime.utcfromtimestamp(exp), user_id=user_id))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Already revoked.
+            db.rollback()
+        self.add(jti, exp)
+
+    def revoke_payload(self, db: Session, payload: dict) -> bool:
+        """Revoke a decoded token; tokens minted without a `jti` cannot be revoked."""
+        jti = payload.get("jti")
+        if not jti:
+            return False
+        try:
+            user_id = UUID(payload.get("sub"))
+        except (TypeError, ValueError):
+            user_id = None
+        self.revoke(db, jti, int(payload["exp"]), user_id=user_id)
+        return True
+
+    def load_ids(self, db: Session, ids: List[str]) -> None:
+        rows = db.query(RevokedToken.jti, RevokedToken.expires_at).filter(RevokedToken.id.in_(ids))
+        self.add_many((jti, _timestamp(expires_at)) for jti, expires_at in rows)
+
+    def sync(self, db: Session) -> None:
+        """Load rows created since the last sync, then prune and delete expired ones."""
+        started = datetime.utcnow()
+        query = db.query(RevokedToken.jti, RevokedToken.expires_at).filter(RevokedToken.expires_at > started)
+        if self.synced_at is not None:
+            query = query.filter(RevokedToken.created_at >= self.synced_at - SYNC_OVERLAP)
+        self.add_many((jti, _timestamp(expires_at)) for jti, expires_at in query.yield_per(10_000))
+        self.synced_at = started
+        self.prune()
+        db.query(RevokedToken).filter(RevokedToken.expires_at <= started).delete(synchronize_session=False)
+        db.commit()
+
+    def on_change(self, table: str, ids: Optional[List[str]], version: int) -> None:
+        """Invalidation bus handler for `revoked_tokens`."""
+        if self._session_factory is None:
+            return
+        db = self._session_factory()
+        try:
+            if ids is None:
+                self.sync(db)
+            else:
+                self.load_ids(db, ids)
+        except Exception as e:
+            logger.error(f"Error loading revoked tokens: {e}")
+        finally:
+            db.close()
+
+    def start(self, session_factory: Callable[[], Session], interval_seconds: float) -> None:
+        """Sync every `interval_seconds` on a daemon thread."""
+        self._session_factory = session_factory
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval_seconds):
+                self.on_change(RevokedToken.__tablename__, None, 0)
+
+        self._thread = threading.Thread(target=run, name="token-revocation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "revoked": len(self._exact),
+            "filter_bytes": self._bloom.nbytes,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+        }
+
+
+revocation_list = RevocationList(settings.revocation_bloom_capacity, settings.revocation_bloom_error_rate)
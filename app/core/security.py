@@ -1,19 +1,23 @@
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Union
+from uuid import uuid4
 import logging
 
 from jose import JWTError, jwt
 import bcrypt
 
 from app.core.config import settings
+from app.core.revocation import revocation_list
 
 logger = logging.getLogger(__name__)
 
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: Optional[timedelta] = None
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[Dict[str, Any]] = None,
 ) -> str:
-    """Create JWT access token."""
+    """Create JWT access token; `claims` are added to the payload (e.g. `employee_id`)."""
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -21,7 +25,7 @@ def create_access_token(
             minutes=settings.access_token_expire_minutes
         )
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject), "type": "access", "jti": uuid4().hex}
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
@@ -35,7 +39,7 @@ def create_refresh_token(
     else:
         expire = datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days)
     
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh", "jti": uuid4().hex}
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
@@ -60,15 +64,29 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify JWT token and return subject."""
+def decode_token(token: str, token_type: str = "access") -> Optional[Dict[str, Any]]:
+    """
+    Decode a JWT of the given type; None if it is invalid, expired, of another type or revoked.
+
+    Access tokens minted before tokens were typed carry no "type" claim.
+    """
     try:
         payload = jwt.decode(
             token, settings.secret_key, algorithms=[settings.algorithm]
         )
-        subject: str = payload.get("sub")
-        if subject is None:
-            return None
-        return subject
     except JWTError:
         return None
+    if payload.get("sub") is None or payload.get("type", "access") != token_type:
+        return None
+    jti = payload.get("jti")
+    if jti is not None and revocation_list.is_revoked(jti):
+        return None
+    return payload
+
+
+def verify_token(token: str, token_type: str = "access") -> Optional[str]:
+    """Verify JWT token and return subject."""
+    payload = decode_token(token, token_type)
+    if payload is None:
+        return None
+    return payload["sub"]
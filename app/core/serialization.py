@@ -0,0 +1,364 @@
+"""
+Fast JSON serialization for ORM objects and Core rows.
+
+Returning ORM objects through `response_model` makes FastAPI validate every row
+into a Pydantic model, walk the result again with `jsonable_encoder` and then
+encode it with the stdlib `json`. Rows read from the database are already
+typed, so a `RowSerializer` precomputes the field names of a response schema
+once and copies attributes straight into dicts that orjson encodes natively
+(UUID, datetime, date and enums included). Routes keep `response_model` for
+the OpenAPI schema and return the serializer's `Response`, which FastAPI
+passes through untouched.
+
+Clients may ask for MessagePack instead (`Accept: application/msgpack`) and
+send MessagePack bodies (`Content-Type: application/msgpack`); JSON stays the
+default. Adding `layout=columnar` to the accepted media type turns list
+responses into `{"columns": [...], "rows": [[...], ...]}`, which drops the
+repeated keys of every record. In MessagePack, UUIDs are 16-byte binaries and
+datetimes use the Timestamp extension. `ContentNegotiationMiddleware` does the
+negotiation for the whole API; serializer responses are encoded directly in
+the negotiated format, anything else returning JSON is transcoded.
+"""
+import typing
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+from uuid import UUID
+
+import msgpack
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# (media type, columnar) negotiated for the current request
+response_format: ContextVar[Tuple[str, bool]] = ContextVar("response_format", default=(JSON, False))
+
+
+def _default(value: Any) -> Any:
+    # Decimal, sets, Pydantic models and anything else the encoders do not know.
+    return to_jsonable_python(value)
+
+
+def dumps(data: Any) -> bytes:
+    """Encode plain data (dicts, lists, scalars) to JSON bytes."""
+    return orjson.dumps(data, default=_default)
+
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+
+
+def _msgpack_default(value: Any) -> Any:
+    # UUIDs travel as 16-byte bin and datetimes as the standard Timestamp
+    # extension (naive values are UTC), both far smaller than their strings.
+    if isinstance(value, UUID):
+        return value.bytes
+    if isinstance(value, datetime):
+        delta = value - (_EPOCH if value.tzinfo is None else _EPOCH_UTC)
+        return msgpack.Timestamp(delta.days * 86400 + delta.seconds, delta.microseconds * 1000)
+    return to_jsonable_python(value)
+
+
+def packb(data: Any) -> bytes:
+    """Encode plain data to MessagePack bytes."""
+    return msgpack.packb(data, default=_msgpack_default)
+
+
+# Typed MessagePack for values kept outside the process (the shared cache
+# tier). Only plain data is accepted; UUIDs, dates and datetimes are tagged so
+# they decode to the same types, and nothing decodes to code.
+_EXT_UUID = 1
+_EXT_DATE = 2
+_EXT_DATETIME = 3
+
+
+def _typed_default(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return msgpack.ExtType(_EXT_UUID, value.bytes)
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, value.isoformat().encode())
+    if isinstance(value, date):
+        return msgpack.ExtType(_EXT_DATE, value.isoformat().encode())
+    if isinstance(value, tuple):
+        return list(value)
+    raise TypeError(f"Cannot store {type(value).__name__} values")
+
+
+def _typed_ext(code: int, data: bytes) -> Any:
+    if code == _EXT_UUID:
+        return UUID(bytes=data)
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def pack_value(data: Any) -> bytes:
+    """Encode plain data (dicts, lists, str, numbers, UUIDs, dates) to typed MessagePack; TypeError otherwise."""
+    # strict_types sends str/int subclasses such as enums to `_typed_default`, which refuses them.
+    return msgpack.packb(data, default=_typed_default, strict_types=True, datetime=False)
+
+
+def unpack_value(raw: bytes) -> Any:
+    return msgpack.unpackb(raw, ext_hook=_typed_ext, strict_map_key=False)
+
+
+def encode(data: Any, media_type: str) -> bytes:
+    return packb(data) if media_type == MSGPACK else dumps(data)
+
+
+def negotiate(accept: str) -> Tuple[str, bool]:
+    """
+    Pick the response format for an `Accept` header.
+
+    MessagePack wins when it is accepted with at least the quality of JSON;
+    `layout=columnar` is honoured on whichever media type is chosen.
+    """
+    best: Dict[str, Tuple[float, bool]] = {}
+    for part in accept.split(","):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        media_type = media_type.lower()
+        if media_type in _MSGPACK_TYPES:
+            media_type = MSGPACK
+        elif media_type not in (JSON, "application/*", "*/*"):
+            continue
+        quality, columnar = 1.0, False
+        for param in params:
+            key, _, value = param.partition("=")
+            key, value = key.strip().lower(), value.strip().strip('"').lower()
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+            elif key == "layout":
+                columnar = value == "columnar"
+        if quality > best.get(media_type, (0.0, False))[0]:
+            best[media_type] = (quality, columnar)
+
+    msgpack_quality, msgpack_columnar = best.get(MSGPACK, (0.0, False))
+    json_quality, json_columnar = best.get(JSON, (0.0, False))
+    if msgpack_quality > 0 and msgpack_quality >= json_quality:
+        return MSGPACK, msgpack_columnar
+    return JSON, json_columnar
+
+
+def _is_model(annotation: Any) -> bool:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return True
+    return any(_is_model(arg) for arg in typing.get_args(annotation))
+
+
+class RowSerializer:
+    """
+    Serializer for a flat record shape, optionally with nested collections.
+
+    `fields` are read with `getattr`, so ORM instances and Core `Row` objects
+    work alike. `nested` maps an output key to `(attribute, serializer)` for
+    one-to-many relationships.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str],
+        nested: Optional[Dict[str, Tuple[str, "RowSerializer"]]] = None,
+    ):
+        self.fields = tuple(fields)
+        self.nested = dict(nested or {})
+        self._get = attrgetter(*self.fields) if len(self.fields) > 1 else (lambda obj: (getattr(obj, self.fields[0]),))
+
+    @classmethod
+    def for_schema(
+        cls,
+        schema: Type[BaseModel],
+        nested: Optional[Dict[str, Tuple[str, "RowSerializer"]]] = None,
+    ) -> "RowSerializer":
+        """Build a serializer emitting exactly the fields of `schema`."""
+        nested = nested or {}
+        fields = []
+        for name, field in schema.model_fields.items():
+            if name in nested:
+                continue
+            if _is_model(field.annotation):
+                raise TypeError(f"{schema.__name__}.{name} is a nested model; pass a serializer in `nested`")
+            fields.append(name)
+        return cls(fields, nested)
+
+    def row(self, obj: Any) -> Dict[str, Any]:
+        data = dict(zip(self.fields, self._get(obj)))
+        for key, (attribute, serializer) in self.nested.items():
+            data[key] = serializer.rows(getattr(obj, attribute))
+        return data
+
+    def rows(self, objs: Iterable[Any]) -> List[Dict[str, Any]]:
+        if self.nested:
+            return [self.row(obj) for obj in objs]
+        fields, get = self.fields, self._get
+        return [dict(zip(fields, get(obj))) for obj in objs]
+
+    def columns(self, objs: Iterable[Any]) -> Dict[str, Any]:
+        """Columnar layout: one header, then one array of values per record."""
+        get = self._get
+        if not self.nested:
+            return {"columns": list(self.fields), "rows": [list(get(obj)) for obj in objs]}
+        nested = list(self.nested.values())
+        return {
+            "columns": [*self.fields, *self.nested],
+            "rows": [
+                [*get(obj), *(serializer.columns(getattr(obj, attribute)) for attribute, serializer in nested)]
+                for obj in objs
+            ],
+        }
+
+    def response(self, objs: Iterable[Any], status_code: int = 200) -> Response:
+        """Response for a list of records in the negotiated format and layout."""
+        media_type, columnar = response_format.get()
+        data = self.columns(objs) if columnar else self.rows(objs)
+        return Response(encode(data, media_type), status_code=status_code, media_type=media_type)
+
+    def one_response(self, obj: Any, status_code: int = 200) -> Response:
+        """Response for a single record in the negotiated format."""
+        media_type, _ = response_format.get()
+        return Response(encode(self.row(obj), media_type), status_code=status_code, media_type=media_type)
+
+
+def _request_default(value: Any) -> Any:
+    # The inverse of `_msgpack_default` for bodies: 16-byte bin is a UUID as
+    # the API sent it. Other binaries have no JSON form.
+    if isinstance(value, bytes) and len(value) == 16:
+        return str(UUID(bytes=value))
+    raise TypeError(f"Cannot convert {type(value).__name__} to JSON")
+
+
+def msgpack_to_json(raw: bytes) -> bytes:
+    """Convert a MessagePack request body to JSON, accepting the UUIDs and timestamps responses use."""
+    return orjson.dumps(msgpack.unpackb(raw, timestamp=3), default=_request_default)
+
+
+def _header(headers, name: bytes) -> str:
+    for key, value in headers:
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+
+class ContentNegotiationMiddleware:
+    """
+    ASGI middleware speaking MessagePack to clients that ask for it.
+
+    Request bodies sent as `application/msgpack` are decoded and handed to
+    FastAPI as JSON, so routes and their validation are unchanged. JSON
+    responses are re-encoded as MessagePack when the client accepts it;
+    streaming and non-JSON responses pass through.
+    """
+
+    def __init__(self, app, prefix: str = ""):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        headers = scope["headers"]
+        negotiated = negotiate(_header(headers, b"accept"))
+        content_type = _header(headers, b"content-type").split(";")[0].strip().lower()
+
+        if content_type in _MSGPACK_TYPES:
+            chunks = []
+            while True:
+                message = await receive()
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            try:
+                body = msgpack_to_json(b"".join(chunks))
+            except (ValueError, TypeError, msgpack.UnpackException, orjson.JSONEncodeError):
+                await self._respond(send, 400, {"detail": "Invalid MessagePack body"}, negotiated[0])
+                return
+            scope = dict(scope)
+            scope["headers"] = [
+                (key, value) for key, value in headers if key not in (b"content-type", b"content-length")
+            ] + [(b"content-type", JSON.encode()), (b"content-length", str(len(body)).encode())]
+
+            sent = False
+
+            async def receive_json():
+                nonlocal sent
+                if sent:
+                    return await receive()
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            receive = receive_json
+
+        token = response_format.set(negotiated)
+        try:
+            if negotiated[0] == MSGPACK:
+                await self.app(scope, receive, self._transcoding(send))
+            else:
+                await self.app(scope, receive, self._vary(send))
+        finally:
+            response_format.reset(token)
+
+    @staticmethod
+    def _vary(send):
+        async def send_with_vary(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"vary", b"Accept")]
+            await send(message)
+
+        return send_with_vary
+
+    @staticmethod
+    def _transcoding(send):
+        start = None
+        chunks: List[bytes] = []
+
+        async def send_msgpack(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                content_type = _header(message.get("headers", []), b"content-type")
+                if content_type.split(";")[0].strip() != JSON:
+                    message["headers"] = list(message.get("headers", [])) + [(b"vary", b"Accept")]
+                    await send(message)
+                    return
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+            raw = b"".join(chunks)
+            body = packb(orjson.loads(raw)) if raw else raw
+            start["headers"] = [
+                (key, value) for key, value in start.get("headers", []) if key not in (b"content-type", b"content-length")
+            ] + [
+                (b"content-type", MSGPACK.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"vary", b"Accept"),
+            ]
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        return send_msgpack
+
+    @staticmethod
+    async def _respond(send, status_code: int, data: Any, media_type: str) -> None:
+        body = encode(data, media_type)
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", media_type.encode()), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,159 @@
+"""
+Worker warm-up run from the application lifespan.
+
+A freshly started worker has empty connection pools and cold SQLAlchemy
+compiled-statement caches (one per engine), so its first requests pay for
+connecting and compiling, and its per-worker caches are empty. Warm-up opens
+connections up front, runs the hot statements once per engine inside
+transactions that are rolled back, and loads the start of the product catalog
+into the `crud.products` cache. The readiness probe reports "warming_up" until
+it has finished.
+"""
+import logging
+import time
+from typing import Dict, Optional
+from uuid import uuid4
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.conditional import table_versions
+from app.core.database import BACKOFFICE, CHECKOUT, engines, session_factories
+from app.crud import customer as customer_crud, product as product_crud
+from app.crud.pos import pos_sale
+from app.models.customer import Customer
+from app.models.employee import Employee
+from app.models.pos import POSSale, POSSaleItem
+from app.models.product import Product
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """Progress of this worker's warm-up, as reported by the readiness probe."""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at: Optional[float] = None
+        self.duration_seconds: Optional[float] = None
+        self.steps: Dict[str, str] = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "duration_seconds": self.duration_seconds,
+            "steps": self.steps,
+        }
+
+
+warmup_state = WarmupState()
+
+
+def prefill_pool(engine: Engine, connections: int) -> int:
+    """Open up to `connections` connections at once and return them to the pool."""
+    size = getattr(engine.pool, "size", None)
+    if size is None:
+        # NullPool (PgBouncer mode) keeps nothing to prefill.
+        return 0
+    opened = []
+    try:
+        for _ in range(min(connections, size())):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+def warm_auth_statements(db: Session) -> None:
+    """The lookup `get_current_user` runs on every authenticated request."""
+    db.query(User).filter(User.id == uuid4()).first()
+
+
+def warm_crud_statements(db: Session) -> None:
+    """`CRUDBase.get` for the hot models and the product catalog listing."""
+    for crud in (product_crud.product, product_crud.inventory, customer_crud.customer, pos_sale):
+        crud.get(db, id=uuid4())
+    product_crud.product.get_multi(db, skip=0, limit=100)
+
+
+def warm_catalog_cache(db: Session, products: int) -> int:
+    """
+    Load the first `products` products through `get_cached`.
+
+    Each product is cached under both keys the routes read: the table version
+    product detail responses are stamped with, and no version (carts).
+    """
+    version = table_versions.load(db, Product.__tablename__).version
+    ids = [id for (id,) in db.query(Product.id).order_by(Product.id).limit(products)]
+    for id in ids:
+        product_crud.product.get_cached(db, id=id, version=version)
+        product_crud.product.get_cached(db, id=id)
+    return len(ids)
+
+
+def warm_sale_insert(db: Session) -> bool:
+    """
+    Insert a sale and an item against real rows, then roll back.
+
+    The rows are really written (and sequences advanced) inside the caller's
+    transaction; `run_warmup` rolls it back, so nothing is ever committed.
+    """
+    # The cashier lookup behind `CRUDEmployee.provision` (logins, mapping cache misses)
+    db.query(Employee.id).filter(Employee.user_id == uuid4()).scalar()
+    employee = db.query(Employee).first()
+    product = db.query(Product).first()
+    if employee is None or product is None:
+        return False
+    customer = db.query(Customer).first()
+    sale = POSSale(
+        customer_id=customer.id if customer else None,
+        cashier_id=employee.id,
+        total_amount=product.price,
+    )
+    db.add(sale)
+    db.flush()
+    db.add(POSSaleItem(sale_id=sale.id, product_id=product.id, quantity=1, unit_price=product.price, subtotal=product.price))
+    db.flush()
+    return True
+
+
+def run_warmup(pool_connections: int, enabled: bool = True, catalog_products: int = 0) -> WarmupState:
+    """Warm every workload pool; failures are logged and never block startup."""
+    state = warmup_state
+    state.started_at = time.perf_counter()
+    if not enabled:
+        state.duration_seconds = 0.0
+        state.ready = True
+        return state
+
+    for name, engine in engines.items():
+        try:
+            state.steps[f"{name}.pool"] = f"{prefill_pool(engine, pool_connections)} connections"
+        except Exception as e:
+            state.steps[f"{name}.pool"] = f"failed: {type(e).__name__}"
+            logger.warning(f"Warm-up could not prefill the {name} pool: {e}")
+            continue
+
+        db = session_factories[name]()
+        try:
+            warm_auth_statements(db)
+            warm_crud_statements(db)
+            if name == CHECKOUT:
+                inserted = warm_sale_insert(db)
+                state.steps[f"{name}.sale_insert"] = "ok" if inserted else "skipped (no employee or product)"
+            if name == BACKOFFICE and catalog_products > 0:
+                state.steps["catalog_cache"] = f"{warm_catalog_cache(db, catalog_products)} products"
+            state.steps[f"{name}.statements"] = "ok"
+        except Exception as e:
+            state.steps[f"{name}.statements"] = f"failed: {type(e).__name__}"
+            logger.warning(f"Warm-up statements failed on the {name} pool: {e}")
+        finally:
+            db.rollback()
+            db.close()
+
+    state.duration_seconds = time.perf_counter() - state.started_at
+    state.ready = True
+    logger.info(f"Warm-up finished in {state.duration_seconds:.2f}s: {state.steps}")
+    return state
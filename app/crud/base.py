@@ -1,10 +1,14 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, Iterable, List, Optional, Type, TypeVar, Union
 from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 
+from app.core.cache import Cache, get_cache
+from app.core.conditional import table_versions
+from app.core.config import settings
 from app.core.database import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -23,10 +27,63 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         * `schema`: A Pydantic model (schema) class
         """
         self.model = model
+        self._cache: Optional[Cache] = None
+
+    @property
+    def cache(self) -> Cache:
+        if self._cache is None:
+            self._cache = get_cache(
+                f"crud.{self.model.__tablename__}",
+                settings.cache_crud_ttl_seconds,
+                codec=(self._to_columns, self._from_columns),
+            )
+        return self._cache
+
+    def _to_columns(self, obj: ModelType) -> Dict[str, Any]:
+        # The shared cache tier stores column values, never ORM instances.
+        return {attr.key: getattr(obj, attr.key) for attr in inspect(self.model).column_attrs}
+
+    def _from_columns(self, columns: Dict[str, Any]) -> ModelType:
+        obj = self.model(**columns)
+        make_transient_to_detached(obj)
+        return obj
+
+    def invalidate(self, ids: Iterable[UUID] = ()) -> None:
+        """
+        Drop this worker's cached copies after a commit that changed `ids`.
+
+        The CRUD write methods call this themselves; code that commits its own
+        statements against the table calls it once the commit succeeded.
+        """
+        # This worker's conditional GET stamp is stale now; the trigger has
+        # already bumped `table_versions` in the committed transaction.
+        table_versions.invalidate(self.model.__tablename__)
+        if self._cache is not None:
+            for id in ids:
+                self._cache.invalidate((str(id), None))
+
+    def _after_commit(self, id: Optional[UUID] = None) -> None:
+        self.invalidate(() if id is None else (id,))
 
     def get(self, db: Session, id: UUID) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
 
+    def _get_detached(self, db: Session, id: UUID) -> Optional[ModelType]:
+        obj = self.get(db, id)
+        if obj is not None:
+            db.expunge(obj)
+        return obj
+
+    def get_cached(self, db: Session, id: UUID, version: Optional[int] = None) -> Optional[ModelType]:
+        """
+        `get` through the `crud.<table>` cache, for read-only use.
+
+        Returns a detached instance shared with other requests. Routes with
+        conditional GET pass the table `version` they stamp the response with,
+        so a cached row can never be older than its ETag.
+        """
+        return self.cache.get_or_load((str(id), version), lambda: self._get_detached(db, id))
+
     def get_multi(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
@@ -37,6 +94,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj = self.model(**obj_in_data)  # type: ignore
         db.add(db_obj)
         db.commit()
+        self._after_commit()
         db.refresh(db_obj)
         return db_obj
 
@@ -57,6 +115,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 setattr(db_obj, field, update_data[field])
         db.add(db_obj)
         db.commit()
+        self._after_commit(db_obj.id)
         db.refresh(db_obj)
         return db_obj
 
@@ -64,4 +123,5 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = db.query(self.model).get(id)
         db.delete(obj)
         db.commit()
+        self._after_commit(id)
         return obj
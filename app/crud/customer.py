@@ -1,7 +1,10 @@
-from typing import Optional, List
+from typing import Iterable, Optional, List
 from uuid import UUID
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.cache import Cache, get_cache
+from app.core.config import settings
 from app.crud.base import CRUDBase
 from app.models.customer import Customer, LoyaltyProgram
 from app.models.sale import Sale, Transaction
@@ -23,6 +26,7 @@ class CRUDCustomer(CRUDBase[Customer, CustomerCreate, CustomerUpdate]):
         if customer:
             customer.loyalty_points += points
             db.commit()
+            self._after_commit(customer_id)
             db.refresh(customer)
         return customer
     
@@ -90,8 +94,56 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
 
 
 class CRUDEmployee(CRUDBase[Employee, EmployeeCreate, EmployeeUpdate]):
+    _by_user: Optional[Cache] = None
+
+    @property
+    def by_user(self) -> Cache:
+        """user id -> employee id; the mapping practically never changes."""
+        if self._by_user is None:
+            self._by_user = get_cache("employees.by_user", settings.cache_crud_ttl_seconds)
+        return self._by_user
+
+    def invalidate(self, ids: Iterable[UUID] = ()) -> None:
+        super().invalidate(ids)
+        # Keyed by user id, so a changed employee row drops the whole mapping.
+        self.by_user.clear()
+
     def get_by_user_id(self, db: Session, *, user_id: UUID) -> Optional[Employee]:
         return db.query(Employee).filter(Employee.user_id == user_id).first()
+
+    def get_id_by_user_id(self, db: Session, *, user_id: UUID) -> Optional[UUID]:
+        """Cached employee id of a user; None if the user has no employee yet."""
+        return self.by_user.get_or_load(
+            str(user_id),
+            lambda: db.query(Employee.id).filter(Employee.user_id == user_id).scalar(),
+        )
+
+    def provision(self, db: Session, *, user_id: UUID, commit: bool = True) -> UUID:
+        """
+        Return the employee id of a user, creating a cashier employee if needed.
+
+        Runs at login so sales find the mapping in the token or the cache. With
+        `commit=False` the new employee is only flushed into the caller's
+        transaction and not cached until it is read back after commit.
+        """
+        employee_id = self.get_id_by_user_id(db, user_id=user_id)
+        if employee_id is not None:
+            return employee_id
+        employee = Employee(user_id=user_id, name="Auto-generated Employee", position="Cashier")
+        db.add(employee)
+        if not commit:
+            db.flush()
+            return employee.id
+        try:
+            db.flush()
+            employee_id = employee.id
+            db.commit()
+        except IntegrityError:
+            # Another login of the same user provisioned it first.
+            db.rollback()
+            return db.query(Employee.id).filter(Employee.user_id == user_id).scalar()
+        self._after_commit(employee_id)
+        return employee_id
     
     def get_by_position(self, db: Session, *, position: str) -> List[Employee]:
         return db.query(Employee).filter(Employee.position == position).all()
@@ -16,6 +16,7 @@ class CRUDSettings(CRUDBase[Settings, SettingsCreate, SettingsUpdate]):
         if setting:
             setting.value = value
             db.commit()
+            self._after_commit(setting.id)
             db.refresh(setting)
         else:
             setting = self.create(db, obj_in=SettingsCreate(key=key, value=value))
@@ -1,51 +1,100 @@
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime, timedelta
 from uuid import UUID
 import logging
+import math
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, case, update
 
+from app.core.cache import cached
+from app.core.config import settings
+from app.core.exceptions import BusinessLogicException, NotFoundException, ValidationException
+from app.core.invalidation import invalidation_bus
 from app.crud.base import CRUDBase
+from app.crud.customer import customer as customer_crud, employee as employee_crud
+from app.crud.product import inventory as inventory_crud
+from app.models.customer import Customer
 from app.models.pos import POSSale, POSSaleItem, POSPayment, POSDiscount
-from app.models.employee import Employee
+from app.models.product import Inventory, Product
 from app.schemas.pos import (
     SaleCreate, SaleUpdate, SaleItemCreate, SaleItemUpdate,
-    PaymentCreate, PaymentUpdate
+    PaymentCreate, PaymentUpdate, CheckoutCreate, PaymentMethodEnum
 )
 from app.schemas.misc import DiscountCreate, DiscountUpdate
+from app.utils.carts import Cart, to_cents
 
 logger = logging.getLogger(__name__)
 
+# Payment methods are stored both as API values ("card") and model values ("CreditCard").
+PAYMENT_METHOD_FAMILIES = {
+    "cash": "cash",
+    "card": "card",
+    "creditcard": "card",
+    "debitcard": "card",
+    "digital": "digital",
+    "digitalwallet": "digital",
+}
+
+
+class PriceChanged(BusinessLogicException):
+    """The lane priced items at something other than the current price."""
+
+    def __init__(self, prices: Dict[str, float]):
+        super().__init__("Prices have changed since the items were scanned")
+        self.prices = prices
+
+
+def loyalty_points(total_amount: float, points_per_unit: float) -> int:
+    """Points a sale of `total_amount` earns, rounded down."""
+    return max(0, math.floor(total_amount * points_per_unit + 1e-9))
+
+
+def settle_tenders(checkout_in: CheckoutCreate, total_cents: int) -> Tuple[List[int], int]:
+    """
+    Amounts in cents to record per tender, and the change due.
+
+    Tenders must cover the total. Only cash can exceed it: the change comes
+    off the cash tenders, so recorded payments always sum to the sale total.
+    """
+    amounts = [to_cents(payment.amount) for payment in checkout_in.payments]
+    change_cents = sum(amounts) - total_cents
+    if change_cents < 0:
+        raise ValidationException(f"Payments are {-change_cents / 100:.2f} short of the total")
+    remaining = change_cents
+    for i in reversed(range(len(amounts))):
+        if remaining and checkout_in.payments[i].payment_method == PaymentMethodEnum.CASH:
+            taken = min(remaining, amounts[i])
+            amounts[i] -= taken
+            remaining -= taken
+    if remaining:
+        raise ValidationException("Only cash tenders can exceed the total")
+    return amounts, change_cents
+
 
 class CRUDPOSSale(CRUDBase[POSSale, SaleCreate, SaleUpdate]):
-    def create_with_user(self, db: Session, *, obj_in: SaleCreate, user_id: UUID) -> POSSale:
-        """Create sale with items."""
+    def create_with_user(
+        self, db: Session, *, obj_in: SaleCreate, user_id: UUID, employee_id: Optional[UUID] = None
+    ) -> POSSale:
+        """
+        Create sale with items.
+
+        `employee_id` is the employee of `user_id` when the caller already knows
+        it (the access token carries it); it is used when `user_id` is the cashier.
+        """
         try:
             # Extract items from the sale data
             items_data = obj_in.items
             logger.info(f"Creating sale with cashier_id: {obj_in.cashier_id}")
-            
-            # Find or create employee for the cashier
-            employee = db.query(Employee).filter(Employee.user_id == obj_in.cashier_id).first()
-            if not employee:
-                logger.info(f"Employee not found for user_id: {obj_in.cashier_id}, creating new employee")
-                # Create employee if it doesn't exist
-                employee = Employee(
-                    user_id=obj_in.cashier_id,
-                    name="Auto-generated Employee",
-                    position="Cashier"
-                )
-                db.add(employee)
-                db.flush()  # Ensure employee ID is generated
-                db.refresh(employee)  # Refresh to get the ID
-                logger.info(f"Created employee with ID: {employee.id}")
-            else:
-                logger.info(f"Found existing employee with ID: {employee.id}")
-            
+
+            if employee_id is None or obj_in.cashier_id != user_id:
+                # Cached; users who never logged in are provisioned in this transaction.
+                employee_id = employee_crud.provision(db, user_id=obj_in.cashier_id, commit=False)
+
             # Create the sale with only the fields that POSSale model accepts
             db_sale = POSSale(
                 customer_id=obj_in.customer_id,
-                cashier_id=employee.id,  # Now this will have a valid UUID
+                cashier_id=employee_id,
                 total_amount=obj_in.total_amount,
                 discount_id=None  # Can be extended later if needed
             )
@@ -69,6 +118,169 @@ class CRUDPOSSale(CRUDBase[POSSale, SaleCreate, SaleUpdate]):
             logger.error(f"Error in create_with_user: {str(e)}")
             raise e
     
+    def create_from_cart(self, db: Session, *, cart: Cart, employee_id: UUID) -> POSSale:
+        """Persist a draft cart as a sale and its items in one transaction."""
+        db_sale = POSSale(
+            customer_id=UUID(cart.customer_id) if cart.customer_id else None,
+            cashier_id=employee_id,
+            total_amount=cart.total_cents / 100,
+            sale_items=[
+                POSSaleItem(
+                    product_id=UUID(line.product_id),
+                    quantity=line.quantity,
+                    unit_price=line.unit_price_cents / 100,
+                    subtotal=(line.gross_cents - line.discount_cents) / 100,
+                )
+                for line in cart.lines.values()
+            ],
+        )
+        db.add(db_sale)
+        db.commit()
+        db.refresh(db_sale)
+        return db_sale
+
+    def price_basket(self, db: Session, *, checkout_in: CheckoutCreate, tax_rate: float = 0.0) -> Cart:
+        """
+        Price a checkout's items at current prices, in one query.
+
+        Raises `NotFoundException` for unknown products and `PriceChanged` when
+        an item carries a `unit_price` that is no longer current.
+        """
+        product_ids = {item.product_id for item in checkout_in.items}
+        products = {
+            row.id: row
+            for row in db.query(Product.id, Product.name, Product.price).filter(Product.id.in_(product_ids))
+        }
+        missing = product_ids - products.keys()
+        if missing:
+            raise NotFoundException(f"Products not found: {', '.join(sorted(str(id) for id in missing))}")
+
+        changed = {
+            str(item.product_id): products[item.product_id].price
+            for item in checkout_in.items
+            if item.unit_price is not None and to_cents(item.unit_price) != to_cents(products[item.product_id].price)
+        }
+        if changed:
+            raise PriceChanged(changed)
+
+        cart = Cart(str(checkout_in.checkout_id), "", tax_rate=tax_rate)
+        try:
+            for item in checkout_in.items:
+                product = products[item.product_id]
+                cart.scan(str(product.id), product.name, product.price, item.quantity, item.discount_amount)
+        except ValueError as e:
+            raise ValidationException(str(e))
+        return cart
+
+    def checkout(
+        self,
+        db: Session,
+        *,
+        checkout_in: CheckoutCreate,
+        employee_id: UUID,
+        tax_rate: float = 0.0,
+        points_per_unit: float = 0.0,
+    ) -> Tuple[POSSale, bool]:
+        """
+        Record a complete checkout in one transaction.
+
+        Writes the sale (keyed by `checkout_in.checkout_id`), its items and
+        tenders, takes the sold quantities off inventory in a single UPDATE and
+        accrues the customer's loyalty points, stored on the sale as
+        `loyalty_points_earned`. Returns the sale and whether it was created; a
+        checkout id that was already recorded returns the existing sale
+        untouched, so lanes can retry safely.
+
+        Stock may go negative: the goods have left the store either way.
+        """
+        existing = self.get(db, id=checkout_in.checkout_id)
+        if existing is not None:
+            return existing, False
+
+        customer_id = checkout_in.customer_id
+        if customer_id is not None and customer_crud.get_cached(db, id=customer_id) is None:
+            raise NotFoundException("Customer not found")
+        cart = self.price_basket(db, checkout_in=checkout_in, tax_rate=tax_rate)
+        amounts, _ = settle_tenders(checkout_in, cart.total_cents)
+        points = loyalty_points(cart.total_cents / 100, points_per_unit) if customer_id is not None else 0
+
+        sale = POSSale(
+            id=checkout_in.checkout_id,
+            customer_id=customer_id,
+            cashier_id=employee_id,
+            total_amount=cart.total_cents / 100,
+            loyalty_points_earned=points,
+            sale_items=[
+                POSSaleItem(
+                    product_id=UUID(line.product_id),
+                    quantity=line.quantity,
+                    unit_price=line.unit_price_cents / 100,
+                    subtotal=(line.gross_cents - line.discount_cents) / 100,
+                )
+                for line in cart.lines.values()
+            ],
+            payments=[
+                POSPayment(payment_method=payment.payment_method.value, amount=cents / 100, transaction_id=payment.transaction_id)
+                for payment, cents in zip(checkout_in.payments, amounts)
+                if cents > 0
+            ],
+        )
+        db.add(sale)
+
+        sold = {UUID(line.product_id): line.quantity for line in cart.lines.values()}
+        inventory_ids = db.execute(
+            update(Inventory)
+            .where(Inventory.product_id.in_(sold))
+            .values(quantity=Inventory.quantity - case(sold, value=Inventory.product_id))
+            .returning(Inventory.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+
+        if points:
+            db.query(Customer).filter(Customer.id == customer_id).update(
+                {Customer.loyalty_points: Customer.loyalty_points + points}, synchronize_session=False
+            )
+            # Bulk statements bypass the flush hook; tell the other workers explicitly.
+            invalidation_bus.mark_changed(db, Customer.__tablename__, [customer_id])
+
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent retry of the same checkout committed first.
+            db.rollback()
+            existing = self.get(db, id=checkout_in.checkout_id)
+            if existing is None:
+                raise
+            return existing, False
+
+        inventory_crud.invalidate(inventory_ids)
+        if points:
+            customer_crud.invalidate([customer_id])
+        db.refresh(sale)
+        return sale, True
+
+    def add_item(self, db: Session, *, sale_id: UUID, item_in: SaleItemCreate) -> POSSaleItem:
+        """
+        Add an item and raise the sale total in one transaction.
+
+        The total is incremented in SQL, so concurrent additions to the same
+        sale cannot overwrite each other's updates.
+        """
+        db_item = POSSaleItem(
+            sale_id=sale_id,
+            product_id=item_in.product_id,
+            quantity=item_in.quantity,
+            unit_price=item_in.unit_price,
+            subtotal=item_in.subtotal
+        )
+        db.add(db_item)
+        db.query(POSSale).filter(POSSale.id == sale_id).update(
+            {POSSale.total_amount: POSSale.total_amount + item_in.subtotal}, synchronize_session=False
+        )
+        db.commit()
+        db.refresh(db_item)
+        return db_item
+
     def get_by_customer(self, db: Session, *, customer_id: UUID) -> List[POSSale]:
         return db.query(POSSale).filter(POSSale.customer_id == customer_id).all()
     
@@ -89,6 +301,18 @@ class CRUDPOSSale(CRUDBase[POSSale, SaleCreate, SaleUpdate]):
             )
         ).all()
     
+    def get_revenue(self, db: Session, *, start_date: datetime, end_date: datetime) -> Tuple[float, int]:
+        """Total revenue and number of sales in `[start_date, end_date)`, the range the sales cube answers."""
+        total, count = db.query(
+            func.coalesce(func.sum(POSSale.total_amount), 0), func.count(POSSale.id)
+        ).filter(
+            and_(
+                POSSale.created_at >= start_date,
+                POSSale.created_at < end_date
+            )
+        ).one()
+        return float(total), count
+    
     def get_daily_sales(self, db: Session, *, date: datetime) -> List[POSSale]:
         start_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
         end_date = start_date + timedelta(days=1)
@@ -97,8 +321,53 @@ class CRUDPOSSale(CRUDBase[POSSale, SaleCreate, SaleUpdate]):
         )
     
     def calculate_daily_revenue(self, db: Session, *, date: datetime) -> float:
-        sales = self.get_daily_sales(db, date=date)
-        return sum(sale.total_amount for sale in sales)
+        start_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_date = start_date + timedelta(days=1)
+        total = db.query(func.coalesce(func.sum(POSSale.total_amount), 0)).filter(
+            and_(
+                POSSale.created_at >= start_date,
+                POSSale.created_at <= end_date
+            )
+        ).scalar()
+        return float(total)
+    
+    @cached("reports.daily", ttl_seconds=settings.cache_reports_ttl_seconds)
+    def get_daily_report(self, db: Session, *, date: datetime, top_n: int = 10) -> dict:
+        """
+        Build a daily sales report from aggregate queries only.
+        
+        Totals are derived from the hourly buckets, so the report costs three
+        queries (hourly, payment split, top products) however busy the day was.
+        All three read `pos_sales` directly: the sales cube cannot see payments,
+        and mixing its totals with SQL method counts could disagree.
+        """
+        start_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_date = start_date + timedelta(days=1)
+        
+        hourly = self.get_hourly_breakdown(db, start_date=start_date, end_date=end_date)
+        top_products = self.get_top_selling_products(
+            db, start_date=start_date, end_date=end_date, limit=top_n
+        )
+        
+        total_transactions = sum(bucket['total_sales'] for bucket in hourly)
+        total_revenue = sum(bucket['total_revenue'] for bucket in hourly)
+        method_counts = pos_payment.count_sales_by_method(
+            db, start_date=start_date, end_date=end_date
+        )
+        
+        return {
+            'date': start_date.date().isoformat(),
+            'transaction_summary': {
+                'total_transactions': total_transactions,
+                'total_revenue': total_revenue,
+                'average_transaction_value': total_revenue / total_transactions if total_transactions else 0.0,
+                'cash_transactions': method_counts.get('cash', 0),
+                'card_transactions': method_counts.get('card', 0),
+                'digital_transactions': method_counts.get('digital', 0)
+            },
+            'top_selling_products': top_products,
+            'hourly_breakdown': hourly
+        }
     
     def get_top_selling_products(
         self,
@@ -108,6 +377,7 @@ class CRUDPOSSale(CRUDBase[POSSale, SaleCreate, SaleUpdate]):
         end_date: datetime,
         limit: int = 10
     ) -> List[dict]:
+        """Best sellers by quantity among sales in `[start_date, end_date)`."""
         result = db.query(
             POSSaleItem.product_id,
             func.sum(POSSaleItem.quantity).label('total_quantity'),
@@ -115,7 +385,7 @@ class CRUDPOSSale(CRUDBase[POSSale, SaleCreate, SaleUpdate]):
         ).join(POSSale).filter(
             and_(
                 POSSale.created_at >= start_date,
-                POSSale.created_at <= end_date
+                POSSale.created_at < end_date
             )
         ).group_by(POSSaleItem.product_id).order_by(
             func.sum(POSSaleItem.quantity).desc()
@@ -130,6 +400,40 @@ class CRUDPOSSale(CRUDBase[POSSale, SaleCreate, SaleUpdate]):
             for row in result
         ]
 
+    def get_hourly_breakdown(
+        self,
+        db: Session,
+        *,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[dict]:
+        """Sales count and revenue per hour in `[start_date, end_date)`, including empty hours."""
+        hour = func.date_trunc('hour', POSSale.created_at).label('hour')
+        result = db.query(
+            hour,
+            func.count(POSSale.id).label('total_sales'),
+            func.coalesce(func.sum(POSSale.total_amount), 0).label('total_revenue')
+        ).filter(
+            and_(
+                POSSale.created_at >= start_date,
+                POSSale.created_at < end_date
+            )
+        ).group_by(hour).all()
+        by_hour = {row.hour: row for row in result}
+
+        start_hour = start_date.replace(minute=0, second=0, microsecond=0)
+        n_hours = int((end_date - start_hour).total_seconds() // 3600)
+        breakdown = []
+        for offset in range(n_hours):
+            bucket = start_hour + timedelta(hours=offset)
+            row = by_hour.get(bucket)
+            breakdown.append({
+                'hour': bucket.isoformat(),
+                'total_sales': row.total_sales if row else 0,
+                'total_revenue': float(row.total_revenue) if row else 0.0
+            })
+        return breakdown
+
 
 class CRUDPOSSaleItem(CRUDBase[POSSaleItem, SaleItemCreate, SaleItemUpdate]):
     def get_by_sale(self, db: Session, *, sale_id: UUID) -> List[POSSaleItem]:
@@ -165,6 +469,30 @@ class CRUDPOSPayment(CRUDBase[POSPayment, PaymentCreate, PaymentUpdate]):
                 POSPayment.created_at <= end_date
             )
         ).all()
+    
+    def count_sales_by_method(
+        self,
+        db: Session,
+        *,
+        start_date: datetime,
+        end_date: datetime
+    ) -> dict:
+        """Count distinct sales in `[start_date, end_date)` per payment method family."""
+        result = db.query(
+            POSPayment.payment_method,
+            func.count(func.distinct(POSPayment.sale_id)).label('sales')
+        ).join(POSSale, POSPayment.sale_id == POSSale.id).filter(
+            and_(
+                POSSale.created_at >= start_date,
+                POSSale.created_at < end_date
+            )
+        ).group_by(POSPayment.payment_method).all()
+        
+        counts = {}
+        for row in result:
+            family = PAYMENT_METHOD_FAMILIES.get(row.payment_method.lower(), row.payment_method.lower())
+            counts[family] = counts.get(family, 0) + row.sales
+        return counts
 
 
 class CRUDPOSDiscount(CRUDBase[POSDiscount, DiscountCreate, DiscountUpdate]):
@@ -1,7 +1,8 @@
-from typing import Optional
+from typing import Iterable, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
 
+from app.core.permissions import role_permissions
 from app.crud.base import CRUDBase
 from app.models.user import User, Role
 from app.schemas.user import UserCreate, UserUpdate, RoleCreate, RoleUpdate
@@ -40,6 +41,10 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
 
 
 class CRUDRole(CRUDBase[Role, RoleCreate, RoleUpdate]):
+    def invalidate(self, ids: Iterable[UUID] = ()) -> None:
+        super().invalidate(ids)
+        role_permissions.invalidate()
+
     def get_by_name(self, db: Session, *, name: str) -> Optional[Role]:
         return db.query(Role).filter(Role.name == name).first()
 
@@ -2,54 +2,142 @@ from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBearer
+from fastapi.responses import PlainTextResponse, JSONResponse, ORJSONResponse
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import text
+import asyncio
 import logging
 
 from app.core.config import settings
-from app.core.database import engine, Base, get_db
+from app.core.database import engine, engines, replica_set, async_engine, SessionLocal, session_factories, CHECKOUT, REPORTING
+from app.core.instrumentation import SQLInstrumentationMiddleware, instrument_engine, route_sql_table
+from app.core.metrics import MetricsMiddleware, metrics, threadpool_stats
+from app.core.cache import caches
+from app.core.invalidation import invalidation_bus
+from app.core.permissions import role_permissions
+from app.core.revocation import revocation_list
+from app.core.idempotency import IdempotencyMiddleware, IdempotencyStore
+from app.core.compression import CompressedCache, CompressionMiddleware, Compressor
+from app.core.admission import AdmissionMiddleware, saturation
+from app.core.bootstrap import seed_default_roles
+from app.core.warmup import run_warmup, warmup_state
+from app.core.replicas import ReplicaRoutingMiddleware
+from app.core.serialization import ContentNegotiationMiddleware
+from app.api.deps import get_current_admin_user
 from app.api.v1.router import api_router
-from app.crud.user import role as crud_role
-from app.crud import product as product_crud
-from app.schemas.user import RoleCreate
+from app.crud import customer as customer_crud, product as product_crud
 from app.schemas.product import ProductCreate
+from app.utils.sales_cube import sales_cube
+from app.utils.settings_store import settings_store
+from app.utils.sales_stream import sales_broadcaster
 
 # Configure logging
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
-# Initialize default roles
 def init_db():
-    """Initialize database with default roles."""
-    db = next(get_db())
+    """Seed default roles; the schema itself is created by `alembic upgrade head`."""
+    db = SessionLocal()
     try:
-        # Create default roles if they don't exist
-        if not crud_role.get_by_name(db, name="admin"):
-            admin_role = RoleCreate(name="admin", permissions=["*"])
-            crud_role.create(db, obj_in=admin_role)
-            logger.info("Created admin role")
-        
-        if not crud_role.get_by_name(db, name="user"):
-            user_role = RoleCreate(name="user", permissions=["read"])
-            crud_role.create(db, obj_in=user_role)
-            logger.info("Created user role")
-        
-        if not crud_role.get_by_name(db, name="cashier"):
-            cashier_role = RoleCreate(name="cashier", permissions=["read", "pos"])
-            crud_role.create(db, obj_in=cashier_role)
-            logger.info("Created cashier role")
-        
-        # Database initialization complete
+        seed_default_roles(db)
         logger.info("Database initialization completed successfully")
-            
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
     finally:
         db.close()
 
-# Initialize database with default data
-init_db()
+
+def load_sales_cube():
+    """Load the trailing sales window into this worker's analytics cube."""
+    if not settings.sales_cube_enabled:
+        return
+    db = session_factories[REPORTING]()
+    try:
+        sales_cube.load(db)
+    except Exception as e:
+        logger.error(f"Error loading sales cube: {e}")
+    finally:
+        db.close()
+
+
+def load_settings_store():
+    """Load the typed settings snapshot served to hot paths."""
+    db = SessionLocal()
+    try:
+        settings_store.load(db)
+    except Exception as e:
+        logger.error(f"Error loading settings: {e}")
+    finally:
+        db.close()
+
+
+def load_revocations():
+    """Load unexpired revoked token ids into this worker's deny-list."""
+    db = SessionLocal()
+    try:
+        revocation_list.sync(db)
+    except Exception as e:
+        logger.error(f"Error loading revoked tokens: {e}")
+    finally:
+        db.close()
+
+
+def load_sales_stream_totals():
+    """Seed today's running totals for the live sales feed."""
+    db = session_factories[REPORTING]()
+    try:
+        sales_broadcaster.load_totals(db)
+    except Exception as e:
+        logger.error(f"Error loading sales stream totals: {e}")
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Per-worker startup and shutdown.
+
+    Nothing touches the database at import time; seeding and cache loading
+    happen here, once the worker is actually starting to serve.
+    """
+    await run_in_threadpool(init_db)
+    await run_in_threadpool(load_settings_store)
+    await run_in_threadpool(load_revocations)
+    revocation_list.start(SessionLocal, settings.revocation_sync_interval_seconds)
+    await run_in_threadpool(load_sales_cube)
+    await run_in_threadpool(load_sales_stream_totals)
+    replica_set.start(settings.database_replica_health_interval_seconds)
+    if settings.sales_cube_enabled:
+        sales_cube.start(session_factories[REPORTING], settings.sales_cube_refresh_seconds)
+    if settings.invalidation_bus_enabled:
+        invalidation_bus.start(settings.invalidation_listen_url or settings.database_url)
+    # Warm up in the background so probes are answered meanwhile; readiness
+    # stays 503 until it completes.
+    warmup = asyncio.create_task(run_in_threadpool(
+        run_warmup, settings.warmup_pool_connections, settings.warmup_enabled,
+        settings.warmup_catalog_products,
+    ))
+    yield
+    warmup.cancel()
+    invalidation_bus.stop()
+    sales_cube.stop()
+    revocation_list.stop()
+    replica_set.stop()
+    for workload_engine in [*engines.values(), *(replica.engine for replica in replica_set.replicas)]:
+        workload_engine.dispose()
+    await async_engine.dispose()
+
+
+# Publish committed changes of cached tables to the other workers
+if settings.invalidation_bus_enabled:
+    invalidation_bus.install(session_factories.values())
+    invalidation_bus.subscribe("settings", lambda table, ids, version: settings_store.reload(SessionLocal))
+    invalidation_bus.subscribe("employees", lambda table, ids, version: customer_crud.employee.by_user.clear())
+    invalidation_bus.subscribe("roles", lambda table, ids, version: role_permissions.invalidate())
+    invalidation_bus.subscribe("revoked_tokens", revocation_list.on_change)
 
 # Create FastAPI application
 app = FastAPI(
@@ -75,6 +163,8 @@ app = FastAPI(
         "url": "https://opensource.org/license/mit",
     },
     terms_of_service="https://pandac.in/terms",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Set up CORS
@@ -90,6 +180,88 @@ if settings.backend_cors_origins:
 # Add trusted host middleware
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
 
+# Replay responses of checkout writes retried with the same Idempotency-Key
+idempotency_store = IdempotencyStore(
+    session_factories[CHECKOUT],
+    ttl_seconds=settings.idempotency_ttl_seconds,
+    lock_seconds=settings.idempotency_lock_seconds,
+    max_cached=settings.idempotency_cache_max,
+)
+if settings.idempotency_enabled:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=idempotency_store,
+        prefixes=[f"{settings.api_v1_str}/{name}" for name in ("sales", "payments", "carts", "checkout", "transactions")],
+        wait_seconds=settings.idempotency_wait_seconds,
+    )
+
+# MessagePack request bodies and responses (and the columnar list layout) for the API
+app.add_middleware(ContentNegotiationMiddleware, prefix=settings.api_v1_str)
+
+# gzip/brotli/zstd responses; large GET bodies are compressed once per encoding
+compressed_cache = CompressedCache(settings.compression_cache_max_bytes)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        compressor=Compressor(
+            gzip_level=settings.compression_gzip_level,
+            brotli_quality=settings.compression_brotli_quality,
+            zstd_level=settings.compression_zstd_level,
+        ),
+        cache=compressed_cache,
+        cache_min_size=settings.compression_cache_min_size,
+    )
+
+# Per-request SQL statement counts, Server-Timing headers and N+1 detection
+if settings.sql_instrumentation_enabled:
+    for workload_engine in [*engines.values(), *(replica.engine for replica in replica_set.replicas)]:
+        instrument_engine(workload_engine)
+    instrument_engine(async_engine.sync_engine)
+    app.add_middleware(
+        SQLInstrumentationMiddleware,
+        n_plus_one_threshold=settings.sql_n_plus_one_threshold,
+    )
+
+# Prometheus metrics: per-route latency, in-flight requests, pools, threadpool, caches
+if settings.metrics_enabled:
+    for name, workload_engine in engines.items():
+        metrics.register_engine(name, workload_engine)
+    for replica in replica_set.replicas:
+        metrics.register_engine(replica.name, replica.engine)
+    metrics.register_engine("async", async_engine.sync_engine)
+    metrics.register_cache("sales_cube", lambda: (sales_cube.hits, sales_cube.misses))
+    metrics.register_cache("role_permissions", lambda: (role_permissions.hits, role_permissions.misses))
+    metrics.register_cache("compressed_responses", lambda: (compressed_cache.hits, compressed_cache.misses))
+    metrics.register_cache("idempotent_responses", lambda: (idempotency_store.hits, idempotency_store.misses))
+    for namespace_cache in (product_crud.product.cache, customer_crud.customer.cache, customer_crud.employee.by_user, *caches.values()):
+        metrics.register_cache(
+            namespace_cache.namespace,
+            lambda c=namespace_cache: (c.stats.hits + c.stats.remote_hits, c.stats.misses),
+            evictions=lambda c=namespace_cache: c.stats.evictions,
+        )
+
+# Route GETs of read-heavy routers to replicas, pinning recent writers to the primary
+if replica_set:
+    app.add_middleware(
+        ReplicaRoutingMiddleware,
+        prefixes=[f"{settings.api_v1_str}/{name}" for name in ("products", "customers", "sales", "reports")],
+        sticky_seconds=settings.database_replica_sticky_seconds,
+    )
+
+# Shed non-critical routes with 503 + Retry-After when pools or threads saturate
+db_engines = [*engines.values(), *(replica.engine for replica in replica_set.replicas), async_engine.sync_engine]
+if settings.admission_control_enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        engines=db_engines,
+        retry_after=settings.admission_retry_after_seconds,
+    )
+
+# Added last so it wraps admission control: shed 503s are counted (as route "unmatched")
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.api_v1_str)
 
@@ -111,6 +283,67 @@ async def health_check():
     return {"status": "healthy", "version": settings.app_version}
 
 
+def ping_database():
+    """Round-trip a trivial statement through the sync pool."""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness probe reporting pool and threadpool saturation.
+    
+    Returns 503 while warming up, while saturated or when the database is
+    unreachable so the load balancer drains this instance.
+    """
+    state = saturation(db_engines)
+    database = "skipped"
+    if not warmup_state.ready:
+        database = "warming_up"
+    elif not state["saturated"]:
+        try:
+            await asyncio.wait_for(run_in_threadpool(ping_database), timeout=2)
+            database = "ok"
+        except Exception as e:
+            logger.warning(f"Readiness database check failed: {e}")
+            database = "unavailable"
+    ready = database == "ok"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "database": database,
+            "warmup": warmup_state.to_dict(),
+            "replicas": replica_set.stats(),
+            "invalidation": invalidation_bus.stats(),
+            **state,
+        },
+        headers={} if ready else {"Retry-After": str(settings.admission_retry_after_seconds)},
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition for this worker."""
+    return PlainTextResponse(
+        metrics.render(threadpool=threadpool_stats()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@app.get("/debug/sql")
+def sql_stats(current_user=Depends(get_current_admin_user)):
+    """Rolling per-route SQL statement counts, DB time and suspected N+1 patterns."""
+    return route_sql_table.snapshot()
+
+
+@app.get("/debug/cache")
+def cache_stats(current_user=Depends(get_current_admin_user)):
+    """Per-namespace size, hits, misses, evictions and refreshes of the read-through caches."""
+    return {namespace: namespace_cache.info() for namespace, namespace_cache in list(caches.items())}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, ForeignKey, Enum, JSON, Text, DateTime
+from sqlalchemy import Column, String, Float, ForeignKey, Enum, JSON, Text, DateTime, Integer, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -57,3 +57,16 @@ class Notification(BaseModel):
     type = Column(String(50), nullable=False)
     message = Column(String(500), nullable=False)
     timestamp = Column(DateTime, nullable=False)
+
+
+class IdempotencyKey(BaseModel):
+    """Response to a write request, replayed when it is retried with the same `Idempotency-Key`."""
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(300), nullable=False, unique=True)  # "<user id>:<Idempotency-Key>"
+    fingerprint = Column(String(64), nullable=False)  # SHA-256 of method, path, query and body
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is running
+    headers = Column(JSON, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    locked_until = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -14,6 +14,7 @@ class POSSale(BaseModel):
     cashier_id = Column(UUID(as_uuid=True), ForeignKey("employees.id"), nullable=False)
     total_amount = Column(Float, nullable=False)
     discount_id = Column(UUID(as_uuid=True), ForeignKey("discounts.id"), nullable=True)
+    loyalty_points_earned = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationships (use string references to avoid circular imports)
     customer = relationship("Customer", back_populates="pos_sales")
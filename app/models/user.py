@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, String, ForeignKey, JSON, Boolean, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -28,3 +28,14 @@ class Role(BaseModel):
     
     # Relationships
     users = relationship("User", back_populates="role")
+
+
+class RevokedToken(BaseModel):
+    """Revoked JWT, by `jti`; rows are deleted once the token has expired anyway."""
+    __tablename__ = "revoked_tokens"
+    # Workers sync new revocations by creation time.
+    __table_args__ = (Index("ix_revoked_tokens_created_at", "created_at"),)
+
+    jti = Column(String(32), unique=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
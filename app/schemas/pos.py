@@ -98,6 +98,43 @@ class Sale(SaleBase):
     updated_at: datetime
 
 
+# Draft Cart Schemas
+class CartCreate(BaseSchema):
+    customer_id: Optional[UUID] = None
+
+
+class CartItemAdd(BaseSchema):
+    product_id: UUID
+    quantity: int = Field(1, gt=0)
+    discount_amount: float = Field(0, ge=0)
+
+
+class CartItemUpdate(BaseSchema):
+    quantity: int = Field(..., ge=0)
+    discount_amount: float = Field(0, ge=0)
+
+
+# Checkout Schemas
+class CheckoutItem(BaseSchema):
+    product_id: UUID
+    quantity: int = Field(..., gt=0)
+    unit_price: Optional[float] = Field(None, gt=0, description="Price shown at the lane; rejected if it is no longer current")
+    discount_amount: float = Field(0, ge=0)
+
+
+class CheckoutPayment(BaseSchema):
+    payment_method: PaymentMethodEnum
+    amount: float = Field(..., gt=0)
+    transaction_id: Optional[str] = Field(None, max_length=100)
+
+
+class CheckoutCreate(BaseSchema):
+    checkout_id: UUID = Field(..., description="Generated by the lane; retries with the same id return the first result")
+    customer_id: Optional[UUID] = None
+    items: List[CheckoutItem] = Field(..., min_items=1)
+    payments: List[CheckoutPayment] = Field(..., min_items=1)
+
+
 # Payment Schemas
 class PaymentBase(BaseSchema):
     sale_id: UUID
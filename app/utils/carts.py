@@ -0,0 +1,275 @@
+"""
+Draft carts: open baskets kept out of the database until checkout.
+
+A lane scans items into a cart held in this worker's memory or, with
+`CARTS_REDIS_ENABLED`, in Redis so any worker can continue it. A cart keeps
+its subtotal and discount total in integer cents and adjusts them by the
+difference each scan makes, so a scan costs the same however long the basket
+is; tax is derived from the running totals at the `tax_rate` in effect when
+the cart was opened. Nothing reaches `pos_sales`/`pos_sale_items` until the
+cart is finalized, in a single transaction. In Redis a cart is stored as a
+MessagePack map with a fixed set of fields (`Cart.to_state`), never pickled.
+
+Carts expire `CARTS_TTL_SECONDS` after their last change. Edits are applied
+to a copy and stored only if they succeed, so a stored cart is never changed
+in place. They are serialized per cart on a lock within a worker; in Redis each edit is a
+compare-and-set against the bytes it was applied to and is retried on a
+fresh copy when another worker changed the cart first, so no update is lost.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, TypeVar
+from uuid import uuid4
+
+import msgpack
+
+from app.core.cache import CacheBackend, RedisBackend
+from app.core.config import settings
+from app.core.serialization import packb
+
+T = TypeVar("T")
+
+# Edits are serialized per cart on striped locks, so locks never need cleanup.
+_LOCK_STRIPES = 64
+# Compare-and-set rounds before a contended remote edit gives up.
+_CAS_ATTEMPTS = 5
+
+
+class CartConflict(Exception):
+    """The cart kept changing under a remote edit; the request may be retried."""
+
+
+def to_cents(amount: float) -> int:
+    return int(round(amount * 100))
+
+
+class CartLine(NamedTuple):
+    product_id: str
+    name: str
+    quantity: int
+    unit_price_cents: int
+    discount_cents: int
+
+    @property
+    def gross_cents(self) -> int:
+        return self.quantity * self.unit_price_cents
+
+    def to_dict(self) -> dict:
+        return {
+            "product_id": self.product_id,
+            "name": self.name,
+            "quantity": self.quantity,
+            "unit_price": self.unit_price_cents / 100,
+            "discount_amount": self.discount_cents / 100,
+            "subtotal": (self.gross_cents - self.discount_cents) / 100,
+        }
+
+
+class Cart:
+    """One open basket with running totals."""
+
+    def __init__(self, id: str, user_id: str, customer_id: Optional[str] = None, tax_rate: float = 0.0):
+        self.id = id
+        self.user_id = user_id
+        self.customer_id = customer_id
+        self.tax_rate = tax_rate
+        self.lines: Dict[str, CartLine] = {}
+        self.subtotal_cents = 0
+        self.discount_cents = 0
+        self.version = 0
+
+    def set_line(self, product_id: str, name: str, unit_price: float, quantity: int, discount_amount: float = 0.0) -> None:
+        """Set a line to `quantity` (0 removes it), adjusting the totals by the difference."""
+        line = CartLine(product_id, name, quantity, to_cents(unit_price), to_cents(discount_amount))
+        if line.discount_cents > line.gross_cents:
+            raise ValueError("Discount exceeds the line amount")
+        old = self.lines.pop(product_id, None)
+        if old is not None:
+            self.subtotal_cents -= old.gross_cents
+            self.discount_cents -= old.discount_cents
+        if quantity > 0:
+            self.lines[product_id] = line
+            self.subtotal_cents += line.gross_cents
+            self.discount_cents += line.discount_cents
+
+    def scan(self, product_id: str, name: str, unit_price: float, quantity: int = 1, discount_amount: float = 0.0) -> None:
+        """Add `quantity` of a product at its current price."""
+        old = self.lines.get(product_id)
+        if old is not None:
+            quantity += old.quantity
+            discount_amount += old.discount_cents / 100
+        self.set_line(product_id, name, unit_price, quantity, discount_amount)
+
+    @property
+    def tax_cents(self) -> int:
+        return int(round((self.subtotal_cents - self.discount_cents) * self.tax_rate))
+
+    @property
+    def total_cents(self) -> int:
+        return self.subtotal_cents - self.discount_cents + self.tax_cents
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "customer_id": self.customer_id,
+            "version": self.version,
+            "items": [line.to_dict() for line in self.lines.values()],
+            "subtotal": self.subtotal_cents / 100,
+            "discount_amount": self.discount_cents / 100,
+            "tax_rate": self.tax_rate,
+            "tax_amount": self.tax_cents / 100,
+            "total_amount": self.total_cents / 100,
+        }
+
+    def to_state(self) -> dict:
+        """Plain representation for the shared store; lines are `CartLine` field lists."""
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "customer_id": self.customer_id,
+            "tax_rate": self.tax_rate,
+            "version": self.version,
+            "subtotal_cents": self.subtotal_cents,
+            "discount_cents": self.discount_cents,
+            "lines": [list(line) for line in self.lines.values()],
+        }
+
+    def copy(self) -> "Cart":
+        return Cart.from_state(self.to_state())
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Cart":
+        cart = cls(state["id"], state["user_id"], state["customer_id"], state["tax_rate"])
+        cart.version = state["version"]
+        cart.subtotal_cents = state["subtotal_cents"]
+        cart.discount_cents = state["discount_cents"]
+        for fields in state["lines"]:
+            line = CartLine(*fields)
+            cart.lines[line.product_id] = line
+        return cart
+
+
+def _encode(cart: Cart) -> bytes:
+    return packb(cart.to_state())
+
+
+def _decode(raw: bytes) -> Cart:
+    return Cart.from_state(msgpack.unpackb(raw))
+
+
+class CartStore:
+    """Open carts by id: a worker-local LRU, or Redis when a remote backend is given."""
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_carts: int = 10_000,
+        remote: Optional[CacheBackend] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_carts = max_carts
+        self.remote = remote
+        self.clock = clock
+        self._carts: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    def _lock_for(self, cart_id: str) -> threading.Lock:
+        return self._stripes[hash(cart_id) % _LOCK_STRIPES]
+
+    def _load(self, cart_id: str) -> Optional[Cart]:
+        if self.remote is not None:
+            raw = self.remote.get(cart_id)
+            return _decode(raw) if raw is not None else None
+        with self._lock:
+            entry = self._carts.get(cart_id)
+            if entry is None:
+                return None
+            if entry[1] <= self.clock():
+                del self._carts[cart_id]
+                return None
+            self._carts.move_to_end(cart_id)
+            return entry[0]
+
+    def _save(self, cart: Cart) -> None:
+        if self.remote is not None:
+            self.remote.set(cart.id, _encode(cart), self.ttl_seconds)
+            return
+        with self._lock:
+            self._carts[cart.id] = (cart, self.clock() + self.ttl_seconds)
+            self._carts.move_to_end(cart.id)
+            while len(self._carts) > self.max_carts:
+                self._carts.popitem(last=False)
+
+    def create(self, user_id: str, customer_id: Optional[str] = None, tax_rate: float = 0.0) -> Cart:
+        cart = Cart(uuid4().hex, user_id, customer_id, tax_rate)
+        self._save(cart)
+        return cart
+
+    def get(self, cart_id: str) -> Optional[Cart]:
+        """Return a snapshot of the cart; treat it as read-only."""
+        return self._load(cart_id)
+
+    def update(self, cart_id: str, change: Callable[[Cart], T]) -> Optional[Cart]:
+        """Apply `change` to the cart under its lock and store it; None if it does not exist."""
+        if self.remote is not None:
+            return self._swap(cart_id, change, remove=False)
+        with self._lock_for(cart_id):
+            stored = self._load(cart_id)
+            if stored is None:
+                return None
+            # Stored carts are never mutated: readers may hold them outside the
+            # lock, and a `change` that raises must leave nothing behind.
+            cart = stored.copy()
+            change(cart)
+            cart.version += 1
+            self._save(cart)
+            return cart
+
+    def pop(self, cart_id: str) -> Optional[Cart]:
+        """Take a cart out of the store (to finalize it); `put` it back if that fails."""
+        if self.remote is not None:
+            return self._swap(cart_id, None, remove=True)
+        with self._lock_for(cart_id):
+            cart = self._load(cart_id)
+            if cart is not None:
+                self.discard(cart_id)
+            return cart
+
+    def _swap(self, cart_id: str, change: Optional[Callable[[Cart], T]], remove: bool) -> Optional[Cart]:
+        """Change or remove a remote cart with compare-and-set, retrying on a fresh copy if it raced."""
+        for _ in range(_CAS_ATTEMPTS):
+            raw = self.remote.get(cart_id)
+            if raw is None:
+                return None
+            cart = _decode(raw)
+            if change is not None:
+                change(cart)
+                cart.version += 1
+            if self.remote.compare_and_set(cart_id, raw, None if remove else _encode(cart), self.ttl_seconds):
+                return cart
+        raise CartConflict(cart_id)
+
+    def put(self, cart: Cart) -> None:
+        self._save(cart)
+
+    def discard(self, cart_id: str) -> None:
+        if self.remote is not None:
+            self.remote.delete(cart_id)
+            return
+        with self._lock:
+            self._carts.pop(cart_id, None)
+
+    def __len__(self) -> int:
+        return len(self._carts)
+
+
+def _default_remote() -> Optional[CacheBackend]:
+    if not settings.carts_redis_enabled:
+        return None
+    return RedisBackend(settings.redis_url, socket_timeout=settings.cache_redis_timeout_seconds, prefix="cart:")
+
+
+cart_store = CartStore(settings.carts_ttl_seconds, settings.carts_max, remote=_default_remote())
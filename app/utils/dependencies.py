@@ -4,6 +4,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.permissions import CompiledRole, permission_bits, role_permissions
 from app.core.security import verify_token
 from app.core.exceptions import HTTPUnauthorized
 from app.crud.user import get_user
@@ -42,12 +43,31 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_role(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> CompiledRole:
+    """
+    Dependency to get the compiled permissions of the current user's role.
+    """
+    role = role_permissions.get(db, current_user.role_id)
+    if role is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return role
+
+
 def require_role(required_role: str):
     """
     Factory function to create a dependency that requires a specific role.
     """
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
-        if current_user.role.name != required_role:
+    def role_checker(
+        current_user: User = Depends(get_current_user),
+        role: CompiledRole = Depends(get_current_role)
+    ) -> User:
+        if role.name != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions"
@@ -59,10 +79,17 @@ def require_role(required_role: str):
 def require_permissions(required_permissions: list):
     """
     Factory function to create a dependency that requires specific permissions.
+
+    The permissions are compiled to a bitmask once, here; each check is a
+    single AND against the role's cached mask ("*" grants everything).
     """
-    def permission_checker(current_user: User = Depends(get_current_user)) -> User:
-        user_permissions = current_user.role.permissions or []
-        if not all(perm in user_permissions for perm in required_permissions):
+    required_mask = permission_bits.mask(required_permissions)
+
+    def permission_checker(
+        current_user: User = Depends(get_current_user),
+        role: CompiledRole = Depends(get_current_role)
+    ) -> User:
+        if not role.allows(required_mask):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions"
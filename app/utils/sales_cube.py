@@ -0,0 +1,420 @@
+"""
+Worker-local columnar cube of recent sales.
+
+Keeps a trailing window of `pos_sales` / `pos_sale_items` as NumPy columns so
+dashboard group-bys (top products, revenue, hourly breakdown) are answered with
+`bincount`/`reduceat` instead of a SQL round trip.
+
+The database stays the source of truth. Every `SALES_CUBE_REFRESH_SECONDS` a
+worker reads a per-hour watermark of the window (`count(*)`,
+`max(updated_at)`) and reloads the hours whose watermark moved, which picks up
+sales recorded by other workers as well as edited and deleted ones. Writes on
+this worker mark their hour stale so it is reloaded on the next refresh. The
+cube only answers ranges of hours that were closed at the last refresh and
+are not stale; everything else, including the current hour, goes to SQL.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.pos import POSSale, POSSaleItem
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def hour_bucket(value: datetime) -> int:
+    """Return the number of whole hours between the epoch and `value`."""
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    return int((value - EPOCH).total_seconds() // 3600)
+
+
+def bucket_start(bucket: int) -> datetime:
+    """Return the datetime at which an hour bucket starts."""
+    return EPOCH + timedelta(hours=int(bucket))
+
+
+class _ColumnBlock:
+    """
+    Set of equally sized NumPy columns ordered by hour bucket.
+
+    Readers take a snapshot of `(columns, size)`; writers never mutate an array
+    they have handed out, they allocate a new one instead, so snapshots stay
+    consistent without holding the lock.
+    """
+
+    def __init__(self, dtypes: Dict[str, str], initial_capacity: int = 1024):
+        self.dtypes = dtypes
+        self.columns = {name: np.empty(initial_capacity, dtype=dtype) for name, dtype in dtypes.items()}
+        self.size = 0
+        self.sorted = True
+
+    @property
+    def capacity(self) -> int:
+        return len(self.columns["hour"])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.itemsize for column in self.columns.values()) * self.capacity
+
+    def drop_before(self, index: int) -> None:
+        """Drop the first `index` rows into freshly allocated arrays."""
+        if index <= 0:
+            return
+        keep = self.size - index
+        capacity = max(1024, keep * 2)
+        self.columns = {
+            name: self._copy_into(column[index:self.size], capacity)
+            for name, column in self.columns.items()
+        }
+        self.size = keep
+
+    def sort(self) -> None:
+        order = np.argsort(self.columns["hour"][:self.size], kind="stable")
+        self.columns = {
+            name: self._copy_into(column[:self.size][order], self.capacity)
+            for name, column in self.columns.items()
+        }
+        self.sorted = True
+
+    def replace_hours(self, hours: np.ndarray, rows: Dict[str, np.ndarray]) -> None:
+        """Swap every row of `hours` for `rows`, into freshly allocated arrays."""
+        keep = ~np.isin(self.columns["hour"][:self.size], hours)
+        merged = {
+            name: np.concatenate([column[:self.size][keep], rows[name].astype(column.dtype)])
+            for name, column in self.columns.items()
+        }
+        self.size = len(merged["hour"])
+        self.columns = {name: self._copy_into(values, max(1024, self.size * 2)) for name, values in merged.items()}
+        self.sorted = False
+
+    def snapshot(self) -> Tuple[Dict[str, np.ndarray], int]:
+        return self.columns, self.size
+
+    @staticmethod
+    def _copy_into(values: np.ndarray, capacity: int) -> np.ndarray:
+        out = np.empty(max(capacity, len(values)), dtype=values.dtype)
+        out[:len(values)] = values
+        return out
+
+
+# Per-hour watermark: (number of sales, latest updated_at).
+Watermark = Tuple[int, Optional[datetime]]
+
+
+class SalesCube:
+    """
+    In-memory columnar store of sales over a trailing window.
+
+    Sales and sale items are kept in two column blocks keyed by hour bucket.
+    Products and cashiers are dictionary-encoded into dense integer indexes so
+    group-bys are a single `np.bincount`. The cube answers at hour granularity
+    and only for hours known to be complete; callers should check `covers()`
+    and fall back to SQL otherwise.
+    """
+
+    def __init__(
+        self,
+        window_hours: int,
+        max_rows: int,
+        max_staleness_seconds: float = 180.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.window_hours = window_hours
+        self.max_rows = max_rows
+        self.max_staleness_seconds = max_staleness_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.reloaded_hours = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._sales = _ColumnBlock({"hour": "int32", "amount": "float64", "cashier": "int32"})
+        self._items = _ColumnBlock({"hour": "int32", "quantity": "int64", "subtotal": "float64", "product": "int32"})
+        self._product_index: Dict[UUID, int] = {}
+        self._products: List[UUID] = []
+        self._cashier_index: Dict[UUID, int] = {}
+        self._cashiers: List[UUID] = []
+        self._coverage_start: Optional[int] = None
+        # First hour that was still open at the last refresh.
+        self._complete_before: Optional[int] = None
+        self._refreshed_at = 0.0
+        self._watermarks: Dict[int, Watermark] = {}
+        self._stale: Set[int] = set()
+
+    @property
+    def loaded(self) -> bool:
+        return self._coverage_start is not None
+
+    def load(self, db: Session, now: Optional[datetime] = None) -> None:
+        """Load the trailing window from `pos_sales` and `pos_sale_items`."""
+        with self._lock:
+            self._reset()
+        self.refresh(db, now)
+        logger.info(
+            f"Sales cube loaded {self._sales.size} sales and {self._items.size} items "
+            f"({self.nbytes / 1024:.0f} KiB)"
+        )
+
+    def refresh(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Reload the hours whose watermark moved or that were marked stale; returns how many."""
+        refreshed_at = self.clock()
+        now_hour = hour_bucket(now or datetime.utcnow())
+        start_hour = now_hour - self.window_hours + 1
+        with self._lock:
+            if self._coverage_start is not None:
+                start_hour = max(start_hour, self._coverage_start)
+            # Hours marked from here on stay stale until the next refresh.
+            stale, self._stale = self._stale, set()
+
+        watermarks = self._read_watermarks(db, start_hour)
+        changed = {hour for hour, mark in watermarks.items() if self._watermarks.get(hour) != mark}
+        # Hours whose every sale was deleted drop out of the watermark query.
+        changed.update(hour for hour in self._watermarks if hour >= start_hour and hour not in watermarks)
+        changed.update(hour for hour in stale if hour >= start_hour)
+        sales, items = self._read_rows(db, changed) if changed else ([], [])
+
+        with self._lock:
+            if changed:
+                self._replace(changed, sales, items)
+            if self._coverage_start is None:
+                self._coverage_start = start_hour
+            self._enforce_limits(now_hour)
+            self._watermarks = {hour: mark for hour, mark in watermarks.items() if hour >= self._coverage_start}
+            self._complete_before = now_hour
+            self._refreshed_at = refreshed_at
+            self.refreshes += 1
+            self.reloaded_hours += len(changed)
+        return len(changed)
+
+    def mark_stale(self, created_at: datetime) -> None:
+        """Stop answering the hour of a sale written on this worker until the next refresh."""
+        if not self.loaded:
+            return
+        with self._lock:
+            self._stale.add(hour_bucket(created_at))
+
+    def start(self, session_factory: Callable[[], Session], interval_seconds: float) -> None:
+        """Refresh every `interval_seconds` on a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval_seconds):
+                db = session_factory()
+                try:
+                    self.refresh(db)
+                except Exception as e:
+                    logger.error(f"Error refreshing sales cube: {e}")
+                finally:
+                    db.close()
+
+        self._thread = threading.Thread(target=run, name="sales-cube", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def covers(self, start_date: datetime, end_date: datetime) -> bool:
+        """Whether `[start_date, end_date)` can be answered completely from the cube."""
+        covered = self.loaded and not any(
+            value.minute or value.second or value.microsecond for value in (start_date, end_date)
+        )
+        if covered:
+            start_hour, end_hour = hour_bucket(start_date), hour_bucket(end_date)
+            with self._lock:
+                covered = (
+                    start_hour >= self._coverage_start
+                    and end_hour <= self._complete_before
+                    and self.clock() - self._refreshed_at <= self.max_staleness_seconds
+                    and not any(start_hour <= hour < end_hour for hour in self._stale)
+                )
+        if covered:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return covered
+
+    def revenue(self, start_date: datetime, end_date: datetime) -> Tuple[float, int]:
+        """Return `(total_revenue, total_sales)` for the range."""
+        columns, lo, hi = self._range(self._sales, start_date, end_date)
+        return float(columns["amount"][lo:hi].sum()), hi - lo
+
+    def top_products(self, start_date: datetime, end_date: datetime, limit: int = 10) -> List[dict]:
+        """Return the best sellers by quantity, shaped like the SQL path."""
+        columns, lo, hi = self._range(self._items, start_date, end_date)
+        if hi <= lo:
+            return []
+        products = columns["product"][lo:hi]
+        minlength = int(products.max()) + 1
+        quantity = np.bincount(products, weights=columns["quantity"][lo:hi], minlength=minlength)
+        revenue = np.bincount(products, weights=columns["subtotal"][lo:hi], minlength=minlength)
+
+        sold = np.flatnonzero(quantity)
+        if len(sold) > limit:
+            sold = sold[np.argpartition(-quantity[sold], limit - 1)[:limit]]
+        sold = sold[np.argsort(-quantity[sold], kind="stable")]
+        return [
+            {
+                "product_id": self._products[index],
+                "total_quantity": int(quantity[index]),
+                "total_revenue": float(revenue[index]),
+            }
+            for index in sold
+        ]
+
+    def hourly_breakdown(self, start_date: datetime, end_date: datetime) -> List[dict]:
+        """Return per-hour sales count and revenue, including empty hours."""
+        start_hour = hour_bucket(start_date)
+        n_hours = max(hour_bucket(end_date) - start_hour, 0)
+        columns, lo, hi = self._range(self._sales, start_date, end_date)
+
+        hours = columns["hour"][lo:hi]
+        revenue = np.zeros(n_hours)
+        counts = np.zeros(n_hours, dtype=np.int64)
+        if hi > lo:
+            # Rows are sorted by hour, so each hour is one contiguous run.
+            boundaries = np.searchsorted(hours, start_hour + np.arange(n_hours))
+            present = boundaries < len(hours)
+            starts = boundaries[present]
+            sums = np.add.reduceat(columns["amount"][lo:hi], starts)
+            # reduceat yields the value at `start` for empty runs; zero those out.
+            ends = np.append(starts[1:], len(hours))
+            sums[starts == ends] = 0
+            tallies = ends - starts
+            revenue[present] = sums
+            counts[present] = tallies
+
+        return [
+            {
+                "hour": bucket_start(start_hour + offset).isoformat(),
+                "total_sales": int(counts[offset]),
+                "total_revenue": float(revenue[offset]),
+            }
+            for offset in range(n_hours)
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        return self._sales.nbytes + self._items.nbytes
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "sales": self._sales.size,
+            "items": self._items.size,
+            "products": len(self._products),
+            "cashiers": len(self._cashiers),
+            "nbytes": self.nbytes,
+            "coverage_start": bucket_start(self._coverage_start).isoformat() if self.loaded else None,
+            "complete_before": bucket_start(self._complete_before).isoformat() if self.loaded else None,
+            "stale_hours": len(self._stale),
+            "refreshed_seconds_ago": round(self.clock() - self._refreshed_at, 1) if self.loaded else None,
+            "refreshes": self.refreshes,
+            "reloaded_hours": self.reloaded_hours,
+        }
+
+    def _range(self, block: _ColumnBlock, start_date: datetime, end_date: datetime):
+        with self._lock:
+            if not block.sorted:
+                block.sort()
+            columns, size = block.snapshot()
+        hours = columns["hour"][:size]
+        lo = int(np.searchsorted(hours, hour_bucket(start_date), side="left"))
+        hi = int(np.searchsorted(hours, hour_bucket(end_date), side="left"))
+        return columns, lo, hi
+
+    def _read_watermarks(self, db: Session, start_hour: int) -> Dict[int, Watermark]:
+        hour = func.date_trunc("hour", POSSale.created_at)
+        rows = db.query(hour, func.count(POSSale.id), func.max(POSSale.updated_at)).filter(
+            POSSale.created_at >= bucket_start(start_hour)
+        ).group_by(hour).all()
+        return {hour_bucket(started): (count, updated_at) for started, count, updated_at in rows}
+
+    def _read_rows(self, db: Session, hours: Set[int]) -> Tuple[List[tuple], List[tuple]]:
+        """Return the `(hour, amount, cashier_id)` sales and `(hour, quantity, subtotal, product_id)` items of `hours`."""
+        start, end = bucket_start(min(hours)), bucket_start(max(hours) + 1)
+        sales = db.query(POSSale.created_at, POSSale.total_amount, POSSale.cashier_id).filter(
+            POSSale.created_at >= start, POSSale.created_at < end
+        ).all()
+        items = db.query(
+            POSSale.created_at, POSSaleItem.quantity, POSSaleItem.subtotal, POSSaleItem.product_id
+        ).join(POSSale, POSSaleItem.sale_id == POSSale.id).filter(
+            POSSale.created_at >= start, POSSale.created_at < end
+        ).all()
+        sales = [(hour_bucket(created_at), *rest) for created_at, *rest in sales]
+        items = [(hour_bucket(created_at), *rest) for created_at, *rest in items]
+        return [row for row in sales if row[0] in hours], [row for row in items if row[0] in hours]
+
+    def _replace(self, hours: Iterable[int], sales: List[tuple], items: List[tuple]) -> None:
+        """Swap the rows of `hours` in both blocks for freshly read ones."""
+        hours = np.fromiter(hours, dtype=np.int32)
+        self._sales.replace_hours(hours, {
+            "hour": np.array([row[0] for row in sales], dtype=np.int64),
+            "amount": np.array([row[1] for row in sales], dtype=np.float64),
+            "cashier": np.array(
+                [self._encode(row[2], self._cashier_index, self._cashiers) for row in sales], dtype=np.int64
+            ),
+        })
+        self._items.replace_hours(hours, {
+            "hour": np.array([row[0] for row in items], dtype=np.int64),
+            "quantity": np.array([row[1] for row in items], dtype=np.int64),
+            "subtotal": np.array([row[2] for row in items], dtype=np.float64),
+            "product": np.array(
+                [self._encode(row[3], self._product_index, self._products) for row in items], dtype=np.int64
+            ),
+        })
+
+    @staticmethod
+    def _encode(key: UUID, index: Dict[UUID, int], values: List[UUID]) -> int:
+        position = index.get(key)
+        if position is None:
+            position = index[key] = len(values)
+            values.append(key)
+        return position
+
+    def _enforce_limits(self, now_hour: int) -> None:
+        """Evict rows outside the window, then the oldest rows above `max_rows`."""
+        window_start = now_hour - self.window_hours + 1
+        for block in (self._sales, self._items):
+            if not block.sorted:
+                block.sort()
+            columns, size = block.snapshot()
+            hours = columns["hour"][:size]
+            cutoff = int(np.searchsorted(hours, window_start, side="left"))
+            overflow = size - cutoff - self.max_rows
+            if overflow > 0:
+                # Drop whole hours so the remaining buckets stay complete.
+                last_dropped = int(hours[cutoff + overflow - 1])
+                cutoff = int(np.searchsorted(hours, last_dropped, side="right"))
+                window_start = max(window_start, last_dropped + 1)
+            if cutoff:
+                block.drop_before(cutoff)
+        if self._coverage_start is not None:
+            self._coverage_start = max(self._coverage_start, window_start)
+
+
+sales_cube = SalesCube(
+    window_hours=settings.sales_cube_window_hours,
+    max_rows=settings.sales_cube_max_rows,
+    max_staleness_seconds=3 * settings.sales_cube_refresh_seconds,
+)
@@ -0,0 +1,169 @@
+"""
+In-process pub/sub for the live sales feed.
+
+One broadcaster per worker fans committed sales out to Server-Sent Events
+subscribers. Each subscriber owns a bounded drop-oldest buffer, so a slow
+dashboard loses old events instead of stalling checkout or growing memory, and
+database load does not depend on how many dashboards are connected.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Set
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.pos import POSSale
+
+logger = logging.getLogger(__name__)
+
+
+class SalesStreamFull(Exception):
+    """Raised when the worker already serves `sales_stream_max_subscribers` streams."""
+    pass
+
+
+class Subscriber:
+    """Bounded event buffer for one connected client."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.loop = loop
+        self.events: Deque[str] = deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, event: str) -> None:
+        """Append an event from any thread, evicting the oldest when full."""
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append(event)
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+
+class RunningTotals:
+    """Today's sale count and revenue, overall and per cashier lane."""
+
+    def __init__(self):
+        self._reset(datetime.utcnow().date())
+
+    def _reset(self, day) -> None:
+        self.day = day
+        self.total_sales = 0
+        self.total_revenue = 0.0
+        self.by_cashier: Dict[str, dict] = {}
+
+    def add(self, cashier_id: str, amount: float, count: int = 1) -> None:
+        today = datetime.utcnow().date()
+        if today != self.day:
+            self._reset(today)
+        self.total_sales += count
+        self.total_revenue += amount
+        lane = self.by_cashier.setdefault(cashier_id, {"total_sales": 0, "total_revenue": 0.0})
+        lane["total_sales"] += count
+        lane["total_revenue"] += amount
+
+    def to_dict(self) -> dict:
+        return {
+            "date": self.day.isoformat(),
+            "total_sales": self.total_sales,
+            "total_revenue": self.total_revenue,
+            "by_cashier": self.by_cashier,
+        }
+
+
+class SalesBroadcaster:
+    """Fans committed sales out to every subscriber on this worker."""
+
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.totals = RunningTotals()
+        self._subscribers: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def load_totals(self, db: Session) -> None:
+        """Seed today's running totals with one aggregate query."""
+        start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        rows = db.query(
+            POSSale.cashier_id,
+            func.count(POSSale.id),
+            func.coalesce(func.sum(POSSale.total_amount), 0)
+        ).filter(
+            POSSale.created_at >= start,
+            POSSale.created_at < start + timedelta(days=1)
+        ).group_by(POSSale.cashier_id).all()
+        with self._lock:
+            self.totals = RunningTotals()
+            for cashier_id, count, revenue in rows:
+                self.totals.add(str(cashier_id), float(revenue), count=count)
+
+    def subscribe(self) -> Subscriber:
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise SalesStreamFull()
+            subscriber = Subscriber(asyncio.get_running_loop(), self.queue_size)
+            self._subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def totals_event(self) -> str:
+        with self._lock:
+            return self._format("totals", self.totals.to_dict())
+
+    def publish(self, sale: dict) -> None:
+        """Publish a committed sale (as returned by the API) to all subscribers."""
+        with self._lock:
+            self.totals.add(sale["cashier_id"], sale["total_amount"])
+            # Serialize once and share the bytes across subscribers.
+            event = self._format("sale", {"sale": sale, "totals": self.totals.to_dict()})
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.push(event)
+            except RuntimeError:
+                # The subscriber's event loop has closed.
+                self.unsubscribe(subscriber)
+
+    def _format(self, event: str, data: dict) -> str:
+        self._sequence += 1
+        return f"id: {self._sequence}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    async def stream(self, subscriber: Subscriber, is_disconnected, heartbeat_seconds: float):
+        """Yield SSE frames for `subscriber` until the client disconnects."""
+        try:
+            yield self.totals_event()
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), timeout=heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                subscriber.ready.clear()
+                if subscriber.dropped:
+                    dropped, subscriber.dropped = subscriber.dropped, 0
+                    yield f"event: dropped\ndata: {json.dumps({'dropped': dropped})}\n\n"
+                while subscriber.events:
+                    yield subscriber.events.popleft()
+        finally:
+            self.unsubscribe(subscriber)
+
+
+sales_broadcaster = SalesBroadcaster(
+    queue_size=settings.sales_stream_queue_size,
+    max_subscribers=settings.sales_stream_max_subscribers,
+)
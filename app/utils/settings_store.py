@@ -0,0 +1,135 @@
+"""
+Worker-local, typed view of the `settings` key/value table.
+
+The whole table is loaded into an immutable snapshot at startup and replaced
+atomically when it changes, so hot paths (tax, receipts, loyalty) read a
+typed value with a single dict lookup and never touch the database. Writes
+through `/v1/settings` reload this worker's snapshot right after commit; the
+invalidation bus reloads the other workers'. Subscribers are told which keys
+changed.
+
+Known keys are declared in `SETTING_SPECS` with a type and a default; values
+of unknown keys are kept as strings.
+"""
+import logging
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Set
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.models.misc import Settings
+
+logger = logging.getLogger(__name__)
+
+_VERSION_SQL = text("SELECT version FROM table_versions WHERE table_name = 'settings'")
+# Plain table rows: no ORM identity map or mapper configuration involved.
+_ROWS_SQL = select(Settings.__table__.c.key, Settings.__table__.c.value)
+
+
+class SettingSpec(NamedTuple):
+    type: type
+    default: Any
+    description: str
+
+
+SETTING_SPECS: Dict[str, SettingSpec] = {
+    "tax_rate": SettingSpec(float, 0.0, "Sales tax rate applied to sale totals, e.g. 0.08."),
+    "currency": SettingSpec(str, "USD", "ISO currency code printed on receipts."),
+    "receipt_header": SettingSpec(str, "", "Text printed at the top of receipts."),
+    "receipt_footer": SettingSpec(str, "", "Text printed at the bottom of receipts."),
+    "loyalty_points_per_unit": SettingSpec(float, 1.0, "Loyalty points earned per currency unit spent."),
+    "loyalty_enabled": SettingSpec(bool, True, "Whether sales earn loyalty points."),
+}
+
+
+def parse_value(key: str, raw: str) -> Any:
+    """Convert a stored string to the declared type of `key`; raises ValueError if it does not fit."""
+    spec = SETTING_SPECS.get(key)
+    if spec is None or spec.type is str:
+        return raw
+    if spec.type is bool:
+        lowered = raw.strip().lower()
+        if lowered in ("true", "1", "yes", "on"):
+            return True
+        if lowered in ("false", "0", "no", "off"):
+            return False
+        raise ValueError(f"{key} must be a boolean, got {raw!r}")
+    try:
+        return spec.type(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a {spec.type.__name__}, got {raw!r}")
+
+
+class SettingsSnapshot(NamedTuple):
+    version: int
+    values: Mapping[str, Any]
+
+
+# subscriber(snapshot, changed_keys)
+Subscriber = Callable[[SettingsSnapshot, Set[str]], None]
+
+
+def _defaults() -> Dict[str, Any]:
+    return {key: spec.default for key, spec in SETTING_SPECS.items()}
+
+
+class SettingsStore:
+    """Immutable snapshots of the settings table, swapped on reload."""
+
+    def __init__(self):
+        self.snapshot = SettingsSnapshot(0, MappingProxyType(_defaults()))
+        self.loaded = False
+        self._subscribers: List[Subscriber] = []
+        self._reload_lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.snapshot.values.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.snapshot.values[key]
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.append(subscriber)
+
+    def load(self, db: Session) -> SettingsSnapshot:
+        """Read the table into a new snapshot and notify subscribers of changed keys."""
+        with self._reload_lock:
+            version = db.execute(_VERSION_SQL).scalar() or 0
+            values = _defaults()
+            for key, raw in db.execute(_ROWS_SQL):
+                try:
+                    values[key] = parse_value(key, raw)
+                except ValueError as e:
+                    logger.error(f"Ignoring invalid setting {key}: {e}")
+            previous = self.snapshot.values
+            snapshot = self.snapshot = SettingsSnapshot(version, MappingProxyType(values))
+            self.loaded = True
+
+        changed = {key for key in previous.keys() | values.keys() if previous.get(key) != values.get(key)}
+        if changed:
+            for subscriber in self._subscribers:
+                try:
+                    subscriber(snapshot, changed)
+                except Exception as e:
+                    logger.error(f"Settings subscriber {subscriber!r} failed: {e}")
+        return snapshot
+
+    def reload(self, session_factory: Callable[[], Session]) -> Optional[SettingsSnapshot]:
+        """Load with a session of its own; used by background listeners."""
+        db = session_factory()
+        try:
+            return self.load(db)
+        except Exception as e:
+            logger.error(f"Error reloading settings: {e}")
+            return None
+        finally:
+            db.close()
+
+    def to_dict(self) -> dict:
+        snapshot = self.snapshot
+        return {"version": snapshot.version, "values": dict(snapshot.values)}
+
+
+settings_store = SettingsStore()
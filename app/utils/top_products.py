@@ -0,0 +1,213 @@
+"""
+Streaming heavy-hitters sketch for real-time best sellers.
+
+Implements the Space-Saving algorithm (Metwally et al.) over a ring of time
+buckets so "top N products in the last hour/day" is answered from memory in
+microseconds with bounded memory per window.
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+
+from app.core.config import settings
+
+
+class SpaceSaving:
+    """
+    Space-Saving summary holding at most `capacity` counters.
+
+    Each counter stores `[count, error, revenue]`. `count` never underestimates
+    the true quantity and overestimates it by at most `error`. `revenue` only
+    covers what was seen while the key held a counter, so it is a lower bound.
+
+    The minimum counter is found through a lazy min-heap: counts only grow, so
+    stale heap entries are re-pushed with their current count when popped.
+    """
+
+    __slots__ = ("capacity", "counters", "_heap", "_seq")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counters: Dict[Hashable, List[float]] = {}
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+
+    def offer(self, key: Hashable, weight: float = 1, revenue: float = 0.0) -> None:
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+            counter[2] += revenue
+            return
+        floor = 0
+        if len(self.counters) >= self.capacity:
+            floor = self._pop_min()
+        self.counters[key] = [floor + weight, floor, revenue]
+        heapq.heappush(self._heap, (floor + weight, next(self._seq), key))
+
+    def _pop_min(self) -> float:
+        heap, counters = self._heap, self.counters
+        while True:
+            count, _, key = heapq.heappop(heap)
+            current = counters[key][0]
+            if current == count:
+                del counters[key]
+                return count
+            heapq.heappush(heap, (current, next(self._seq), key))
+
+    def _rebuild(self) -> None:
+        self._heap = [(counter[0], next(self._seq), key) for key, counter in self.counters.items()]
+        heapq.heapify(self._heap)
+
+    @property
+    def min_count(self) -> float:
+        """Count any key missing from a full summary may have had."""
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(counter[0] for counter in self.counters.values())
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """Return a new summary covering both streams (Agarwal et al. merge)."""
+        merged = SpaceSaving(max(self.capacity, other.capacity))
+        floor_self, floor_other = self.min_count, other.min_count
+        combined = {}
+        for key in self.counters.keys() | other.counters.keys():
+            left = self.counters.get(key)
+            right = other.counters.get(key)
+            count = (left[0] if left else floor_self) + (right[0] if right else floor_other)
+            error = (left[1] if left else floor_self) + (right[1] if right else floor_other)
+            revenue = (left[2] if left else 0.0) + (right[2] if right else 0.0)
+            combined[key] = [count, error, revenue]
+        for key in heapq.nlargest(merged.capacity, combined, key=lambda k: combined[k][0]):
+            merged.counters[key] = combined[key]
+        merged._rebuild()
+        return merged
+
+    def copy(self) -> "SpaceSaving":
+        clone = SpaceSaving(self.capacity)
+        clone.counters = {key: list(counter) for key, counter in self.counters.items()}
+        clone._rebuild()
+        return clone
+
+    def top(self, n: int) -> List[dict]:
+        best = heapq.nlargest(n, self.counters.items(), key=lambda item: item[1][0])
+        return [
+            {
+                "product_id": key,
+                "total_quantity": count,
+                "total_revenue": revenue,
+                "max_error": error,
+            }
+            for key, (count, error, revenue) in best
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "counters": [[str(key), *counter] for key, counter in self.counters.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, parse_key: Callable[[str], Hashable] = str) -> "SpaceSaving":
+        summary = cls(data["capacity"])
+        summary.counters = {
+            parse_key(key): [count, error, revenue] for key, count, error, revenue in data["counters"]
+        }
+        summary._rebuild()
+        return summary
+
+
+class WindowedTopK:
+    """
+    Space-Saving summaries over a sliding window of `n_buckets` time buckets.
+
+    Closed buckets are merged once per rotation into `_window`, which then
+    absorbs live updates directly, so a query is a single `nlargest` over at
+    most `capacity` counters. Memory is bounded by `(n_buckets + 1) * capacity`.
+    """
+
+    def __init__(self, bucket_seconds: int, n_buckets: int, capacity: int):
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, SpaceSaving] = {}
+        self._window = SpaceSaving(capacity)
+        self._current: Optional[int] = None
+        self._started_at = time.time()
+
+    @property
+    def window_seconds(self) -> int:
+        return self.bucket_seconds * self.n_buckets
+
+    @property
+    def complete(self) -> bool:
+        """Whether this worker has observed sales for a full window."""
+        return time.time() - self._started_at >= self.window_seconds
+
+    def offer(self, key: Hashable, weight: float = 1, revenue: float = 0.0, at: Optional[float] = None) -> None:
+        bucket = int((time.time() if at is None else at) // self.bucket_seconds)
+        with self._lock:
+            self._rotate(bucket)
+            if bucket < self._current - self.n_buckets + 1:
+                return
+            summary = self._buckets.get(bucket)
+            if summary is None:
+                summary = self._buckets[bucket] = SpaceSaving(self.capacity)
+            summary.offer(key, weight, revenue)
+            self._window.offer(key, weight, revenue)
+
+    def top(self, n: int) -> List[dict]:
+        with self._lock:
+            self._rotate(int(time.time() // self.bucket_seconds))
+            return self._window.top(n)
+
+    def snapshot(self) -> SpaceSaving:
+        """Return a copy of the current window summary, e.g. for cross-worker merging."""
+        with self._lock:
+            self._rotate(int(time.time() // self.bucket_seconds))
+            return self._window.copy()
+
+    def _rotate(self, bucket: int) -> None:
+        if self._current is not None and bucket <= self._current:
+            return
+        self._current = bucket
+        oldest = bucket - self.n_buckets + 1
+        expired = [b for b in self._buckets if b < oldest]
+        if not expired:
+            return
+        for b in expired:
+            del self._buckets[b]
+        window = SpaceSaving(self.capacity)
+        for summary in self._buckets.values():
+            window = window.merge(summary)
+        self._window = window
+
+
+class TopProductsTracker:
+    """Best sellers by quantity over the last hour (per-minute buckets) and day (per-hour buckets)."""
+
+    def __init__(self, capacity: int):
+        self.windows = {
+            "hour": WindowedTopK(bucket_seconds=60, n_buckets=60, capacity=capacity),
+            "day": WindowedTopK(bucket_seconds=3600, n_buckets=24, capacity=capacity),
+        }
+
+    def record_item(self, product_id: Hashable, quantity: float, subtotal: float, at: Optional[float] = None) -> None:
+        for window in self.windows.values():
+            window.offer(product_id, quantity, subtotal, at=at)
+
+    def record_sale(self, sale) -> None:
+        """Record the items of a just-committed sale at the current time."""
+        for item in sale.sale_items:
+            self.record_item(item.product_id, item.quantity, item.subtotal)
+
+    def top(self, window: str, n: int = 10) -> List[dict]:
+        return self.windows[window].top(n)
+
+    def complete(self, window: str) -> bool:
+        return self.windows[window].complete
+
+
+top_products_tracker = TopProductsTracker(capacity=settings.top_products_sketch_capacity)
@@ -0,0 +1,80 @@
+"""
+Time a composite checkout against the same sale recorded call by call.
+
+Records a 5-item basket paid with two tenders for a loyalty customer, once
+through `pos_sale.checkout` (one transaction) and once the way a lane does it
+without `/v1/checkout`: create the sale, add each tender, decrement each
+item's stock and accrue points, each its own commit. Also times a replayed
+checkout id. Latencies exclude HTTP and authentication; the composite p95 is
+compared with `CHECKOUT_LATENCY_BUDGET_MS`.
+
+Usage: python -m benchmarks.bench_checkout
+"""
+from datetime import datetime
+from uuid import uuid4
+
+from app.core.config import settings
+from app.crud import customer as customer_crud, pos as pos_crud, product as product_crud
+from app.models.customer import Customer
+from app.models.employee import Employee
+from app.models.pos import POSPayment
+from app.models.product import Inventory, Product
+from app.schemas.pos import CheckoutCreate, SaleCreate
+from benchmarks.common import report, seeded_session, timeit
+
+ITEMS = 5
+
+
+def main() -> None:
+    with seeded_session(n_sales=1_000) as db:
+        employee_id, user_id = db.query(Employee.id, Employee.user_id).first()
+        products = db.query(Product).limit(ITEMS).all()
+        db.add_all([Inventory(product_id=product.id, quantity=1_000_000) for product in products])
+        customer = Customer(name="Bench Customer", contact_info="bench@example.com")
+        db.add(customer)
+        db.flush()
+
+        total = round(sum(product.price for product in products), 2)
+        card = round(total / 2, 2)
+
+        def checkout_in() -> CheckoutCreate:
+            return CheckoutCreate(
+                checkout_id=uuid4(),
+                customer_id=customer.id,
+                items=[{"product_id": product.id, "quantity": 1, "unit_price": product.price} for product in products],
+                payments=[{"payment_method": "card", "amount": card}, {"payment_method": "cash", "amount": total}],
+            )
+
+        def composite():
+            return pos_crud.pos_sale.checkout(db, checkout_in=checkout_in(), employee_id=employee_id, points_per_unit=1.0)
+
+        def call_by_call():
+            sale = pos_crud.pos_sale.create_with_user(db, obj_in=SaleCreate(
+                cashier_id=user_id, customer_id=customer.id, sale_date=datetime.utcnow(),
+                subtotal=total, tax_amount=0, total_amount=total,
+                items=[{"product_id": product.id, "quantity": 1, "unit_price": product.price, "subtotal": product.price}
+                       for product in products],
+            ), user_id=user_id, employee_id=employee_id)
+            for method, amount in (("card", card), ("cash", total - card)):
+                db.add(POSPayment(sale_id=sale.id, payment_method=method, amount=amount))
+                db.commit()
+            for product in products:
+                product_crud.inventory.update_stock(db, product_id=product.id, quantity_change=-1)
+            customer_crud.customer.add_loyalty_points(db, customer_id=customer.id, points=int(total))
+
+        replay_in = checkout_in()
+        pos_crud.pos_sale.checkout(db, checkout_in=replay_in, employee_id=employee_id)
+
+        result = timeit(composite)
+        report("checkout (1 transaction)", result)
+        report("call by call (9 commits)", timeit(call_by_call))
+        report("checkout replay", timeit(lambda: pos_crud.pos_sale.checkout(
+            db, checkout_in=replay_in, employee_id=employee_id)))
+
+        budget = settings.checkout_latency_budget_ms
+        verdict = "within" if result["p95_ms"] <= budget else "OVER"
+        print(f"checkout p95 {result['p95_ms']:.1f}ms is {verdict} the {budget:.0f}ms budget")
+
+
+if __name__ == "__main__":
+    main()
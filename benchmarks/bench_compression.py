@@ -0,0 +1,36 @@
+"""
+Compare compression of the product catalog per encoding, and the cache.
+
+Compresses a 1,000-product JSON catalog with gzip, brotli and zstd at the
+configured levels and reports the compressed size and compression time, then
+the cost of serving the same body from `CompressedCache` (a digest and a
+lookup). No database is needed.
+
+Usage: python -m benchmarks.bench_compression
+"""
+from app.api.v1.products import product_serializer
+from app.core.compression import BROTLI, GZIP, ZSTD, CompressedCache, Compressor
+from app.core.config import settings
+from benchmarks.bench_serialization import make_products
+from benchmarks.common import report, timeit
+
+
+def main() -> None:
+    body = product_serializer.response(make_products()).body
+    compressor = Compressor(
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        zstd_level=settings.compression_zstd_level,
+    )
+    cache = CompressedCache(max_bytes=settings.compression_cache_max_bytes)
+    print(f"catalog: {len(body)} bytes uncompressed")
+    for encoding in (GZIP, BROTLI, ZSTD):
+        compressed = compressor.compress(encoding, body)
+        print(f"{encoding:<32} {len(compressed):>8} bytes  {len(body) / len(compressed):5.1f}x smaller")
+        report(f"{encoding}: compress", timeit(lambda: compressor.compress(encoding, body)))
+        cache.put(CompressedCache.key(encoding, body), compressed)
+        report(f"{encoding}: cached", timeit(lambda: cache.get(CompressedCache.key(encoding, body))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Measure the per-request cost of MetricsMiddleware.
+
+Drives a trivial ASGI app directly (no sockets, no database) with and without
+the middleware and reports the difference per request. The budget is 20us.
+
+Usage: python -m benchmarks.bench_metrics_overhead
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.core.metrics import MetricsMiddleware, MetricsRegistry
+
+REQUESTS = 200_000
+BUDGET_US = 20.0
+ROUTES = [SimpleNamespace(path=f"/v1/route{i}/{{id}}") for i in range(20)]
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app) -> float:
+    scopes = [{"type": "http", "method": "GET", "route": route} for route in ROUTES]
+    started = time.perf_counter()
+    for i in range(REQUESTS):
+        await app(scopes[i % len(scopes)], receive, send)
+    return (time.perf_counter() - started) / REQUESTS * 1e6
+
+
+def main() -> None:
+    bare = asyncio.run(drive(endpoint))
+    instrumented = asyncio.run(drive(MetricsMiddleware(endpoint, registry=MetricsRegistry())))
+    overhead = instrumented - bare
+    print(f"bare:         {bare:6.2f} us/request")
+    print(f"instrumented: {instrumented:6.2f} us/request")
+    print(f"overhead:     {overhead:6.2f} us/request (budget {BUDGET_US:.0f} us) "
+          f"{'OK' if overhead < BUDGET_US else 'OVER BUDGET'}")
+
+
+if __name__ == "__main__":
+    main()
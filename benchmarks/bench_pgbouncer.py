@@ -0,0 +1,66 @@
+"""
+Compare short-transaction throughput with and without PgBouncer.
+
+Runs the same short transaction (a product lookup and a second round trip,
+rolled back) from many threads, first directly against `DATABASE_URL` with
+the regular client pool, then through `PGBOUNCER_URL` in PgBouncer mode
+(NullPool unless DATABASE_PGBOUNCER_POOL_SIZE is set). Also reports the
+server connections each run used.
+
+Usage: PGBOUNCER_URL=postgresql://...:6432/pandac_pos python -m benchmarks.bench_pgbouncer
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import create_workload_engine
+
+THREADS = 64
+TRANSACTIONS = 20_000
+
+_SERVER_CONNECTIONS = text(
+    "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND backend_type = 'client backend'"
+)
+
+
+def transaction(engine) -> None:
+    with engine.connect() as connection:
+        with connection.begin() as outer:
+            connection.execute(text("SELECT id, price FROM products ORDER BY id LIMIT 1")).first()
+            connection.execute(text("SELECT now()"))
+            outer.rollback()
+
+
+def run(name: str, engine) -> None:
+    peak = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        for index, _ in enumerate(executor.map(lambda _: transaction(engine), range(TRANSACTIONS))):
+            if index % 2_000 == 0:
+                with engine.connect() as connection:
+                    peak = max(peak, connection.execute(_SERVER_CONNECTIONS).scalar())
+    elapsed = time.perf_counter() - started
+    print(f"{name:<10} {TRANSACTIONS / elapsed:9.0f} tx/s  peak server connections={peak}")
+    engine.dispose()
+
+
+def main() -> None:
+    options = dict(
+        pool_size=settings.db_checkout_pool_size,
+        max_overflow=settings.db_checkout_max_overflow,
+        statement_timeout_ms=settings.db_checkout_statement_timeout_ms,
+        lock_timeout_ms=settings.db_checkout_lock_timeout_ms,
+    )
+    run("direct", create_workload_engine(settings.database_url, pgbouncer=False, **options))
+    pgbouncer_url = os.environ.get("PGBOUNCER_URL")
+    if pgbouncer_url:
+        run("pgbouncer", create_workload_engine(pgbouncer_url, pgbouncer=True, **options))
+    else:
+        print("PGBOUNCER_URL is not set; skipping the PgBouncer run")
+
+
+if __name__ == "__main__":
+    main()
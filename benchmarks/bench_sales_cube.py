@@ -0,0 +1,37 @@
+"""
+Compare the in-memory sales cube against the SQL analytics path.
+
+Usage: python -m benchmarks.bench_sales_cube
+"""
+from datetime import datetime, timedelta
+
+from app.crud import pos as pos_crud
+from app.utils.sales_cube import SalesCube
+from benchmarks.common import report, seeded_session, timeit
+
+
+def main() -> None:
+    with seeded_session() as db:
+        cube = SalesCube(window_hours=24 * 7, max_rows=1_000_000)
+        cube.load(db)
+        print(f"cube: {cube.stats()}")
+
+        # The cube answers closed hours only.
+        end = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        start = end - timedelta(days=1)
+
+        report("sql top-products (24h)", timeit(lambda: pos_crud.pos_sale.get_top_selling_products(
+            db, start_date=start, end_date=end, limit=10)))
+        report("cube top-products (24h)", timeit(lambda: cube.top_products(start, end, limit=10)))
+
+        report("sql revenue (24h)", timeit(lambda: pos_crud.pos_sale.get_revenue(
+            db, start_date=start, end_date=end)))
+        report("cube revenue (24h)", timeit(lambda: cube.revenue(start, end)))
+
+        report("sql hourly (24h)", timeit(lambda: pos_crud.pos_sale.get_hourly_breakdown(
+            db, start_date=start, end_date=end)))
+        report("cube hourly (24h)", timeit(lambda: cube.hourly_breakdown(start, end)))
+
+
+if __name__ == "__main__":
+    main()
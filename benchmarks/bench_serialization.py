@@ -0,0 +1,87 @@
+"""
+Compare response serialization of 1,000-row lists, before and after.
+
+"before" is what FastAPI does for `response_model=List[Product]`: validate
+every ORM object into the schema, run `jsonable_encoder`, then encode with the
+stdlib `json` (JSONResponse) or orjson (ORJSONResponse). The hand-built sales
+dicts with `str(uuid)`/`isoformat()` are measured too. "after" is the
+`RowSerializer` path the list routes now return. No database is needed; rows
+are transient ORM instances.
+
+Usage: python -m benchmarks.bench_serialization
+"""
+import asyncio
+import uuid
+from datetime import datetime
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import app.main  # noqa: F401  (configures every mapper)
+from app.api.v1.products import product_serializer
+from app.api.v1.sales import sale_serializer
+from app.models.pos import POSSale
+from app.models.product import Product as ProductModel
+from app.schemas.product import Product
+from benchmarks.common import report, timeit
+
+ROWS = 1_000
+
+
+def make_products() -> List[ProductModel]:
+    now = datetime.utcnow()
+    return [
+        ProductModel(
+            id=uuid.uuid4(), name=f"Product {i}", price=i * 1.25, description="Bench product",
+            category="bench", discount_id=None, created_at=now, updated_at=now,
+        )
+        for i in range(ROWS)
+    ]
+
+
+def make_sales() -> List[POSSale]:
+    now = datetime.utcnow()
+    return [
+        POSSale(
+            id=uuid.uuid4(), customer_id=uuid.uuid4(), cashier_id=uuid.uuid4(), total_amount=i * 2.5,
+            discount_id=None, created_at=now, updated_at=now,
+        )
+        for i in range(ROWS)
+    ]
+
+
+def main() -> None:
+    products = make_products()
+    sales = make_sales()
+    field = create_response_field(name="Response_read_products", type_=List[Product])
+
+    def fastapi_response_model(response_class):
+        content = asyncio.run(serialize_response(field=field, response_content=products, is_coroutine=False))
+        return response_class(content).body
+
+    def hand_built_sales():
+        return JSONResponse([
+            {
+                "id": str(sale.id),
+                "customer_id": str(sale.customer_id),
+                "cashier_id": str(sale.cashier_id),
+                "total_amount": sale.total_amount,
+                "discount_id": str(sale.discount_id) if sale.discount_id else None,
+                "created_at": sale.created_at.isoformat(),
+                "updated_at": sale.updated_at.isoformat(),
+            }
+            for sale in sales
+        ]).body
+
+    print(f"{ROWS} rows per response")
+    report("products: response_model+json", timeit(lambda: fastapi_response_model(JSONResponse)))
+    report("products: response_model+orjson", timeit(lambda: fastapi_response_model(ORJSONResponse)))
+    report("products: RowSerializer", timeit(lambda: product_serializer.response(products).body))
+    report("sales: hand-built dicts+json", timeit(hand_built_sales))
+    report("sales: RowSerializer", timeit(lambda: sale_serializer.response(sales).body))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Show that access-token checks stay flat as the revocation list grows.
+
+Fills a `RevocationList` with 0, 10,000 and 1,000,000 revoked ids and times
+1,000 `decode_token` calls on a valid access token (signature check plus the
+revocation lookup), then 1,000 bare `is_revoked` lookups for unrevoked and
+revoked ids. Also prints the list's filter size. No database is needed.
+
+Usage: python -m benchmarks.bench_token_revocation
+"""
+import time
+from uuid import uuid4
+
+from app.core import security
+from app.core.config import settings
+from app.core.revocation import RevocationList
+from benchmarks.common import report, timeit
+
+SIZES = (0, 10_000, 1_000_000)
+CHECKS = 1_000
+
+
+def main() -> None:
+    token = security.create_access_token(uuid4())
+    exp = int(time.time()) + 3600
+    for size in SIZES:
+        revoked = RevocationList(settings.revocation_bloom_capacity, settings.revocation_bloom_error_rate)
+        jtis = [uuid4().hex for _ in range(size)]
+        started = time.perf_counter()
+        revoked.add_many((jti, exp) for jti in jtis)
+        load_seconds = time.perf_counter() - started
+        security.revocation_list = revoked
+
+        fresh = [uuid4().hex for _ in range(CHECKS)]
+        hits = jtis[:CHECKS] or fresh
+        stats = revoked.stats()
+        print(f"{size:>9} revoked: loaded in {load_seconds:.2f}s, filter {stats['filter_bytes'] / 1024:.0f} KiB")
+        report(f"{size}: {CHECKS} decode_token", timeit(lambda: [security.decode_token(token) for _ in range(CHECKS)]))
+        report(f"{size}: {CHECKS} unrevoked lookups", timeit(lambda: [revoked.is_revoked(jti) for jti in fresh]))
+        report(f"{size}: {CHECKS} revoked lookups", timeit(lambda: [revoked.is_revoked(jti) for jti in hits]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Compare the Space-Saving best-sellers sketch against the exact SQL aggregate.
+
+Usage: python -m benchmarks.bench_top_products
+"""
+from datetime import datetime, timedelta
+
+from app.crud import pos as pos_crud
+from app.models.pos import POSSale, POSSaleItem
+from app.utils.sales_cube import EPOCH
+from app.utils.top_products import TopProductsTracker
+from benchmarks.common import report, seeded_session, timeit
+
+
+def main() -> None:
+    with seeded_session(n_sales=50_000, n_products=2_000, hours=24) as db:
+        tracker = TopProductsTracker(capacity=256)
+        rows = db.query(
+            POSSale.created_at, POSSaleItem.product_id, POSSaleItem.quantity, POSSaleItem.subtotal
+        ).join(POSSale, POSSaleItem.sale_id == POSSale.id).order_by(POSSale.created_at).all()
+        for created_at, product_id, quantity, subtotal in rows:
+            tracker.record_item(product_id, quantity, subtotal, at=(created_at - EPOCH).total_seconds())
+
+        for window, span in (("hour", timedelta(hours=1)), ("day", timedelta(days=1))):
+            end = datetime.utcnow()
+            exact = pos_crud.pos_sale.get_top_selling_products(db, start_date=end - span, end_date=end, limit=10)
+            approx = tracker.top(window, 10)
+
+            exact_ids = [row["product_id"] for row in exact]
+            approx_ids = [row["product_id"] for row in approx]
+            recall = len(set(exact_ids) & set(approx_ids)) / max(len(exact_ids), 1)
+            exact_qty = {row["product_id"]: row["total_quantity"] for row in exact}
+            errors = [
+                abs(row["total_quantity"] - exact_qty[row["product_id"]]) / exact_qty[row["product_id"]]
+                for row in approx if row["product_id"] in exact_qty
+            ]
+            print(f"{window}: top-10 recall={recall:.2f} max relative quantity error="
+                  f"{max(errors, default=0):.4f} same order={exact_ids == approx_ids}")
+
+            report(f"sql top-10 ({window})", timeit(lambda: pos_crud.pos_sale.get_top_selling_products(
+                db, start_date=end - span, end_date=end, limit=10)))
+            report(f"sketch top-10 ({window})", timeit(lambda: tracker.top(window, 10), repeat=1_000))
+
+
+if __name__ == "__main__":
+    main()
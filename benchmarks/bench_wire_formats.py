@@ -0,0 +1,47 @@
+"""
+Compare wire size and client decode time of the product catalog per format.
+
+Encodes a 1,000-product catalog as JSON records (the default), JSON columnar,
+MessagePack records and MessagePack columnar through `product_serializer`,
+then reports the body size and how long a client takes to decode it (orjson
+and msgpack, as a POS terminal would). No database is needed.
+
+Usage: python -m benchmarks.bench_wire_formats
+"""
+import msgpack
+import orjson
+
+from app.api.v1.products import product_serializer
+from app.core.serialization import JSON, MSGPACK, response_format
+from benchmarks.bench_serialization import ROWS, make_products
+from benchmarks.common import report, timeit
+
+FORMATS = {
+    "json records": (JSON, False, orjson.loads),
+    "json columnar": (JSON, True, orjson.loads),
+    "msgpack records": (MSGPACK, False, msgpack.unpackb),
+    "msgpack columnar": (MSGPACK, True, msgpack.unpackb),
+}
+
+
+def encode(products, media_type: str, columnar: bool) -> bytes:
+    token = response_format.set((media_type, columnar))
+    try:
+        return product_serializer.response(products).body
+    finally:
+        response_format.reset(token)
+
+
+def main() -> None:
+    products = make_products()
+    baseline = len(encode(products, JSON, False))
+    print(f"{ROWS} products per catalog")
+    for name, (media_type, columnar, decode) in FORMATS.items():
+        body = encode(products, media_type, columnar)
+        print(f"{name:<32} {len(body):>8} bytes  {baseline / len(body):4.2f}x smaller than json records")
+        report(f"{name}: encode", timeit(lambda: encode(products, media_type, columnar)))
+        report(f"{name}: client decode", timeit(lambda: decode(body)))
+
+
+if __name__ == "__main__":
+    main()
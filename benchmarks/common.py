@@ -0,0 +1,95 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against the database in `DATABASE_URL`. Synthetic data is
+written inside a transaction that is rolled back on exit, so they are safe to
+point at a development database.
+"""
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List
+
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+from app.models.employee import Employee
+from app.models.pos import POSPayment, POSSale, POSSaleItem
+from app.models.product import Product
+from app.models.user import Role, User
+
+
+def timeit(fn: Callable, repeat: int = 50) -> Dict[str, float]:
+    """Run `fn` `repeat` times and return latency percentiles in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[int(len(samples) * 0.95) - 1],
+        "mean_ms": statistics.fmean(samples),
+    }
+
+
+def report(name: str, result: Dict[str, float]) -> None:
+    print(f"{name:<32} " + "  ".join(f"{key}={value:9.3f}" for key, value in result.items()))
+
+
+@contextmanager
+def seeded_session(
+    n_sales: int = 20_000,
+    n_products: int = 500,
+    items_per_sale: int = 3,
+    hours: int = 24 * 7,
+    seed: int = 42,
+) -> Iterator[Session]:
+    """Yield a session over synthetic sales; everything is rolled back afterwards."""
+    rng = random.Random(seed)
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection)
+    try:
+        role = Role(name=f"bench-{seed}", permissions=["*"])
+        db.add(role)
+        db.flush()
+        user = User(username=f"bench{seed}", password_hash="x", role_id=role.id)
+        db.add(user)
+        db.flush()
+        employee = Employee(name="Bench Cashier", position="Cashier", user_id=user.id)
+        products = [Product(name=f"Bench {i}", price=rng.uniform(1, 50)) for i in range(n_products)]
+        db.add(employee)
+        db.add_all(products)
+        db.flush()
+
+        # Skewed popularity so top-N answers are meaningful.
+        weights = [1 / (rank + 1) for rank in range(n_products)]
+        now = datetime.utcnow()
+        sales: List[POSSale] = []
+        for _ in range(n_sales):
+            created_at = now - timedelta(seconds=rng.uniform(0, hours * 3600))
+            sale = POSSale(cashier_id=employee.id, total_amount=0, created_at=created_at, updated_at=created_at)
+            for product in rng.choices(products, weights=weights, k=items_per_sale):
+                quantity = rng.randint(1, 4)
+                subtotal = round(quantity * product.price, 2)
+                sale.total_amount += subtotal
+                sale.sale_items.append(POSSaleItem(
+                    product_id=product.id, quantity=quantity, unit_price=product.price,
+                    subtotal=subtotal, created_at=created_at, updated_at=created_at,
+                ))
+            sale.payments.append(POSPayment(
+                payment_method=rng.choice(["cash", "card", "digital"]), amount=sale.total_amount,
+                created_at=created_at, updated_at=created_at,
+            ))
+            sales.append(sale)
+        db.add_all(sales)
+        db.flush()
+        yield db
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
@@ -0,0 +1,37 @@
+"""
+Unit tests for admission classification.
+"""
+
+import pytest
+
+from app.core.admission import CRITICAL, NON_CRITICAL, NORMAL, classify
+from app.core.config import settings
+
+API = settings.api_v1_str
+
+
+class TestClassify:
+    """Test that checkout writes are critical and reports and listings are shed first."""
+
+    @pytest.mark.parametrize("path", [
+        "/sales/",
+        "/sales/abc/items",
+        "/sales/abc/payments/",
+        "/checkout/",
+        "/carts/",
+        "/carts",
+        "/carts/abc/items",
+        "/carts/abc/finalize",
+    ])
+    def test_checkout_writes_are_critical(self, path):
+        assert classify("POST", f"{API}{path}") == CRITICAL
+
+    def test_other_cart_requests_are_not_critical(self):
+        assert classify("POST", f"{API}/carts/abc/discard") == NORMAL
+        assert classify("PUT", f"{API}/carts/abc/items/def") == NORMAL
+        assert classify("GET", f"{API}/carts/abc") == NORMAL
+
+    def test_reports_and_listings_are_non_critical(self):
+        assert classify("GET", f"{API}/reports/daily") == NON_CRITICAL
+        assert classify("GET", f"{API}/products/") == NON_CRITICAL
+        assert classify("GET", "/health") == CRITICAL
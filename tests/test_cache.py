@@ -0,0 +1,130 @@
+"""
+Unit tests for the two-tier read-through cache.
+"""
+import threading
+import time
+from datetime import date, datetime
+from uuid import uuid4
+
+from app.core.cache import Cache, MemoryBackend, cached
+
+
+class TestCache:
+    """Test cases for Cache."""
+
+    def test_ttl_and_lru_eviction(self, fake_clock):
+        """Test that entries expire after the TTL and the least recently used entry is evicted."""
+        cache = Cache("test", ttl_seconds=10, max_entries=2, beta=0, clock=fake_clock)
+        for key in ("a", "b"):
+            cache.get_or_load(key, lambda: key.upper())
+        cache.get_or_load("a", lambda: "unused")
+        cache.get_or_load("c", lambda: "C")
+        assert cache.info()["size"] == 2 and cache.stats.evictions == 1
+        assert cache.get_or_load("b", lambda: "reloaded") == "reloaded"
+        fake_clock.now += 11
+        assert cache.get_or_load("a", lambda: "expired") == "expired"
+
+    def test_singleflight(self):
+        """Test that concurrent misses on one key run the loader once."""
+        cache = Cache("test", ttl_seconds=10, beta=0)
+        calls = []
+        release = threading.Event()
+
+        def loader():
+            calls.append(1)
+            release.wait(2)
+            return "value"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert calls == [1]
+        assert results == ["value"] * 8
+        assert cache.stats.coalesced == 7
+
+    def test_early_refresh(self, fake_clock, monkeypatch):
+        """Test that an entry near expiry is reloaded before it expires, keeping the old value on failure."""
+        cache = Cache("test", ttl_seconds=10, beta=1.0, clock=fake_clock)
+        cache.get_or_load("k", lambda: "old")
+        cache._entries["k"] = cache._entries["k"]._replace(delta=5.0)
+        fake_clock.now += 9
+        monkeypatch.setattr("app.core.cache.random.random", lambda: 0.5)
+
+        def failing():
+            raise RuntimeError("database down")
+
+        assert cache.get_or_load("k", failing) == "old"
+        assert cache.get_or_load("k", lambda: "new") == "new"
+        assert cache.stats.early_refreshes == 2
+
+    def test_shared_tier(self, fake_clock):
+        """Test that a second worker's cache is filled from the shared tier, and invalidation clears both."""
+        backend = MemoryBackend(clock=fake_clock)
+        first = Cache("test", ttl_seconds=10, remote=backend, beta=0, clock=fake_clock)
+        second = Cache("test", ttl_seconds=10, remote=backend, beta=0, clock=fake_clock)
+        first.get_or_load("k", lambda: {"id": 1})
+        assert second.get_or_load("k", lambda: "not loaded") == {"id": 1}
+        assert second.stats.remote_hits == 1
+        first.invalidate("k")
+        assert backend.get("test:k") is None
+
+
+class TestCachedDecorator:
+    """Test cases for the cached decorator."""
+
+    def test_key_ignores_non_scalar_arguments(self):
+        """Test that sessions and `self` are left out of the default key."""
+        calls = []
+
+        class Reports:
+            @cached("test.decorator", ttl_seconds=60)
+            def daily(self, db, *, date: str, top_n: int = 10):
+                calls.append((date, top_n))
+                return {"date": date, "top_n": top_n}
+
+        reports = Reports()
+        reports.daily(object(), date="2024-05-01", top_n=5)
+        reports.daily(object(), date="2024-05-01", top_n=5)
+        reports.daily(object(), date="2024-05-02", top_n=5)
+        assert calls == [("2024-05-01", 5), ("2024-05-02", 5)]
+        assert Reports.daily.cache.stats.hits == 1
+
+
+class TestSharedTierEncoding:
+    """Test that the shared tier holds typed plain data only."""
+
+    def test_typed_values_round_trip(self, fake_clock):
+        backend = MemoryBackend(clock=fake_clock)
+        first = Cache("test", ttl_seconds=10, remote=backend, beta=0, clock=fake_clock)
+        second = Cache("test", ttl_seconds=10, remote=backend, beta=0, clock=fake_clock)
+        value = {"id": uuid4(), "at": datetime(2024, 5, 1, 12, 30), "day": date(2024, 5, 1), "rows": [1, 2.5, None]}
+        first.get_or_load("k", lambda: value)
+        assert second.get_or_load("k", lambda: "not loaded") == value
+
+    def test_other_objects_stay_local(self, fake_clock):
+        backend = MemoryBackend(clock=fake_clock)
+        cache = Cache("test", ttl_seconds=10, remote=backend, beta=0, clock=fake_clock)
+        value = object()
+        assert cache.get_or_load("k", lambda: value) is value
+        assert backend.get("test:k") is None
+
+    def test_orm_rows_are_shared_as_columns(self, fake_clock):
+        import app.models.customer, app.models.employee, app.models.misc, app.models.pos  # noqa: E401,F401
+        import app.models.sale, app.models.user  # noqa: E401,F401
+        from app.crud.product import product as product_crud
+        from app.models.product import Product
+
+        backend = MemoryBackend(clock=fake_clock)
+        codec = (product_crud._to_columns, product_crud._from_columns)
+        first = Cache("test", ttl_seconds=10, remote=backend, beta=0, clock=fake_clock, codec=codec)
+        second = Cache("test", ttl_seconds=10, remote=backend, beta=0, clock=fake_clock, codec=codec)
+        row = Product(id=uuid4(), name="Bread", price=2.49, created_at=datetime(2024, 5, 1))
+        first.get_or_load("k", lambda: row)
+        shared = second.get_or_load("k", lambda: None)
+        assert isinstance(shared, Product) and shared is not row
+        assert (shared.id, shared.name, shared.price, shared.created_at) == (row.id, "Bread", 2.49, row.created_at)
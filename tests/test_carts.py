@@ -0,0 +1,147 @@
+"""
+Unit tests for draft carts and their store.
+"""
+from uuid import uuid4
+
+import msgpack
+import pytest
+
+from app.core.cache import MemoryBackend
+from app.core.serialization import packb
+from app.utils.carts import Cart, CartConflict, CartStore
+
+
+class TestCart:
+    """Test that running totals follow every scan, change and removal."""
+
+    def test_incremental_totals(self):
+        cart = Cart("c1", "u1", tax_rate=0.08)
+        cart.scan("apple", "Apple", 0.10, quantity=3)
+        cart.scan("bread", "Bread", 2.49)
+        cart.scan("apple", "Apple", 0.10, quantity=2, discount_amount=0.05)
+        assert cart.lines["apple"].quantity == 5
+        assert cart.subtotal_cents == 50 + 249
+        assert cart.discount_cents == 5
+        assert cart.tax_cents == round(294 * 0.08)
+        assert cart.to_dict()["total_amount"] == (294 + 24) / 100
+
+        cart.set_line("apple", "Apple", 0.10, 0)
+        assert list(cart.lines) == ["bread"]
+        assert (cart.subtotal_cents, cart.discount_cents) == (249, 0)
+
+    def test_discount_cannot_exceed_line(self):
+        cart = Cart("c1", "u1")
+        cart.scan("bread", "Bread", 2.49)
+        with pytest.raises(ValueError):
+            cart.set_line("bread", "Bread", 2.49, 1, discount_amount=3.00)
+        assert cart.subtotal_cents == 249
+
+    def test_state_round_trip(self):
+        cart = Cart("c1", "u1", customer_id="k1", tax_rate=0.08)
+        cart.scan("apple", "Apple", 0.10, quantity=3, discount_amount=0.05)
+        cart.scan("bread", "Bread", 2.49)
+        cart.version = 4
+        state = msgpack.unpackb(packb(cart.to_state()))
+        assert Cart.from_state(state).to_dict() == cart.to_dict()
+        assert Cart.from_state(state).lines["apple"] == cart.lines["apple"]
+
+
+@pytest.fixture(params=["local", "remote"])
+def store(request, fake_clock):
+    remote = MemoryBackend(clock=fake_clock) if request.param == "remote" else None
+    return CartStore(ttl_seconds=60, max_carts=2, remote=remote, clock=fake_clock), fake_clock
+
+
+class TestCartStore:
+    """Test that carts are stored, updated, expired and taken out for finalizing."""
+
+    def test_update_and_expiry(self, store):
+        store, clock = store
+        cart = store.create("u1")
+        store.update(cart.id, lambda cart: cart.scan("bread", "Bread", 2.49))
+        assert store.get(cart.id).subtotal_cents == 249
+        assert store.get(cart.id).version == 1
+
+        clock.now += 61
+        assert store.get(cart.id) is None
+        assert store.update(cart.id, lambda cart: None) is None
+
+    def test_failed_change_leaves_the_cart_untouched(self, store):
+        store, _ = store
+        cart = store.create("u1")
+        store.update(cart.id, lambda cart: cart.scan("bread", "Bread", 2.49))
+        before = store.get(cart.id)
+
+        def half_applied(cart):
+            cart.scan("apple", "Apple", 0.10)
+            cart.set_line("bread", "Bread", 2.49, 1, discount_amount=3.00)
+
+        with pytest.raises(ValueError):
+            store.update(cart.id, half_applied)
+        assert store.get(cart.id).to_dict() == before.to_dict()
+
+        store.update(cart.id, lambda cart: cart.scan("apple", "Apple", 0.10))
+        # A snapshot handed out earlier does not change under later edits.
+        assert list(before.lines) == ["bread"] and before.version == 1
+
+    def test_pop_takes_the_cart_once(self, store):
+        store, _ = store
+        cart = store.create("u1")
+        taken = store.pop(cart.id)
+        assert taken.id == cart.id
+        assert store.pop(cart.id) is None
+        store.put(taken)
+        assert store.get(cart.id) is not None
+
+    def test_local_store_is_bounded(self):
+        store = CartStore(ttl_seconds=60, max_carts=2)
+        carts = [store.create(str(uuid4())) for _ in range(3)]
+        assert len(store) == 2
+        assert store.get(carts[0].id) is None
+
+
+class TestSharedCartStore:
+    """Test that workers sharing a remote store never lose each other's edits."""
+
+    @pytest.fixture
+    def workers(self):
+        remote = MemoryBackend()
+        return CartStore(ttl_seconds=60, remote=remote), CartStore(ttl_seconds=60, remote=remote)
+
+    def test_racing_update_is_retried(self, workers):
+        first, second = workers
+        cart = first.create("u1")
+
+        def scan_apple(cart):
+            if cart.version == 0:
+                # The other worker commits its scan between our read and write.
+                second.update(cart.id, lambda other: other.scan("bread", "Bread", 2.49))
+            cart.scan("apple", "Apple", 0.10)
+
+        updated = first.update(cart.id, scan_apple)
+        assert set(updated.lines) == {"apple", "bread"}
+        assert updated.version == 2
+        assert first.get(cart.id).to_dict() == updated.to_dict()
+
+    def test_pop_does_not_drop_a_racing_scan(self, workers):
+        first, second = workers
+        cart = first.create("u1")
+        remote = first.remote
+        compare_and_set = remote.compare_and_set
+
+        def racing(key, expected, value, ttl_seconds):
+            remote.compare_and_set = compare_and_set
+            second.update(key, lambda other: other.scan("bread", "Bread", 2.49))
+            return compare_and_set(key, expected, value, ttl_seconds)
+
+        remote.compare_and_set = racing
+        taken = first.pop(cart.id)
+        assert list(taken.lines) == ["bread"]
+        assert first.get(cart.id) is None
+
+    def test_endless_contention_raises(self, workers):
+        first, _ = workers
+        cart = first.create("u1")
+        first.remote.compare_and_set = lambda *args: False
+        with pytest.raises(CartConflict):
+            first.update(cart.id, lambda cart: cart.scan("bread", "Bread", 2.49))
@@ -0,0 +1,48 @@
+"""
+Unit tests for composite checkout settlement.
+"""
+from uuid import uuid4
+
+import pytest
+
+from app.core.exceptions import ValidationException
+from app.crud.pos import loyalty_points, settle_tenders
+from app.schemas.pos import CheckoutCreate
+
+
+def checkout_with(*payments):
+    return CheckoutCreate(
+        checkout_id=uuid4(),
+        items=[{"product_id": uuid4(), "quantity": 1}],
+        payments=[{"payment_method": method, "amount": amount} for method, amount in payments],
+    )
+
+
+class TestSettleTenders:
+    """Test that split tenders cover the total and change comes off cash."""
+
+    def test_exact_split(self):
+        amounts, change = settle_tenders(checkout_with(("card", 10.00), ("digital", 2.35)), 1235)
+        assert amounts == [1000, 235]
+        assert change == 0
+
+    def test_change_comes_off_cash(self):
+        amounts, change = settle_tenders(checkout_with(("cash", 5.00), ("card", 4.00), ("cash", 2.00)), 1050)
+        assert change == 50
+        assert amounts == [500, 400, 150]
+        assert sum(amounts) == 1050
+
+    def test_short_or_overpaid_card_is_rejected(self):
+        with pytest.raises(ValidationException):
+            settle_tenders(checkout_with(("card", 10.00)), 1001)
+        with pytest.raises(ValidationException):
+            settle_tenders(checkout_with(("card", 11.00)), 1000)
+
+
+class TestLoyaltyPoints:
+    """Test that points round down and never go negative."""
+
+    def test_rounding(self):
+        assert loyalty_points(19.99, 1.0) == 19
+        assert loyalty_points(0.3, 10.0) == 3
+        assert loyalty_points(50.0, 0.0) == 0
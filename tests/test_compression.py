@@ -0,0 +1,90 @@
+"""
+Unit tests for response compression.
+"""
+import gzip
+
+import brotli
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressedCache, CompressionMiddleware, negotiate
+
+BIG = "x" * 20_000
+
+
+@pytest.fixture
+def cache():
+    return CompressedCache(max_bytes=1_000_000)
+
+
+@pytest.fixture
+def client(cache):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, cache=cache, cache_min_size=1024)
+
+    @app.get("/big")
+    def big():
+        return PlainTextResponse(BIG)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/export")
+    def export():
+        lines = (f'{{"line": {i}}}\n'.encode() for i in range(1_000))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+class TestNegotiate:
+    """Test cases for negotiate."""
+
+    def test_preference_and_quality(self):
+        """Test that zstd > br > gzip at equal quality and q values are respected."""
+        assert negotiate("gzip, br, zstd") == "zstd"
+        assert negotiate("gzip, br") == "br"
+        assert negotiate("gzip;q=1, br;q=0.5") == "gzip"
+        assert negotiate("*") == "zstd"
+        assert negotiate("identity") is None
+        assert negotiate("") is None
+
+
+class TestCompressionMiddleware:
+    """Test cases for CompressionMiddleware."""
+
+    @pytest.mark.parametrize("encoding, decompress", [
+        ("gzip", gzip.decompress),
+        ("br", brotli.decompress),
+        ("zstd", lambda data: zstandard.ZstdDecompressor().decompress(data)),
+    ])
+    def test_compresses_large_bodies(self, client, encoding, decompress):
+        """Test that bodies over the threshold come back in the negotiated encoding."""
+        with client.stream("GET", "/big", headers={"accept-encoding": encoding}) as response:
+            body = b"".join(response.iter_raw())
+        assert response.headers["content-encoding"] == encoding
+        assert int(response.headers["content-length"]) == len(body) < len(BIG)
+        assert decompress(body) == BIG.encode()
+
+    def test_small_bodies_are_not_compressed(self, client):
+        """Test that bodies under the threshold are sent as is."""
+        response = client.get("/small", headers={"accept-encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.text == "tiny"
+
+    def test_streamed_export(self, client):
+        """Test that streamed NDJSON is compressed incrementally and decodes completely."""
+        response = client.get("/export", headers={"accept-encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text.count("\n") == 1_000
+
+    def test_repeated_bodies_hit_the_cache(self, client, cache):
+        """Test that the same body is compressed once per encoding."""
+        for _ in range(3):
+            client.get("/big", headers={"accept-encoding": "gzip"})
+        assert (cache.hits, cache.misses) == (2, 1)
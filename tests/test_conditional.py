@@ -0,0 +1,90 @@
+"""
+Unit tests for conditional GET validators and table version stamps.
+"""
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import Depends, FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.core.conditional import TableVersion, TableVersions, Validators, conditional_get, table_versions
+from app.core.database import get_db
+
+CHANGED_AT = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+
+    def load(db, table):
+        calls.append(table)
+        return TableVersion(7, CHANGED_AT)
+
+    monkeypatch.setattr(table_versions, "_load", load)
+    table_versions.invalidate("products")
+    yield calls
+    table_versions.invalidate("products")
+
+
+@pytest.fixture
+def client(loads):
+    app = FastAPI()
+    app.dependency_overrides[get_db] = lambda: None
+
+    @app.get("/products")
+    def read_products(response: Response, validators: Validators = Depends(conditional_get("products"))):
+        validators.apply(response)
+        return ["catalog"]
+
+    return TestClient(app)
+
+
+class TestTableVersions:
+    """Test cases for TableVersions."""
+
+    def test_stamps_expire_and_invalidate(self, fake_clock):
+        """Test that cached stamps last for the TTL and are dropped on invalidate."""
+        versions = TableVersions(ttl_seconds=1.0, clock=fake_clock)
+        versions._load = lambda db, table: TableVersion(1, CHANGED_AT)
+        assert versions.cached("products") is None
+        versions.load(None, "products")
+        assert versions.cached("products") == TableVersion(1, CHANGED_AT)
+        fake_clock.now += 1.5
+        assert versions.cached("products") is None
+        versions.load(None, "products")
+        versions.invalidate("products")
+        assert versions.cached("products") is None
+
+
+class TestConditionalGet:
+    """Test cases for the conditional_get dependency."""
+
+    def test_validators_on_full_response(self, client):
+        """Test that full responses carry a weak ETag and Last-Modified."""
+        response = client.get("/products")
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('W/"products-7-')
+        assert response.headers["last-modified"] == "Wed, 01 May 2024 12:30:15 GMT"
+
+    def test_if_none_match(self, client, loads):
+        """Test that a matching ETag gets a 304 from the cached stamp, without loading it again."""
+        etag = client.get("/products").headers["etag"]
+        response = client.get("/products", headers={"if-none-match": f'"other", {etag}'})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert loads == ["products"]
+        assert client.get("/products", headers={"if-none-match": 'W/"products-6-0"'}).status_code == 200
+
+    def test_etag_varies_with_query(self, client):
+        """Test that different query strings get different ETags."""
+        assert client.get("/products?limit=10").headers["etag"] != client.get("/products?limit=20").headers["etag"]
+
+    def test_if_modified_since(self, client):
+        """Test that If-Modified-Since compares at second precision."""
+        last_modified = client.get("/products").headers["last-modified"]
+        assert client.get("/products", headers={"if-modified-since": last_modified}).status_code == 304
+        earlier = "Wed, 01 May 2024 12:30:14 GMT"
+        assert client.get("/products", headers={"if-modified-since": earlier}).status_code == 200
+        assert client.get("/products", headers={"if-modified-since": "garbage"}).status_code == 200
@@ -0,0 +1,63 @@
+"""
+Unit tests for resolving the cashier employee from the access token.
+"""
+from types import SimpleNamespace
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.core.database import get_db
+from app.core.security import create_access_token
+
+USER_ID = uuid4()
+EMPLOYEE_ID = uuid4()
+
+
+@pytest.fixture
+def provisioned(monkeypatch):
+    calls = []
+
+    def provision(db, *, user_id, commit=True):
+        calls.append(user_id)
+        return EMPLOYEE_ID
+
+    monkeypatch.setattr(deps.employee_crud, "provision", provision)
+    return calls
+
+
+@pytest.fixture
+def client(provisioned):
+    app = FastAPI()
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[deps.get_current_user] = lambda: SimpleNamespace(id=USER_ID)
+
+    @app.get("/whoami")
+    def whoami(employee_id: UUID = Depends(deps.get_current_employee_id)):
+        return {"employee_id": str(employee_id)}
+
+    return TestClient(app)
+
+
+def get(client, token):
+    return client.get("/whoami", headers={"Authorization": f"Bearer {token}"})
+
+
+class TestEmployeeClaim:
+    """Test that the employee id comes from the token, with a provisioning fallback."""
+
+    def test_claim_is_used_without_lookup(self, client, provisioned):
+        employee_id = uuid4()
+        token = create_access_token(USER_ID, claims={"employee_id": str(employee_id)})
+        assert get(client, token).json() == {"employee_id": str(employee_id)}
+        assert provisioned == []
+
+    def test_tokens_without_claim_fall_back(self, client, provisioned):
+        assert get(client, create_access_token(USER_ID)).json() == {"employee_id": str(EMPLOYEE_ID)}
+        assert provisioned == [USER_ID]
+
+    def test_claims_cannot_override_subject(self):
+        payload = deps.get_token_payload(SimpleNamespace(credentials=create_access_token(USER_ID, claims={"sub": "x"})))
+        assert payload["sub"] == str(USER_ID)
@@ -0,0 +1,151 @@
+"""
+Unit tests for Idempotency-Key replay.
+"""
+import asyncio
+import threading
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core import security
+from app.core.idempotency import (
+    IdempotencyKeyInProgress, IdempotencyKeyMismatch, IdempotencyMiddleware, IdempotencyStore, StoredResponse,
+)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as connection:
+        # The model's UUID columns do not compile on SQLite.
+        connection.execute(text(
+            "CREATE TABLE idempotency_keys (id TEXT PRIMARY KEY, created_at DATETIME, updated_at DATETIME, "
+            "created_by TEXT, updated_by TEXT, key TEXT UNIQUE, fingerprint TEXT, status_code INTEGER, "
+            "headers JSON, body BLOB, locked_until DATETIME, expires_at DATETIME)"
+        ))
+    return sessionmaker(bind=engine)
+
+
+def created(body=b'{"id": 1}'):
+    return StoredResponse(201, [(b"content-type", b"application/json")], body, "f1")
+
+
+class TestIdempotencyStore:
+    """Test that keys are claimed once, replayed after completion and expire."""
+
+    def test_claim_complete_replay(self, session_factory, fake_clock):
+        store = IdempotencyStore(session_factory, ttl_seconds=60, lock_seconds=10, clock=fake_clock)
+        assert store.claim("u:k", "f1") is None
+        with pytest.raises(IdempotencyKeyInProgress):
+            store.claim("u:k", "f1")
+
+        store.complete("u:k", created())
+        assert store.cached("u:k", "f1") == created()
+        # Another worker, with an empty LRU, replays from the table.
+        other = IdempotencyStore(session_factory, ttl_seconds=60, lock_seconds=10, clock=store.clock)
+        assert other.claim("u:k", "f1") == created()
+        with pytest.raises(IdempotencyKeyMismatch):
+            other.claim("u:k", "f2")
+
+    def test_released_and_abandoned_claims_run_again(self, session_factory, fake_clock):
+        store = IdempotencyStore(session_factory, ttl_seconds=60, lock_seconds=10, clock=fake_clock)
+        assert store.claim("u:k", "f1") is None
+        store.release("u:k")
+        assert store.claim("u:k", "f1") is None
+
+        fake_clock.now += 11
+        assert store.poll("u:k", "f1") is None
+
+    def test_keys_expire(self, session_factory, fake_clock):
+        store = IdempotencyStore(session_factory, ttl_seconds=60, lock_seconds=10, clock=fake_clock)
+        store.claim("u:k", "f1")
+        store.complete("u:k", created())
+        fake_clock.now += 61
+        assert store.cached("u:k", "f1") is None
+        assert store.claim("u:k", "f2") is None
+
+
+@pytest.fixture
+def client(session_factory):
+    app = FastAPI()
+    calls = []
+    release = threading.Event()
+    release.set()
+
+    @app.post("/v1/sales/")
+    async def create_sale(request: Request):
+        calls.append(await request.body())
+        await asyncio.get_running_loop().run_in_executor(None, release.wait)
+        return {"sale": len(calls)}
+
+    @app.post("/v1/sales/fail")
+    def fail():
+        calls.append(b"")
+        return JSONResponse({"detail": "Database unavailable"}, status_code=503)
+
+    @app.post("/v1/sales/busy")
+    def busy():
+        calls.append(b"")
+        if len(calls) == 1:
+            return JSONResponse({"detail": "Cart is being changed by another request; retry"}, status_code=409)
+        return {"sale": len(calls)}
+
+    store = IdempotencyStore(session_factory, ttl_seconds=60, lock_seconds=10)
+    app.add_middleware(IdempotencyMiddleware, store=store, prefixes=["/v1/sales"], wait_seconds=5)
+    client = TestClient(app, raise_server_exceptions=False)
+    client.calls = calls
+    client.release = release
+    client.headers["Authorization"] = f"Bearer {security.create_access_token(uuid4())}"
+    return client
+
+
+class TestIdempotencyMiddleware:
+    """Test that retries replay the first response without running the route again."""
+
+    def test_retry_is_replayed(self, client):
+        first = client.post("/v1/sales/", json={"total": 5}, headers={"Idempotency-Key": "k1"})
+        retry = client.post("/v1/sales/", json={"total": 5}, headers={"Idempotency-Key": "k1"})
+        assert first.json() == retry.json() == {"sale": 1}
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert len(client.calls) == 1
+
+        assert client.post("/v1/sales/", json={"total": 6}, headers={"Idempotency-Key": "k1"}).status_code == 422
+        assert client.post("/v1/sales/", json={"total": 5}).json() == {"sale": 2}
+
+    def test_failures_are_not_stored(self, client):
+        assert client.post("/v1/sales/fail", headers={"Idempotency-Key": "k2"}).status_code == 503
+        assert client.post("/v1/sales/fail", headers={"Idempotency-Key": "k2"}).status_code == 503
+        assert len(client.calls) == 2
+
+    def test_transient_conflicts_are_not_stored(self, client):
+        assert client.post("/v1/sales/busy", headers={"Idempotency-Key": "k4"}).status_code == 409
+        retry = client.post("/v1/sales/busy", headers={"Idempotency-Key": "k4"})
+        assert retry.status_code == 200 and retry.json() == {"sale": 2}
+        assert "idempotent-replayed" not in retry.headers
+        assert client.post("/v1/sales/busy", headers={"Idempotency-Key": "k4"}).json() == {"sale": 2}
+
+    def test_concurrent_duplicates_wait_for_the_first(self, client):
+        client.release.clear()
+        with client:
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(
+                    client.post("/v1/sales/", json={"total": 5}, headers={"Idempotency-Key": "k3"})
+                ))
+                for _ in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            while not client.calls:
+                threading.Event().wait(0.01)
+            client.release.set()
+            for thread in threads:
+                thread.join()
+        assert len(client.calls) == 1
+        assert sorted(response.json()["sale"] for response in results) == [1, 1, 1]
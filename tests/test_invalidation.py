@@ -0,0 +1,112 @@
+"""
+Unit tests for the cross-worker cache invalidation bus.
+"""
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.core.cache import get_cache
+from app.core.conditional import TableVersion, table_versions
+from app.core.invalidation import (
+    _PENDING,
+    MAX_IDS_PER_EVENT,
+    MAX_IDS_PER_TABLE,
+    InvalidationBus,
+    events_for,
+    evict_cached,
+)
+
+Base = declarative_base()
+
+
+class Widget(Base):
+    __tablename__ = "widgets"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+class Gadget(Base):
+    __tablename__ = "gadgets"
+    id = Column(Integer, primary_key=True)
+
+
+class TestEventsFor:
+    """Test cases for events_for."""
+
+    def test_events_are_chunked(self):
+        """Test that ids are split into NOTIFY-sized events and huge sets flush the table."""
+        pending = {"products": {str(i) for i in range(MAX_IDS_PER_EVENT + 1)}, "roles": {"x"}}
+        events = [(table, len(ids)) for table, ids in events_for(pending)]
+        assert events == [("products", MAX_IDS_PER_EVENT), ("products", 1), ("roles", 1)]
+        assert events_for({"products": {str(i) for i in range(MAX_IDS_PER_TABLE + 1)}}) == [("products", None)]
+
+
+class TestDispatch:
+    """Test cases for receiving invalidation events."""
+
+    def test_payload_evicts_crud_entries_and_stamp(self):
+        """Test that an event drops the listed ids in every version and the table stamp."""
+        cache = get_cache("crud.invalidation_test", ttl_seconds=60)
+        for key in (("a", None), ("a", 3), ("b", 3)):
+            cache.get_or_load(key, lambda: "row")
+        table_versions._stamps["invalidation_test"] = (TableVersion(3, datetime.now(timezone.utc)), float("inf"))
+
+        bus = InvalidationBus("test", tables=["invalidation_test"])
+        bus.subscribe("*", evict_cached)
+        bus.dispatch_payload(json.dumps({"table": "invalidation_test", "ids": ["a"], "version": 4}))
+
+        assert set(cache._entries) == {("b", 3)}
+        assert table_versions.cached("invalidation_test") is None
+        assert bus.received == 1
+
+    def test_malformed_payload_is_ignored(self):
+        """Test that unreadable payloads are dropped without calling handlers."""
+        calls = []
+        bus = InvalidationBus("test", tables=[])
+        bus.subscribe("*", lambda *args: calls.append(args))
+        bus.dispatch_payload("not json")
+        bus.dispatch_payload(json.dumps({"ids": ["a"]}))
+        assert calls == [] and bus.received == 0
+
+
+class TestPublish:
+    """Test cases for recording changes in sessions."""
+
+    def make_session(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        factory = sessionmaker(bind=engine)
+        self.bus = InvalidationBus("test", tables=["widgets"])
+        self.bus.install([factory])
+        return factory()
+
+    def test_records_published_tables_only(self):
+        """Test that flushed rows of published tables are pending until commit."""
+        session = self.make_session()
+        session.add_all([Widget(id=1, name="a"), Gadget(id=1)])
+        session.flush()
+        assert session.info[_PENDING] == {"widgets": {"1"}}
+        session.commit()
+        assert _PENDING not in session.info
+
+    def test_bulk_changes_are_marked_explicitly(self):
+        """Test that rows changed by bulk statements are pending alongside flushed ones."""
+        session = self.make_session()
+        session.add(Widget(id=3, name="c"))
+        session.flush()
+        session.query(Widget).filter(Widget.id == 3).update({Widget.name: "d"}, synchronize_session=False)
+        self.bus.mark_changed(session, "widgets", [3, 4])
+        self.bus.mark_changed(session, "gadgets", [1])
+        assert session.info[_PENDING] == {"widgets": {"3", "4"}}
+        session.commit()
+        assert _PENDING not in session.info
+
+    def test_rollback_discards_pending(self):
+        """Test that rolled back changes are never published."""
+        session = self.make_session()
+        session.add(Widget(id=2, name="b"))
+        session.flush()
+        session.rollback()
+        assert _PENDING not in session.info
@@ -0,0 +1,79 @@
+"""
+Unit tests for compiled role permissions.
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.core.conditional import TableVersion, table_versions
+from app.core.permissions import RolePermissions, compile_role, permission_bits
+
+
+class FakeDB:
+    def __init__(self, name, permissions):
+        self.row = SimpleNamespace(name=name, permissions=permissions)
+        self.queries = 0
+
+    def execute(self, statement, params):
+        self.queries += 1
+        return SimpleNamespace(first=lambda: self.row)
+
+
+@pytest.fixture
+def roles_version(monkeypatch):
+    version = {"roles": 1}
+    monkeypatch.setattr(
+        table_versions, "_load", lambda db, table: TableVersion(version[table], datetime.now(timezone.utc))
+    )
+    table_versions.invalidate("roles")
+    yield version
+    table_versions.invalidate("roles")
+
+
+class TestCompileRole:
+    """Test that roles compile to masks that answer checks with one AND."""
+
+    def test_mask_covers_granted_permissions_only(self):
+        role = compile_role(uuid4(), "cashier", ["read", "pos"])
+        assert role.allows(permission_bits.mask(["read"]))
+        assert role.allows(permission_bits.mask(["read", "pos"]))
+        assert not role.allows(permission_bits.mask(["read", "refunds"]))
+        assert role.allows(0)
+
+    def test_wildcard_allows_everything(self):
+        role = compile_role(uuid4(), "admin", ["*"])
+        assert role.allows(permission_bits.mask(["anything", "at-all"]))
+
+    def test_json_text_and_empty_permissions(self):
+        assert compile_role(uuid4(), "user", '["read"]').allows(permission_bits.mask(["read"]))
+        assert not compile_role(uuid4(), "none", None).allows(permission_bits.mask(["read"]))
+
+
+class TestRolePermissions:
+    """Test that compiled roles are cached and recompiled after changes."""
+
+    def test_cached_until_invalidated(self, roles_version):
+        registry = RolePermissions()
+        role_id = uuid4()
+        db = FakeDB("cashier", ["pos"])
+        assert registry.get(db, role_id).name == "cashier"
+        assert registry.get(db, role_id).name == "cashier"
+        assert db.queries == 1
+
+        registry.invalidate()
+        db.row.permissions = ["pos", "refunds"]
+        assert registry.get(db, role_id).allows(permission_bits.mask(["refunds"]))
+        assert db.queries == 2
+
+    def test_newer_roles_version_recompiles(self, roles_version):
+        registry = RolePermissions()
+        role_id = uuid4()
+        db = FakeDB("cashier", ["pos"])
+        assert registry.get(db, role_id).version == 1
+
+        roles_version["roles"] = 2
+        table_versions.load(db, "roles")
+        assert registry.get(db, role_id).version == 2
+        assert db.queries == 2
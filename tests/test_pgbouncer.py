@@ -0,0 +1,92 @@
+"""
+Integration tests for running behind PgBouncer in transaction pooling mode.
+
+Point PGBOUNCER_TEST_URL at a local PgBouncer (`pool_mode = transaction`) in
+front of a Postgres database; the tests are skipped otherwise.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import create_async_workload_engine, create_workload_engine
+
+PGBOUNCER_URL = os.environ.get("PGBOUNCER_TEST_URL")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.external,
+    pytest.mark.skipif(not PGBOUNCER_URL, reason="PGBOUNCER_TEST_URL is not set"),
+]
+
+
+def make_engine(statement_timeout_ms: int = 5_000):
+    return create_workload_engine(
+        PGBOUNCER_URL,
+        pool_size=5,
+        max_overflow=0,
+        statement_timeout_ms=statement_timeout_ms,
+        lock_timeout_ms=1_000,
+        pgbouncer=True,
+    )
+
+
+class TestSyncEngine:
+    """Test cases for psycopg2 engines in PgBouncer mode."""
+
+    def test_timeouts_are_transaction_scoped(self):
+        """Test that every transaction sees the configured timeouts."""
+        engine = make_engine(statement_timeout_ms=1234)
+        for _ in range(20):
+            with engine.begin() as connection:
+                assert connection.execute(text("SHOW statement_timeout")).scalar() == "1234ms"
+                assert connection.execute(text("SHOW lock_timeout")).scalar() == "1s"
+        engine.dispose()
+
+    def test_statement_timeout_is_enforced(self):
+        """Test that a slow statement is cancelled by the per-transaction timeout."""
+        engine = make_engine(statement_timeout_ms=100)
+        with pytest.raises(OperationalError):
+            with engine.begin() as connection:
+                connection.execute(text("SELECT pg_sleep(1)"))
+        engine.dispose()
+
+    def test_no_session_state_leaks(self):
+        """Test that SET LOCAL values do not survive into later transactions."""
+        engine = make_engine()
+        with engine.begin() as connection:
+            connection.execute(text("SET LOCAL application_name = 'leak-check'"))
+
+        def application_name(_):
+            with engine.begin() as connection:
+                return connection.execute(text("SHOW application_name")).scalar()
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            assert "leak-check" not in set(executor.map(application_name, range(50)))
+        engine.dispose()
+
+
+class TestAsyncEngine:
+    """Test cases for asyncpg engines in PgBouncer mode."""
+
+    def test_concurrent_parameterized_queries(self):
+        """Test that repeated parameterized statements do not collide on server connections."""
+
+        async def run():
+            engine = create_async_workload_engine(PGBOUNCER_URL, pgbouncer=True)
+
+            async def query(value: int) -> int:
+                async with engine.connect() as connection:
+                    result = await connection.execute(text("SELECT CAST(:value AS int) + 1"), {"value": value})
+                    return result.scalar()
+
+            try:
+                return await asyncio.gather(*(query(value) for value in range(200)))
+            finally:
+                await engine.dispose()
+
+        assert asyncio.run(run()) == [value + 1 for value in range(200)]
@@ -0,0 +1,75 @@
+"""
+Unit tests for token revocation and typed tokens.
+"""
+from uuid import uuid4
+
+import pytest
+
+from app.core import security
+from app.core.revocation import BloomFilter, RevocationList
+
+
+class TestBloomFilter:
+    """Test that the filter has no false negatives and few false positives."""
+
+    def test_membership(self):
+        bloom = BloomFilter(10_000, 0.01)
+        keys = [uuid4().bytes for _ in range(10_000)]
+        for key in keys:
+            bloom.add(key)
+        assert all(key in bloom for key in keys)
+        false_positives = sum(uuid4().bytes in bloom for _ in range(10_000))
+        assert false_positives < 300
+
+
+class TestRevocationList:
+    """Test that revoked ids are denied until they expire."""
+
+    def test_revoked_until_exp(self, fake_clock):
+        revoked = RevocationList(100, 0.01, clock=fake_clock)
+        jti = uuid4().hex
+        revoked.add(jti, exp=1_060)
+        assert revoked.is_revoked(jti)
+        assert not revoked.is_revoked(uuid4().hex)
+
+        fake_clock.now = 1_060
+        assert not revoked.is_revoked(jti)
+        assert revoked.prune() == 1
+        assert len(revoked) == 0
+
+    def test_already_expired_entries_are_ignored(self, fake_clock):
+        revoked = RevocationList(100, 0.01, clock=fake_clock)
+        revoked.add("legacy-id", exp=999)
+        assert len(revoked) == 0
+
+    def test_filter_grows_past_capacity(self, fake_clock):
+        revoked = RevocationList(10, 0.01, clock=fake_clock)
+        jtis = [uuid4().hex for _ in range(100)]
+        revoked.add_many((jti, 2_000) for jti in jtis)
+        assert all(revoked.is_revoked(jti) for jti in jtis)
+        assert revoked.stats()["filter_bytes"] > BloomFilter(10, 0.01).nbytes
+
+
+@pytest.fixture
+def revoked(monkeypatch):
+    revoked = RevocationList(100, 0.01)
+    monkeypatch.setattr(security, "revocation_list", revoked)
+    return revoked
+
+
+class TestDecodeToken:
+    """Test that access checks reject refresh tokens and revoked tokens."""
+
+    def test_access_and_refresh_are_not_interchangeable(self, revoked):
+        user_id = uuid4()
+        access, refresh = security.create_access_token(user_id), security.create_refresh_token(user_id)
+        assert security.verify_token(access) == str(user_id)
+        assert security.verify_token(refresh) is None
+        assert security.verify_token(refresh, token_type="refresh") == str(user_id)
+        assert security.verify_token(access, token_type="refresh") is None
+
+    def test_revoked_tokens_are_rejected(self, revoked):
+        token = security.create_access_token(uuid4())
+        payload = security.decode_token(token)
+        revoked.add(payload["jti"], payload["exp"])
+        assert security.decode_token(token) is None
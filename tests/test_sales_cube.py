@@ -0,0 +1,210 @@
+"""
+Unit tests for the in-memory sales cube.
+These tests feed the cube from an in-memory list of sales and never touch the database.
+"""
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.sales_cube import SalesCube, hour_bucket
+
+
+# Anchor on the current hour; the cube evicts anything outside its window.
+NOW = datetime.utcnow().replace(minute=30, second=0, microsecond=0)
+HOUR = NOW.replace(minute=0)
+
+
+class ListCube(SalesCube):
+    """A cube whose `pos_sales` table is the `table` list."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.table = []
+        self.ticks = 0
+
+    def add(self, created_at, items, cashier_id=None):
+        self.ticks += 1
+        sale = SimpleNamespace(
+            created_at=created_at,
+            updated_at=self.ticks,
+            cashier_id=cashier_id or uuid.uuid4(),
+            total_amount=sum(subtotal for _, _, subtotal in items),
+            sale_items=[
+                SimpleNamespace(product_id=product_id, quantity=quantity, subtotal=subtotal)
+                for product_id, quantity, subtotal in items
+            ],
+        )
+        self.table.append(sale)
+        return sale
+
+    def edit(self, sale, total_amount):
+        self.ticks += 1
+        sale.total_amount = total_amount
+        sale.updated_at = self.ticks
+
+    def _read_watermarks(self, db, start_hour):
+        watermarks = {}
+        for sale in self.table:
+            hour = hour_bucket(sale.created_at)
+            if hour >= start_hour:
+                count, updated_at = watermarks.get(hour, (0, 0))
+                watermarks[hour] = (count + 1, max(updated_at, sale.updated_at))
+        return watermarks
+
+    def _read_rows(self, db, hours):
+        sales = [sale for sale in self.table if hour_bucket(sale.created_at) in hours]
+        return (
+            [(hour_bucket(sale.created_at), sale.total_amount, sale.cashier_id) for sale in sales],
+            [
+                (hour_bucket(sale.created_at), item.quantity, item.subtotal, item.product_id)
+                for sale in sales for item in sale.sale_items
+            ],
+        )
+
+
+@pytest.fixture
+def cube(fake_clock):
+    return ListCube(window_hours=48, max_rows=1000, clock=fake_clock)
+
+
+class TestSalesCube:
+    """Test cases for SalesCube."""
+
+    def test_revenue_and_top_products(self, cube):
+        """Test revenue totals and top products ordering."""
+        apple, pear = uuid.uuid4(), uuid.uuid4()
+        cube.add(NOW - timedelta(hours=2), [(apple, 3, 3.0), (pear, 1, 2.0)])
+        cube.add(NOW - timedelta(hours=1), [(pear, 5, 10.0)])
+        cube.load(None, now=NOW)
+
+        start = HOUR - timedelta(hours=3)
+        assert cube.covers(start, HOUR)
+        assert cube.revenue(start, HOUR) == (15.0, 2)
+
+        top = cube.top_products(start, HOUR, limit=1)
+        assert top == [{"product_id": pear, "total_quantity": 6, "total_revenue": 12.0}]
+
+    def test_hourly_breakdown_includes_empty_hours(self, cube):
+        """Test that every hour in the range is reported."""
+        product = uuid.uuid4()
+        cube.add(HOUR - timedelta(hours=3, minutes=-15), [(product, 1, 5.0)])
+        cube.add(HOUR - timedelta(hours=1, minutes=-45), [(product, 1, 7.0)])
+        cube.load(None, now=NOW)
+
+        hourly = cube.hourly_breakdown(HOUR - timedelta(hours=4), HOUR + timedelta(hours=1))
+        assert [row["total_sales"] for row in hourly] == [0, 1, 0, 1, 0]
+        assert [row["total_revenue"] for row in hourly] == [0.0, 5.0, 0.0, 7.0, 0.0]
+
+    def test_open_hour_and_unaligned_ranges_not_covered(self, cube):
+        """Test that the current hour and sub-hour ranges fall back to SQL."""
+        cube.load(None, now=NOW)
+        assert cube.covers(HOUR - timedelta(hours=2), HOUR)
+        assert not cube.covers(HOUR - timedelta(hours=2), HOUR + timedelta(hours=1))
+        assert not cube.covers(NOW - timedelta(hours=2), HOUR)
+        assert not cube.covers(HOUR - timedelta(days=5), HOUR)
+
+    def test_refresh_picks_up_other_workers_edits_and_deletes(self, cube):
+        """Test that hours whose watermark moved are reloaded from the table."""
+        product = uuid.uuid4()
+        kept = cube.add(NOW - timedelta(hours=3), [(product, 1, 4.0)])
+        voided = cube.add(NOW - timedelta(hours=2), [(product, 1, 6.0)])
+        cube.load(None, now=NOW)
+        start = HOUR - timedelta(hours=4)
+        assert cube.revenue(start, HOUR) == (10.0, 2)
+
+        cube.add(NOW - timedelta(hours=1), [(product, 2, 8.0)])
+        cube.edit(kept, 3.0)
+        cube.table.remove(voided)
+        assert cube.refresh(None, now=NOW) == 3
+        assert cube.revenue(start, HOUR) == (11.0, 2)
+        assert cube.refresh(None, now=NOW) == 0
+
+    def test_local_writes_are_not_answered_until_refreshed(self, cube):
+        """Test that an hour written on this worker falls back to SQL until the next refresh."""
+        product = uuid.uuid4()
+        sale = cube.add(NOW - timedelta(hours=2), [(product, 1, 5.0)])
+        cube.load(None, now=NOW)
+
+        cube.table.remove(sale)
+        cube.mark_stale(sale.created_at)
+        assert not cube.covers(HOUR - timedelta(hours=3), HOUR)
+        assert cube.covers(HOUR - timedelta(hours=1), HOUR)
+
+        cube.refresh(None, now=NOW)
+        assert cube.covers(HOUR - timedelta(hours=3), HOUR)
+        assert cube.revenue(HOUR - timedelta(hours=3), HOUR) == (0.0, 0)
+
+    def test_stale_cube_is_not_used(self, cube):
+        """Test that a cube that stopped refreshing answers nothing."""
+        cube.load(None, now=NOW)
+        cube.clock.now += cube.max_staleness_seconds + 1
+        assert not cube.covers(HOUR - timedelta(hours=2), HOUR)
+
+    def test_row_cap_evicts_oldest_hours(self, fake_clock):
+        """Test that the memory cap drops whole hours and shrinks coverage."""
+        cube = ListCube(window_hours=10_000, max_rows=10, clock=fake_clock)
+        product = uuid.uuid4()
+        for offset in range(20):
+            cube.add(NOW - timedelta(hours=20 - offset), [(product, 1, 1.0)])
+        cube.load(None, now=NOW)
+
+        assert cube.stats()["sales"] <= 10
+        assert not cube.covers(HOUR - timedelta(hours=20), HOUR)
+        assert cube.covers(HOUR - timedelta(hours=5), HOUR)
+        # Evicted hours are not reloaded by later refreshes.
+        assert cube.refresh(None, now=NOW) == 0
+
+
+class TestRangeBoundary:
+    """Test that the cube and the SQL fallback agree on `[start, end)`."""
+
+    @pytest.fixture
+    def db(self):
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE pos_sales (id CHAR(32) PRIMARY KEY, created_at DATETIME, total_amount FLOAT)"
+            ))
+            conn.execute(text(
+                "CREATE TABLE pos_sale_items (id CHAR(32) PRIMARY KEY, sale_id CHAR(32), "
+                "product_id CHAR(32), quantity INTEGER, subtotal FLOAT)"
+            ))
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+
+    def test_sale_at_end_date_is_excluded_by_both_paths(self, cube, db):
+        """Test that a sale made exactly at end_date counts for neither the cube nor SQL."""
+        from sqlalchemy import text
+
+        import app.models.customer, app.models.employee, app.models.misc, app.models.pos  # noqa: E401,F401
+        import app.models.sale, app.models.user  # noqa: E401,F401
+        from app.crud import pos as pos_crud
+
+        product = uuid.uuid4()
+        start, end = HOUR - timedelta(hours=3), HOUR - timedelta(hours=1)
+        for created_at, quantity in [(start, 1), (end - timedelta(seconds=1), 2), (end, 4)]:
+            sale = cube.add(created_at, [(product, quantity, float(quantity))])
+            sale_id = uuid.uuid4().hex
+            # Store created_at the way SQLAlchemy's DateTime binds it, so comparisons line up.
+            db.execute(text("INSERT INTO pos_sales VALUES (:id, :created_at, :total)"),
+                       {"id": sale_id, "created_at": created_at.strftime("%Y-%m-%d %H:%M:%S.%f"),
+                        "total": sale.total_amount})
+            db.execute(text("INSERT INTO pos_sale_items VALUES (:id, :sale_id, :product_id, :quantity, :subtotal)"),
+                       {"id": uuid.uuid4().hex, "sale_id": sale_id, "product_id": product.hex,
+                        "quantity": quantity, "subtotal": float(quantity)})
+        cube.load(None, now=NOW)
+
+        assert cube.covers(start, end)
+        assert cube.revenue(start, end) == (3.0, 2)
+        assert pos_crud.pos_sale.get_revenue(db, start_date=start, end_date=end) == (3.0, 2)
+
+        expected = [{"product_id": product, "total_quantity": 3, "total_revenue": 3.0}]
+        assert cube.top_products(start, end) == expected
+        assert pos_crud.pos_sale.get_top_selling_products(db, start_date=start, end_date=end) == expected
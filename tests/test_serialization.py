@@ -0,0 +1,145 @@
+"""
+Unit tests for the row serializer and MessagePack content negotiation.
+"""
+import json
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import List
+from uuid import UUID, uuid4
+
+import msgpack
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.core.serialization import (
+    JSON,
+    MSGPACK,
+    ContentNegotiationMiddleware,
+    RowSerializer,
+    negotiate,
+    packb,
+    response_format,
+)
+
+
+class Item(BaseModel):
+    id: object
+    name: str
+    created_at: datetime
+
+
+class Order(BaseModel):
+    id: object
+    items: List[Item]
+
+
+Record = namedtuple("Record", "id name created_at")
+
+
+class TestRowSerializer:
+    """Test cases for RowSerializer."""
+
+    def test_matches_pydantic_output(self):
+        """Test that rows serialize exactly like the schema would."""
+        rows = [Record(uuid4(), f"item {i}", datetime(2024, 1, 1, 12, i)) for i in range(3)]
+        serializer = RowSerializer.for_schema(Item)
+        expected = [json.loads(Item(**row._asdict()).model_dump_json()) for row in rows]
+        assert json.loads(serializer.response(rows).body) == expected
+
+    def test_nested_collections(self):
+        """Test that nested one-to-many attributes use their own serializer."""
+        order = namedtuple("OrderRow", "id lines")(uuid4(), [Record(uuid4(), "a", datetime(2024, 1, 1))])
+        serializer = RowSerializer.for_schema(Order, nested={"items": ("lines", RowSerializer.for_schema(Item))})
+        body = json.loads(serializer.one_response(order).body)
+        assert body["items"][0]["name"] == "a"
+        assert body["id"] == str(order.id)
+
+    def test_nested_model_requires_serializer(self):
+        """Test that nested models are rejected unless a serializer is given."""
+        with pytest.raises(TypeError):
+            RowSerializer.for_schema(Order)
+
+    def test_columnar_layout(self):
+        """Test that the columnar layout emits one header and value arrays."""
+        rows = [Record(uuid4(), f"item {i}", datetime(2024, 1, 1)) for i in range(2)]
+        token = response_format.set((MSGPACK, True))
+        try:
+            response = RowSerializer.for_schema(Item).response(rows)
+        finally:
+            response_format.reset(token)
+        body = msgpack.unpackb(response.body, timestamp=3)
+        assert response.media_type == MSGPACK
+        assert body["columns"] == ["id", "name", "created_at"]
+        assert UUID(bytes=body["rows"][1][0]) == rows[1].id
+        assert body["rows"][1][1:] == ["item 1", datetime(2024, 1, 1, tzinfo=timezone.utc)]
+
+
+class TestNegotiate:
+    """Test cases for negotiate."""
+
+    def test_json_is_the_default(self):
+        """Test that missing or generic Accept headers get JSON."""
+        assert negotiate("") == (JSON, False)
+        assert negotiate("*/*") == (JSON, False)
+
+    def test_msgpack_and_layout(self):
+        """Test that MessagePack and the columnar layout are picked up, respecting q values."""
+        assert negotiate("application/msgpack") == (MSGPACK, False)
+        assert negotiate("application/x-msgpack; layout=columnar, application/json;q=0.5") == (MSGPACK, True)
+        assert negotiate("application/msgpack;q=0.2, application/json") == (JSON, False)
+
+
+class TestContentNegotiationMiddleware:
+    """Test cases for ContentNegotiationMiddleware."""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+        app.add_middleware(ContentNegotiationMiddleware, prefix="/api")
+
+        @app.post("/api/echo")
+        def echo(item: dict):
+            return {"received": item}
+
+        class Reference(BaseModel):
+            customer_id: UUID
+            at: datetime
+
+        @app.post("/api/reference")
+        def reference(item: Reference):
+            return {"customer_id": item.customer_id, "at": item.at}
+
+        return TestClient(app)
+
+    def test_msgpack_round_trip(self, client):
+        """Test that MessagePack bodies are accepted and JSON responses transcoded."""
+        response = client.post(
+            "/api/echo",
+            content=msgpack.packb({"name": "tea", "quantity": 2}),
+            headers={"content-type": MSGPACK, "accept": MSGPACK},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == MSGPACK
+        assert msgpack.unpackb(response.content) == {"received": {"name": "tea", "quantity": 2}}
+
+    def test_ids_and_timestamps_round_trip(self, client):
+        """Test that UUIDs and datetimes sent back in the form responses use are accepted."""
+        sent = {"customer_id": uuid4(), "at": datetime(2024, 5, 1, 12, 30, 15, 250000)}
+        response = client.post(
+            "/api/reference",
+            content=packb(sent),
+            headers={"content-type": MSGPACK, "accept": MSGPACK},
+        )
+        assert response.status_code == 200
+        # Transcoded JSON responses carry both as strings.
+        received = msgpack.unpackb(response.content)
+        assert UUID(received["customer_id"]) == sent["customer_id"]
+        assert datetime.fromisoformat(received["at"]) == sent["at"].replace(tzinfo=timezone.utc)
+
+    def test_invalid_msgpack_body(self, client):
+        """Test that undecodable bodies are rejected with 400."""
+        response = client.post("/api/echo", content=b"\xc1", headers={"content-type": MSGPACK})
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Invalid MessagePack body"}
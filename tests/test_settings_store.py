@@ -0,0 +1,77 @@
+"""
+Unit tests for the typed settings snapshot.
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.utils.settings_store import SettingsStore, parse_value
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        # Only the columns the store reads; the model's UUID ids do not exist in SQLite.
+        connection.execute(text("CREATE TABLE settings (key TEXT PRIMARY KEY, value TEXT)"))
+        connection.execute(text("CREATE TABLE table_versions (table_name TEXT PRIMARY KEY, version INTEGER)"))
+        connection.execute(text("INSERT INTO table_versions VALUES ('settings', 3)"))
+    return sessionmaker(bind=engine)
+
+
+def put(session_factory, key, value):
+    with session_factory() as db:
+        db.execute(text("INSERT OR REPLACE INTO settings VALUES (:key, :value)"), {"key": key, "value": value})
+        db.commit()
+
+
+class TestParseValue:
+    """Test that stored strings are converted to the declared types."""
+
+    def test_known_keys_are_typed(self):
+        assert parse_value("tax_rate", "0.08") == 0.08
+        assert parse_value("loyalty_enabled", "off") is False
+        assert parse_value("currency", "EUR") == "EUR"
+
+    def test_unknown_keys_stay_strings(self):
+        assert parse_value("printer_name", "12") == "12"
+
+    def test_bad_values_raise(self):
+        with pytest.raises(ValueError):
+            parse_value("tax_rate", "eight percent")
+        with pytest.raises(ValueError):
+            parse_value("loyalty_enabled", "maybe")
+
+
+class TestSettingsStore:
+    """Test that reloads swap snapshots and report changed keys."""
+
+    def test_defaults_before_load(self):
+        store = SettingsStore()
+        assert store["tax_rate"] == 0.0
+        assert store.get("missing", "x") == "x"
+        assert not store.loaded
+
+    def test_load_overlays_rows_and_notifies_changes(self, session_factory):
+        store = SettingsStore()
+        changes = []
+        store.subscribe(lambda snapshot, changed: changes.append((snapshot.version, changed)))
+
+        put(session_factory, "tax_rate", "0.08")
+        put(session_factory, "note", "hello")
+        store.reload(session_factory)
+        assert store["tax_rate"] == 0.08
+        assert store["note"] == "hello"
+        assert changes == [(3, {"tax_rate", "note"})]
+
+        # Nothing changed: no notification.
+        store.reload(session_factory)
+        assert len(changes) == 1
+
+    def test_invalid_rows_keep_the_default(self, session_factory):
+        store = SettingsStore()
+        put(session_factory, "tax_rate", "lots")
+        store.reload(session_factory)
+        assert store["tax_rate"] == 0.0
@@ -0,0 +1,65 @@
+"""
+Unit tests for the Space-Saving best-sellers sketch.
+"""
+import random
+from collections import Counter
+
+from app.utils.top_products import SpaceSaving, WindowedTopK
+
+
+def zipf_stream(n_items: int, n_keys: int, seed: int = 7):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(n_keys)]
+    return rng.choices(range(n_keys), weights=weights, k=n_items)
+
+
+class TestSpaceSaving:
+    """Test cases for SpaceSaving."""
+
+    def test_counts_bound_true_frequency(self):
+        """Test that every counter brackets the true count."""
+        stream = zipf_stream(20_000, 1_000)
+        exact = Counter(stream)
+        summary = SpaceSaving(capacity=50)
+        for key in stream:
+            summary.offer(key)
+
+        for key, (count, error, _) in summary.counters.items():
+            assert count - error <= exact[key] <= count
+
+    def test_top_matches_exact_heavy_hitters(self):
+        """Test that the heaviest keys are reported in order."""
+        stream = zipf_stream(20_000, 1_000)
+        exact = Counter(stream)
+        summary = SpaceSaving(capacity=100)
+        for key in stream:
+            summary.offer(key)
+
+        top = [row["product_id"] for row in summary.top(5)]
+        assert top == [key for key, _ in exact.most_common(5)]
+
+    def test_merge_and_round_trip(self):
+        """Test merging two worker summaries after serialization."""
+        left, right = SpaceSaving(capacity=20), SpaceSaving(capacity=20)
+        for key in zipf_stream(5_000, 200, seed=1):
+            left.offer(str(key))
+        for key in zipf_stream(5_000, 200, seed=2):
+            right.offer(str(key))
+
+        merged = SpaceSaving.from_dict(left.to_dict()).merge(SpaceSaving.from_dict(right.to_dict()))
+        assert len(merged.counters) <= 20
+        assert merged.top(1)[0]["product_id"] == "0"
+
+
+class TestWindowedTopK:
+    """Test cases for WindowedTopK."""
+
+    def test_old_buckets_expire(self):
+        """Test that sales outside the window stop counting."""
+        window = WindowedTopK(bucket_seconds=60, n_buckets=2, capacity=10)
+        window.offer("old", 100, at=0)
+        window.offer("new", 1, at=60)
+        assert window._window.top(1)[0]["product_id"] == "old"
+
+        window.offer("new", 1, at=120)
+        assert [row["product_id"] for row in window._window.top(2)] == ["new"]
@@ -0,0 +1,56 @@
+"""
+Tests for the worker warm-up.
+"""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models.customer, app.models.employee, app.models.misc, app.models.pos  # noqa: E401,F401
+import app.models.sale, app.models.user  # noqa: E401,F401
+from app.core.conditional import TableVersion, table_versions
+from app.core.warmup import warm_catalog_cache
+from app.crud.product import product as product_crud
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE products (id CHAR(32) PRIMARY KEY, created_at DATETIME, updated_at DATETIME, "
+            "created_by CHAR(32), updated_by CHAR(32), name VARCHAR(100), price FLOAT, "
+            "description TEXT, category VARCHAR(50), discount_id CHAR(32))"
+        ))
+        for i in range(3):
+            conn.execute(text(
+                "INSERT INTO products (id, created_at, updated_at, name, price) "
+                "VALUES (:id, '2026-01-01 00:00:00.000000', '2026-01-01 00:00:00.000000', :name, 1.0)"
+            ), {"id": uuid.uuid4().hex, "name": f"product {i}"})
+    session = sessionmaker(bind=engine)()
+    monkeypatch.setattr(table_versions, "_load", lambda db, table: TableVersion(3, datetime(2026, 1, 1, tzinfo=timezone.utc)))
+    product_crud.cache.clear()
+    table_versions.invalidate("products")
+    yield session
+    session.close()
+    product_crud.cache.clear()
+    table_versions.invalidate("products")
+
+
+class TestCatalogWarmup:
+    """Test that warm-up primes the product cache."""
+
+    def test_products_are_cached_under_both_route_keys(self, db):
+        """Test that product detail and cart lookups hit the cache after warm-up."""
+        assert warm_catalog_cache(db, products=2) == 2
+
+        ids = sorted(id for (id,) in db.execute(text("SELECT id FROM products")))[:2]
+        loads = []
+        for id in ids:
+            for version in (3, None):
+                product = product_crud.cache.get_or_load((str(uuid.UUID(id)), version), lambda: loads.append(id))
+                assert product.name.startswith("product")
+        assert loads == []